@@ -2,7 +2,7 @@ from collections.abc import Callable
 from dataclasses import dataclass
 
 # from pathlib import Path
-from typing import Any, Generic, NamedTuple, TypeAlias, TypeVar
+from typing import Any, Generic, Literal, NamedTuple, TypeAlias, TypeVar
 
 from numpy import bool_, dtype, float32, int8, ndarray, random
 
@@ -53,6 +53,37 @@ PolicyMakerAsPlayer: TypeAlias = Callable[[BoardTensor], int]
 class MctsArgs:
     num_mcts_sims: int
     c_puct: float
+    leaf_batch_size: int = 1  # leaves evaluated per network call
+    virtual_loss: int = 1  # lost visits added to an edge pending evaluation
+    reuse_root_visits: bool = False  # count visits kept by MCTS.advance as sims
+    # transposition table budget, evicting nodes off the search path beyond it
+    max_nodes: int | None = None
+    max_bytes: int | None = None  # estimated from the size of the first node
+    eviction: Literal["lru", "least_visited"] = "lru"
+    # Dirichlet noise mixed into the root prior, off while dirichlet_alpha is 0
+    dirichlet_alpha: float = 0.0
+    dirichlet_epsilon: float = 0.25
+    seed: int | None = None  # seeds the noise, the shared RNG if None
+    # "gumbel" replaces PUCT at the root by Gumbel-top-k and sequential halving
+    root_search: Literal["puct", "gumbel"] = "puct"
+    gumbel_num_actions: int = 16  # actions sampled without replacement
+    gumbel_c_visit: float = 50.0  # sigma(q) = (c_visit + max N) * c_scale * q
+    gumbel_c_scale: float = 1.0
+    # at temperature 0, stop once the most visited root action is decided
+    early_stop: bool = False
+    # per-move deadline, num_mcts_sims then only caps the simulations
+    time_budget_ms: float | None = None
+    solver: bool = False  # prove wins, losses and draws, and stop searching them
+    symmetry: bool = False  # one node per get_symmetries class of positions
+    cache_children: bool = True  # look up the child of a known edge, see MCTS
+    # progressive widening: a node with N visits only selects among its
+    # ceil(widening_base * (N + 1) ** widening_exponent) best actions by prior
+    widening_base: float | None = None
+    widening_exponent: float = 0.5
+    num_threads: int = 1  # threads searching one tree, see TreeParallelMCTS
+    telemetry: bool = False  # count the work of each move, see SearchStats
+    # debug: raise on boards sharing a hash, or incremental hashes that are off
+    check_hashes: bool = False
 
 
 BoardEvaluation: TypeAlias = float
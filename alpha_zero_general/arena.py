@@ -146,4 +146,10 @@ class Arena(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
             else:
                 draws += 1
 
+        # the players are still swapped from the second half
+        for name, player in ("player1", self.player2), ("player2", self.player1):
+            search_stats = getattr(player, "search_stats", None)
+            if search_stats is not None and search_stats.moves:
+                log.info(f"{name} search: {search_stats}")
+
         return one_won, two_won, draws
@@ -0,0 +1,170 @@
+import math
+
+from numpy import (
+    asarray,
+    bool_,
+    flatnonzero,
+    float32,
+    float64,
+    inf,
+    int32,
+    int_,
+    where,
+    zeros,
+)
+from numpy.typing import NDArray
+
+from alpha_zero_general import (
+    GenericBooleanBoardTensor,
+    GenericPolicyTensor,
+    MctsArgs,
+)
+from alpha_zero_general.game import BoardTensor, BooleanBoard, GenericGame, PolicyTensor
+from alpha_zero_general.mcts import MCTS, NODE_OVERHEAD_BYTES
+from alpha_zero_general.neural_net import Predictor
+from alpha_zero_general.tree_file import NodeRecord
+
+
+class ArrayNode:
+    """
+    Statistics of one expanded node, one contiguous array entry per action.
+    """
+
+    __slots__ = ("visits", "n", "q", "p", "valid", "puct_prior")
+
+    visits: int  # N(s,*)
+    n: NDArray[int32]  # N(s,a)
+    q: NDArray[float32]  # Q(s,a), 0 for unvisited edges
+    p: NDArray[float32]  # P(s,a), masked prior from nn
+    valid: NDArray[bool_]  # valid move mask
+    puct_prior: NDArray[float32]  # c_puct * P(s,a), -inf for invalid moves
+
+    def __init__(
+        self,
+        policy: GenericPolicyTensor,
+        valid_move: GenericBooleanBoardTensor,
+        c_puct: float,
+    ) -> None:
+        action_size = len(valid_move)
+        self.visits = 0
+        self.n = zeros(action_size, dtype=int32)
+        self.q = zeros(action_size, dtype=float32)
+        self.p = policy.astype(float32)
+        self.valid = valid_move != 0
+        self.puct_prior = where(self.valid, c_puct * self.p, -inf).astype(float32)
+
+
+class ArrayMCTS(MCTS[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Drop-in MCTS whose nodes store N, Q and P as contiguous arrays instead of
+    dicts keyed by (board_hash, action). Selection is a single vectorized
+    argmax per node and backup is an in-place array update, which pays off on
+    games with large action spaces (Gobang, Tafl).
+
+    The search itself is inherited from MCTS, only the node store differs.
+    """
+
+    nodes: dict[int, ArrayNode]  # board_hash -> node statistics
+
+    def __init__(
+        self,
+        game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor],
+        nn: Predictor,
+        args: MctsArgs,
+    ) -> None:
+        super().__init__(game, nn, args)
+        self.nodes = {}
+
+    def _is_expanded(self, h: int) -> bool:
+        return h in self.nodes
+
+    def _expand(
+        self, h: int, policy: GenericPolicyTensor, valid_move: GenericBooleanBoardTensor
+    ) -> None:
+        self.nodes[h] = ArrayNode(policy, valid_move, self.args.c_puct)
+
+    def _select_action(self, h: int) -> int:
+        node = self.nodes[h]
+        candidates = self._candidates(h)
+        if candidates is not None:  # the same over the widened actions only
+            if node.visits == 0:
+                return int(candidates[node.puct_prior[candidates].argmax()])
+            u = node.q[candidates] + node.puct_prior[candidates] * (
+                math.sqrt(node.visits) / (1 + node.n[candidates])
+            )
+            return int(candidates[u.argmax()])
+        if node.visits == 0:
+            # every edge is unvisited, U(s,a) is proportional to the prior
+            return int(node.puct_prior.argmax())
+        # unvisited edges have q = 0 and n = 0, so this is the PUCT formula of
+        # MCTS._select_action up to the EPS it adds under their square root
+        u = node.q + node.puct_prior * (math.sqrt(node.visits) / (1 + node.n))
+        return int(u.argmax())
+
+    def _update_edge(self, h: int, action: int, v: float) -> None:
+        node = self.nodes[h]
+        node.n[action] += 1
+        node.q[action] += (v - node.q[action]) / node.n[action]
+        node.visits += 1
+
+    def _add_virtual_loss(self, h: int, action: int, loss: int) -> None:
+        node = self.nodes[h]
+        n = node.n[action]
+        node.n[action] = n + loss
+        node.q[action] = (n * node.q[action] - loss) / (n + loss) if n + loss else 0
+        node.visits += loss
+
+    def _exclude_action(self, h: int, action: int) -> None:
+        node = self.nodes[h]
+        node.valid[action] = False
+        node.puct_prior[action] = -inf
+
+    def _has_selectable_action(self, h: int) -> bool:
+        return bool(self.nodes[h].valid.any())
+
+    def _node_visits(self, h: int) -> int:
+        return self.nodes[h].visits if h in self.nodes else 0
+
+    def _prune(self, keep: set[int]) -> None:
+        super()._prune(keep)
+        self.nodes = {h: node for h, node in self.nodes.items() if h in keep}
+
+    def _evict(self, h: int) -> None:
+        super()._evict(h)
+        self.nodes.pop(h, None)
+
+    def _node_bytes(self, h: int) -> int:
+        node = self.nodes[h]
+        arrays = node.n, node.q, node.p, node.valid, node.puct_prior
+        return (
+            asarray(self.board_cache[h]).nbytes
+            + sum(a.nbytes for a in arrays)
+            + NODE_OVERHEAD_BYTES
+        )
+
+    def _node_record(self, h: int) -> NodeRecord:
+        node = self.nodes[h]
+        actions = flatnonzero(node.valid).astype(int32)
+        return NodeRecord(
+            node.visits, actions, node.n[actions], node.q[actions], node.p[actions]
+        )
+
+    def _restore_node(self, h: int, record: NodeRecord) -> None:
+        policy = zeros(self.game.get_action_size(), dtype=float32)
+        policy[record.actions] = record.p
+        valid_move = zeros(self.game.get_action_size(), dtype=bool_)
+        valid_move[record.actions] = True
+        node = ArrayNode(policy, valid_move, self.args.c_puct)
+        node.n[record.actions] = record.n
+        node.q[record.actions] = record.q
+        node.visits = record.visits
+        self.nodes[h] = node
+
+    def _priors_and_values(self, h: int) -> tuple[NDArray[float64], NDArray[float64]]:
+        node = self.nodes[h]
+        return node.p.astype(float64), node.q.astype(float64)
+
+    def _visit_counts(self, h: int) -> NDArray[int_]:
+        if h not in self.nodes:
+            return zeros(self.game.get_action_size(), dtype=int_)
+        return self.nodes[h].n.astype(int_)
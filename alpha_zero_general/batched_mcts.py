@@ -0,0 +1,367 @@
+import logging
+from typing import Any, Generic, cast
+
+from numpy import (
+    arange,
+    asarray,
+    flatnonzero,
+    float64,
+    full,
+    inf,
+    int32,
+    int_,
+    sqrt,
+    where,
+    zeros,
+)
+from numpy.typing import NDArray
+
+from alpha_zero_general import EPS, MctsArgs
+from alpha_zero_general.game import BoardTensor, BooleanBoard, GenericGame, PolicyTensor
+from alpha_zero_general.mcts import counts_to_policy
+from alpha_zero_general.neural_net import Predictor
+
+log = logging.getLogger(__name__)
+
+
+class BatchedGame(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Batch-aware adapter of a GenericGame for BatchedMCTS: each method applies
+    the game rules to a list of boards. These defaults call the game once per
+    board; a game whose rules vectorize can subclass this and override them.
+    """
+
+    game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor]
+
+    def __init__(self, game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor]):
+        self.game = game
+
+    def get_next_canonical_states(
+        self, boards: list[BoardTensor], hashes: list[int], actions: list[int]
+    ) -> tuple[list[BoardTensor], list[int]]:
+        """
+        Returns:
+            next_boards: get_next_canonical_state of every (board, action)
+            next_hashes: their hashes
+        """
+        next_states = [
+            self.game.get_next_canonical_state(board, h, action)
+            for board, h, action in zip(boards, hashes, actions)
+        ]
+        return [board for board, _ in next_states], [h for _, h in next_states]
+
+    def get_valid_moves(self, boards: list[BoardTensor]) -> NDArray[int_]:
+        """
+        Returns:
+            valid_moves: (len(boards), action size), the valid moves of player 1
+        """
+        return asarray(
+            [self.game.get_valid_moves(board, 1) for board in boards], dtype=int_
+        ).reshape(len(boards), self.game.get_action_size())
+
+    def get_game_ended(self, boards: list[BoardTensor]) -> NDArray[float64]:
+        """
+        Returns:
+            values: get_game_ended of every board for player 1
+        """
+        return asarray(
+            [self.game.get_game_ended(board, 1) for board in boards], dtype=float64
+        )
+
+
+class BatchedMCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Searches batch_size independent positions in lockstep, for self-play and
+    arenas playing many games at once. The trees live in shared preallocated
+    arrays indexed by (tree, node, action), like mctx: each simulation selects
+    in all the trees with one vectorized PUCT step per depth, evaluates the
+    leaves they reach with one nn.predict_batch call and backs the paths up
+    with scatter updates. The network then sees batches of up to batch_size
+    boards instead of one board per call.
+
+    A tree holds one node per board hash, so transpositions are shared as in
+    MCTS, and each tree's visit counts are those of MCTS with the same
+    args. Every get_action_probabilities call searches from scratch, with
+    args.num_mcts_sims simulations per tree; the other options of MctsArgs
+    are not supported.
+
+    The game rules are applied through a BatchedGame, one call per depth for
+    all the trees whose descent walks a new edge.
+    """
+
+    game: BatchedGame[BoardTensor, BooleanBoard, PolicyTensor]
+    nn: Predictor
+    args: MctsArgs
+    batch_size: int  # number of trees
+    capacity: int  # nodes per tree, num_mcts_sims + 1
+
+    # node arrays, (batch_size, capacity) or (batch_size, capacity, actions)
+    visits: NDArray[int_]  # N(s,*)
+    n: NDArray[int_]  # N(s,a)
+    q: NDArray[float64]  # Q(s,a), 0 for unvisited edges
+    p: NDArray[float64]  # P(s,a), the masked prior
+    valid: NDArray[int_]  # valid move mask
+    children: NDArray[int32]  # node reached by (s,a), -1 if the edge is unexplored
+    game_value: NDArray[float64]  # get_game_ended of the node's board, 0 if ongoing
+    expanded: NDArray[int_]  # whether the node has been evaluated by the network
+    num_nodes: NDArray[int_]  # (batch_size,) nodes allocated in each tree
+
+    boards: list[list[BoardTensor]]  # canonical board of every allocated node
+    hashes: list[list[int]]  # and its hash
+    node_index: list[dict[int, int]]  # board hash -> node, one per tree
+
+    def __init__(
+        self,
+        game: (
+            GenericGame[BoardTensor, BooleanBoard, PolicyTensor]
+            | BatchedGame[BoardTensor, BooleanBoard, PolicyTensor]
+        ),
+        nn: Predictor,
+        args: MctsArgs,
+        batch_size: int,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        unsupported = [
+            name
+            for name, default in _LOCKSTEP_DEFAULTS.items()
+            if getattr(args, name) != default
+        ]
+        if unsupported:
+            raise ValueError(f"batched search does not support {unsupported}")
+        self.game = game if isinstance(game, BatchedGame) else BatchedGame(game)
+        self.nn = nn
+        self.args = args
+        self.batch_size = batch_size
+        self.capacity = max(0, args.num_mcts_sims) + 1  # a node per sim, the root
+        action_size = self.game.game.get_action_size()
+        shape = (batch_size, self.capacity)
+        self.visits = zeros(shape, dtype=int_)
+        self.n = zeros((*shape, action_size), dtype=int_)
+        self.q = zeros((*shape, action_size))
+        self.p = zeros((*shape, action_size))
+        self.valid = zeros((*shape, action_size), dtype=int_)
+        self.children = full((*shape, action_size), -1, dtype=int32)
+        self.game_value = zeros(shape)
+        self.expanded = zeros(shape, dtype=int_)
+        self.num_nodes = zeros(batch_size, dtype=int_)
+        self.boards = [[] for _ in range(batch_size)]
+        self.hashes = [[] for _ in range(batch_size)]
+        self.node_index = [{} for _ in range(batch_size)]
+
+    def get_action_probabilities(
+        self, canonical_boards: list[BoardTensor], temperature: int = 1
+    ) -> list[PolicyTensor]:
+        """
+        Run args.num_mcts_sims simulations on each of canonical_boards, at
+        most batch_size of them, in its own tree.
+
+        Returns:
+            probs: the policy of each board, as MCTS.get_action_probabilities
+                would return it
+        """
+        if len(canonical_boards) > self.batch_size:
+            raise ValueError(
+                f"{len(canonical_boards)} boards for {self.batch_size} trees"
+            )
+        self._reset(canonical_boards)
+        trees = arange(len(canonical_boards))
+        for _ in range(self.args.num_mcts_sims):
+            self.simulate(trees)
+        probs = []
+        for b, board in enumerate(canonical_boards):
+            counts = self.n[b, 0]
+            if counts.sum() == 0:  # an ended game, see MCTS._root_policy
+                counts = self.game.get_valid_moves([board])[0]
+            probs.append(cast(PolicyTensor, counts_to_policy(counts, temperature)))
+        return probs
+
+    def _reset(self, canonical_boards: list[BoardTensor]) -> None:
+        """
+        Empty the trees and allocate the root of each of canonical_boards.
+        """
+        for b in range(self.batch_size):
+            self.boards[b].clear()
+            self.hashes[b].clear()
+            self.node_index[b].clear()
+        self.num_nodes[:] = 0
+        self.visits[:] = 0
+        self.n[:] = 0
+        self.q[:] = 0
+        self.children[:] = -1
+        self.expanded[:] = 0
+        boards = list(canonical_boards)
+        hashes = [self.game.game.get_board_hash(board) for board in boards]
+        self._allocate(arange(len(boards)), boards, hashes)
+
+    def simulate(self, trees: NDArray[int_]) -> None:
+        """
+        One simulation in each of the trees: descend, evaluate the new leaves
+        in one batch and back up.
+        """
+        nodes = zeros(len(trees), dtype=int_)  # current node of each tree
+        path_nodes: list[NDArray[int_]] = []  # [d][i]: node of trees[i] at depth d
+        path_actions: list[NDArray[int_]] = []
+        depths = zeros(len(trees), dtype=int_)  # edges walked by each descent
+        active = self._walkable(trees, nodes)
+
+        while active.any():
+            rows = flatnonzero(active)
+            tree, node = trees[rows], nodes[rows]
+            actions = self._select(tree, node)
+            d = len(path_nodes)
+            path_nodes.append(nodes.copy())
+            path_actions.append(zeros(len(trees), dtype=int_))
+            path_actions[d][rows] = actions
+            depths[rows] += 1
+
+            child = self.children[tree, node, actions].astype(int_)
+            new = flatnonzero(child < 0)
+            if len(new):
+                child[new] = self._walk(tree[new], node[new], actions[new])
+            nodes[rows] = child
+            active[rows] = self._walkable(tree, child)
+
+        leaves = flatnonzero(self.game_value[trees, nodes] == 0)
+        values = -self.game_value[trees, nodes]  # for the player who moved in
+        if len(leaves):
+            values[leaves] = -self._evaluate(trees[leaves], nodes[leaves])
+
+        for d in range(len(path_nodes) - 1, -1, -1):
+            rows = flatnonzero(depths > d)
+            sign = where((depths[rows] - 1 - d) % 2 == 0, 1.0, -1.0)
+            self._update_edges(
+                trees[rows],
+                path_nodes[d][rows],
+                path_actions[d][rows],
+                values[rows] * sign,
+            )
+
+    def _walkable(self, trees: NDArray[int_], nodes: NDArray[int_]) -> NDArray[Any]:
+        """
+        Whether the descent goes on from each node: expanded and not terminal.
+        """
+        return (self.expanded[trees, nodes] != 0) & (self.game_value[trees, nodes] == 0)
+
+    def _select(self, trees: NDArray[int_], nodes: NDArray[int_]) -> NDArray[int_]:
+        """
+        Returns:
+            actions: the valid action with the highest upper confidence bound
+                of each node, the first one on ties, as MCTS._select_action
+        """
+        n = self.n[trees, nodes]
+        visits = self.visits[trees, nodes][:, None].astype(float64)
+        c_prior = self.args.c_puct * self.p[trees, nodes]
+        u = where(
+            n > 0,
+            self.q[trees, nodes] + c_prior * sqrt(visits) / (1 + n),
+            c_prior * sqrt(visits + EPS),
+        )
+        u[self.valid[trees, nodes] == 0] = -inf
+        return u.argmax(axis=1)
+
+    def _walk(
+        self, trees: NDArray[int_], nodes: NDArray[int_], actions: NDArray[int_]
+    ) -> NDArray[int_]:
+        """
+        Play the unexplored edges (node, action) of trees, linking each to the
+        node of the board it leads to, allocated if the tree lacks it.
+
+        Returns:
+            children: the node each edge leads to
+        """
+        tree_list, node_list = trees.tolist(), nodes.tolist()
+        next_boards, next_hashes = self.game.get_next_canonical_states(
+            [self.boards[b][s] for b, s in zip(tree_list, node_list)],
+            [self.hashes[b][s] for b, s in zip(tree_list, node_list)],
+            actions.tolist(),
+        )
+        children = zeros(len(trees), dtype=int_)
+        new = []
+        for i, (b, h) in enumerate(zip(tree_list, next_hashes)):
+            child = self.node_index[b].get(h)
+            if child is None:
+                new.append(i)
+            else:
+                children[i] = child
+        if new:
+            children[new] = self._allocate(
+                trees[new], [next_boards[i] for i in new], [next_hashes[i] for i in new]
+            )
+        self.children[trees, nodes, actions] = children
+        return children
+
+    def _allocate(
+        self, trees: NDArray[int_], boards: list[BoardTensor], hashes: list[int]
+    ) -> NDArray[int_]:
+        """
+        Allocate an unexpanded node for each board, in distinct trees.
+
+        Returns:
+            nodes: their indices in their trees
+        """
+        nodes = self.num_nodes[trees].copy()
+        if (nodes >= self.capacity).any():
+            raise RuntimeError("a batched tree outgrew num_mcts_sims + 1 nodes")
+        self.num_nodes[trees] += 1
+        for b, s, board, h in zip(trees.tolist(), nodes.tolist(), boards, hashes):
+            self.boards[b].append(board)
+            self.hashes[b].append(h)
+            self.node_index[b][h] = s
+        self.game_value[trees, nodes] = self.game.get_game_ended(boards)
+        return nodes
+
+    def _evaluate(self, trees: NDArray[int_], nodes: NDArray[int_]) -> NDArray[float64]:
+        """
+        Expand the leaves (trees, nodes) with one nn.predict_batch call.
+
+        Returns:
+            values: the network value of each leaf for its player to move
+        """
+        boards = [self.boards[b][s] for b, s in zip(trees.tolist(), nodes.tolist())]
+        policies, values = self.nn.predict_batch(boards)
+        valid = self.game.get_valid_moves(boards)
+        prior = asarray(policies, dtype=float64) * valid
+        total = prior.sum(axis=1)
+        masked = total <= 0
+        if masked.any():
+            # see mcts.mask_policy
+            log.error("All valid moves were masked, doing a workaround.")
+            prior[masked] = valid[masked]
+            total[masked] = valid[masked].sum(axis=1)
+        self.p[trees, nodes] = prior / total[:, None]
+        self.valid[trees, nodes] = valid
+        self.expanded[trees, nodes] = 1
+        return asarray(values, dtype=float64).reshape(len(boards))
+
+    def _update_edges(
+        self,
+        trees: NDArray[int_],
+        nodes: NDArray[int_],
+        actions: NDArray[int_],
+        v: NDArray[float64],
+    ) -> None:
+        """
+        Back up the values v through the edges (node, action) of distinct trees.
+        """
+        n, q = self.n[trees, nodes, actions], self.q[trees, nodes, actions]
+        self.q[trees, nodes, actions] = (n * q + v) / (n + 1)
+        self.n[trees, nodes, actions] = n + 1
+        self.visits[trees, nodes] += 1
+
+
+# MctsArgs fields BatchedMCTS leaves at their default
+_LOCKSTEP_DEFAULTS: dict[str, Any] = {
+    "leaf_batch_size": 1,
+    "max_nodes": None,
+    "max_bytes": None,
+    "dirichlet_alpha": 0.0,
+    "root_search": "puct",
+    "early_stop": False,
+    "time_budget_ms": None,
+    "solver": False,
+    "symmetry": False,
+    "widening_base": None,
+    "num_threads": 1,
+    "telemetry": False,
+}
@@ -1,13 +1,18 @@
 import logging
+import multiprocessing
 import os
+import secrets
+import traceback
 from collections import deque
-from dataclasses import dataclass
-from pickle import Pickler, Unpickler
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass, replace
+from multiprocessing.queues import Queue
+from pickle import Unpickler
+from queue import Empty
 from random import shuffle
-from typing import Generic
+from typing import Any, Generic, Literal, cast
 
-import numpy as np
-from numpy import random
+from numpy import asarray, random, zeros
 from tqdm import tqdm
 
 from alpha_zero_general import (
@@ -21,12 +26,24 @@ from alpha_zero_general import (
     TrainingExample,
 )
 from alpha_zero_general.arena import Arena
+from alpha_zero_general.example_shards import (
+    read_manifest,
+    read_shard,
+    write_manifest,
+    write_shard,
+)
 from alpha_zero_general.game import GenericGame
-from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.inference_server import InferenceServer
+from alpha_zero_general.mcts import MCTS, MctsPlayer, SearchStats, SearchSteps
 from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.parallel_mcts import NetLoader, NNFactory
+from alpha_zero_general.replay_buffer import ReplayBuffer
 
 log = logging.getLogger(__name__)
 
+SELF_PLAY_CHECKPOINT = "self_play.pth.tar"  # network the self-play workers load
+REPLAY_FOLDER = "replay"  # of the ReplayBuffer, in the checkpoint folder
+
 
 @dataclass(frozen=True)  # freeze to check for immutability in refactor
 class CoachArgs:
@@ -44,13 +61,60 @@ class CoachArgs:
     num_iters_for_train_examples_history: int
     max_len_of_queue: int
     load_folder_file: tuple[str, str]
+    reuse_root_visits: bool = False
+    max_tree_nodes: int | None = None
+    max_tree_bytes: int | None = None
+    root_search: Literal["puct", "gumbel"] = "puct"
+    early_stop: bool = False
+    symmetry: bool = False
+    telemetry: bool = False  # log the search counters of each self-play iteration
+    # playout cap randomization (KataGo): a move gets the full num_mcts_sims
+    # search with this probability, otherwise a fast search of fast_mcts_sims
+    full_search_fraction: float = 1.0
+    fast_mcts_sims: int | None = None  # None for num_mcts_sims // 6
+    # whether fast moves are kept as value-only examples or not recorded
+    fast_move_examples: Literal["value", "none"] = "none"
+    # self-play processes, each loading the network of the iteration once;
+    # an iteration runs self_play_workers * episodes_per_worker episodes, or
+    # num_eps split between the workers if episodes_per_worker is None
+    self_play_workers: int = 1
+    episodes_per_worker: int | None = None
+    seed: int | None = None  # seeds the workers' move sampling
+    # serve the workers' network from one InferenceServer, which evaluates up
+    # to inference_batch_size boards per call; None: each loads its own copy
+    inference_batch_size: int | None = None
+    inference_wait_ms: float = 1.0
+    # keep the examples in a memory-mapped ReplayBuffer in
+    # checkpoint/REPLAY_FOLDER instead of train_examples_history and its
+    # shards; replay_capacity None: max_len_of_queue per kept iteration
+    replay_buffer: bool = False
+    replay_capacity: int | None = None
+    # self-play episodes in flight at once in a process, their leaves
+    # evaluated together with one predict_batch call
+    concurrent_episodes: int = 1
 
     def to_mcts_args(self) -> MctsArgs:
         return MctsArgs(
             num_mcts_sims=self.num_mcts_sims,
             c_puct=self.c_puct,
+            reuse_root_visits=self.reuse_root_visits,
+            max_nodes=self.max_tree_nodes,
+            max_bytes=self.max_tree_bytes,
+            root_search=self.root_search,
+            early_stop=self.early_stop,
+            symmetry=self.symmetry,
+            telemetry=self.telemetry,
         )
 
+    def to_fast_mcts_args(self) -> MctsArgs:
+        """
+        The search of the moves playout cap randomization makes fast.
+        """
+        fast_mcts_sims = self.fast_mcts_sims
+        if fast_mcts_sims is None:
+            fast_mcts_sims = max(1, self.num_mcts_sims // 6)
+        return replace(self.to_mcts_args(), num_mcts_sims=fast_mcts_sims)
+
 
 class Coach(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
     """
@@ -66,13 +130,22 @@ class Coach(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
     ):
         self.game = game
         self.nn = nn
-        self.pnet = self.nn.__class__(self.game)  # the competitor network
+        # the competitor network, built by learn
+        self.pnet: NeuralNetInterface[Any, Any, Any] | None = None
         self.args: CoachArgs = args
         self.mcts = MCTS(self.game, self.nn, self.args.to_mcts_args())
         self.train_examples_history: TrainExampleHistory[BoardTensor, PolicyTensor] = (
             []
         )  # history of examples from args.numItersForTrainExamplesHistory latest iterations
         self.skip_first_self_play = False  # can be over ride in loadTrainExamples()
+        # shard files of the oldest iterations of train_examples_history, see
+        # save_train_examples
+        self.example_shards: list[str] = []
+        # with args.replay_buffer, stands in for train_examples_history
+        self.replay_buffer: ReplayBuffer | None = None
+        self.search_stats = SearchStats()  # self-play searches, with telemetry
+        # spawns the worker seeds of every iteration
+        self.seed_sequence = random.SeedSequence(args.seed)
 
     def execute_episode(
         self,
@@ -86,7 +159,14 @@ class Coach(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         in train_examples.
 
         It uses a temp=1 if episodeStep < tempThreshold, and thereafter
-        uses temp=0.
+        uses temp=0. With the Gumbel root search, pi is always the improved
+        policy and the action is the one chosen by sequential halving.
+
+        With args.full_search_fraction < 1, each move is searched in full
+        with that probability, and with args.fast_mcts_sims simulations
+        otherwise. Only fully searched moves are policy targets; fast moves
+        are recorded with an all-zero pi, which only trains the value head,
+        if args.fast_move_examples is "value", and dropped otherwise.
 
         Returns:
             train_examples: a list of examples of the form
@@ -94,41 +174,214 @@ class Coach(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
                         pi is the MCTS informed policy vector, v is +1 if
                         the player eventually won the game, else -1.
         """
+        return self.mcts.run(self.episode_steps(self.mcts, concurrent=False))
+
+    def episode_steps(
+        self,
+        mcts: MCTS[BoardTensor, BooleanBoard, PolicyTensor],
+        concurrent: bool = True,
+    ) -> SearchSteps[list[TrainingExample[BoardTensor, PolicyTensor]]]:
+        """
+        execute_episode searched with mcts, as a coroutine (see SearchSteps)
+        yielding the leaves of its searches if concurrent, see
+        concurrent_self_play. Otherwise the searches call mcts.nn themselves
+        and nothing is yielded.
+        """
         raw_train_examples: list[RawTrainingExample[BoardTensor, PolicyTensor]] = []
         # train_examples: board, player, policy, value
         board = self.game.get_init_board()
-        self.current_player = 1
+        current_player = 1
         episode_step = 0
+        full_args = self.args.to_mcts_args()
+        fast_args = self.args.to_fast_mcts_args()
 
         while True:
             episode_step += 1
-            canonical_board = self.game.get_canonical_form(board, self.current_player)
+            canonical_board = self.game.get_canonical_form(board, current_player)
             temp = int(episode_step < self.args.temp_threshold)
+            if self.args.root_search == "gumbel":
+                temp = 1  # the improved policy is the target at every step
 
-            pi = self.mcts.get_action_probabilities(canonical_board, temperature=temp)
-            sym = self.game.get_symmetries(canonical_board, pi)
-            for b, p in sym:
-                raw_train_examples.append(
-                    RawTrainingExample(b, self.current_player, p, 0)
+            full_search = (
+                self.args.full_search_fraction >= 1
+                or random.random() < self.args.full_search_fraction
+            )
+            mcts.args = full_args if full_search else fast_args
+            if concurrent:
+                pi = yield from mcts.get_action_probabilities_steps(
+                    canonical_board, temperature=temp
                 )
+            else:
+                pi = mcts.get_action_probabilities(canonical_board, temperature=temp)
+            if mcts.search_stats is not None:
+                self.search_stats += mcts.search_stats
+            if full_search or self.args.fast_move_examples == "value":
+                target = pi if full_search else zeros(len(pi))
+                sym = self.game.get_symmetries(canonical_board, target)
+                for b, p in sym:
+                    raw_train_examples.append(
+                        RawTrainingExample(b, current_player, p, 0)
+                    )
 
-            action = random.choice(len(pi), p=pi)
-            board, self.current_player = self.game.get_next_state(
-                board, self.current_player, action
+            if self.args.root_search == "gumbel":
+                action = cast(int, mcts.gumbel_action)
+            else:
+                action = random.choice(len(pi), p=pi)
+            mcts.advance(action)  # keep the subtree of the played move
+            board, current_player = self.game.get_next_state(
+                board, current_player, action
             )
 
-            r = self.game.get_game_ended(board, self.current_player)
+            r = self.game.get_game_ended(board, current_player)
 
             if r != 0:  # game ended
                 return [  # filter out draws #TODO: use filter()
                     TrainingExample(
                         rte.board,
                         rte.policy,
-                        r * ((-1) ** (rte.current_player != self.current_player)),
+                        r * ((-1) ** (rte.current_player != current_player)),
                     )
                     for rte in raw_train_examples
                 ]
 
+    def self_play_episode(self) -> list[TrainingExample[BoardTensor, PolicyTensor]]:
+        """
+        execute_episode on a fresh search tree.
+        """
+        self.mcts = MCTS(self.game, self.nn, self.args.to_mcts_args())
+        train_examples = self.execute_episode()
+        log.debug(f"Self play tree: {self.mcts.occupancy()}")
+        return train_examples
+
+    def concurrent_self_play(
+        self, num_episodes: int
+    ) -> Iterator[list[TrainingExample[BoardTensor, PolicyTensor]]]:
+        """
+        Play num_episodes self-play episodes in this process,
+        args.concurrent_episodes at a time, each with a fresh search tree.
+        Every episode runs as a coroutine (see episode_steps) till its search
+        needs the network; the leaves of all the episodes in flight are then
+        evaluated with one nn.predict_batch call, and each episode resumes
+        with its share of the results. A finished episode is replaced by the
+        next one.
+
+        Yields:
+            train_examples: those of each episode, in the order they finish
+        """
+        started = 0
+        # episodes waiting for the network, with the board or boards they wait on
+        pending: list[tuple[SearchSteps[Any], Any]] = []
+        while started < num_episodes or pending:
+            while (
+                started < num_episodes and len(pending) < self.args.concurrent_episodes
+            ):
+                started += 1
+                mcts = MCTS(self.game, self.nn, self.args.to_mcts_args())
+                steps = self.episode_steps(mcts)
+                try:
+                    pending.append((steps, next(steps)))
+                except StopIteration as done:
+                    yield done.value
+            if not pending:
+                continue
+
+            boards: list[Any] = []
+            for _, request in pending:
+                boards += request if isinstance(request, list) else [request]
+            policies, values = self.nn.predict_batch(boards)
+            values = asarray(values).reshape(len(boards))
+
+            waiting, pending, i = pending, [], 0
+            for steps, request in waiting:
+                if isinstance(request, list):
+                    j = i + len(request)
+                    result = policies[i:j], values[i:j]
+                else:
+                    j = i + 1
+                    result = policies[i], values[i]
+                i = j
+                try:
+                    pending.append((steps, steps.send(result)))
+                except StopIteration as done:
+                    yield done.value
+
+    def worker_episodes(self) -> list[int]:
+        """
+        Returns:
+            episodes: the number of self-play episodes of each worker
+        """
+        workers = self.args.self_play_workers
+        if self.args.episodes_per_worker is not None:
+            return [self.args.episodes_per_worker] * workers
+        share, extra = divmod(self.args.num_eps, workers)
+        return [share + (i < extra) for i in range(workers)]
+
+    def parallel_self_play(
+        self,
+    ) -> Iterator[list[TrainingExample[BoardTensor, PolicyTensor]]]:
+        """
+        Run the self-play episodes of an iteration in args.self_play_workers
+        processes. The current network is saved to SELF_PLAY_CHECKPOINT, and
+        each worker loads it once, seeds its own RNG from seed_sequence and
+        plays its share of worker_episodes.
+
+        With args.inference_batch_size, the workers share one InferenceServer
+        instead, which batches their boards.
+
+        Yields:
+            train_examples: those of each episode, as soon as a worker sends
+                them, in no particular order
+        """
+        self.nn.save_checkpoint(
+            folder=self.args.checkpoint, filename=SELF_PLAY_CHECKPOINT
+        )
+        nn_factory = NetLoader(
+            self.nn.__class__, self.game, self.args.checkpoint, SELF_PLAY_CHECKPOINT
+        )
+        context = multiprocessing.get_context("spawn")
+        queue: Queue[Any] = context.Queue()
+        episodes = self.worker_episodes()
+        seeds = self.seed_sequence.spawn(len(episodes))
+        server = None
+        nn_factories: list[NNFactory] = [nn_factory] * len(episodes)
+        if self.args.inference_batch_size is not None:
+            server = InferenceServer(
+                self.game,
+                nn_factory,
+                len(episodes),
+                self.args.inference_batch_size,
+                self.args.inference_wait_ms,
+                # the leaves of a worker's episodes in one request
+                client_slots=self.args.concurrent_episodes,
+            )
+            nn_factories = [server.client(i) for i in range(len(episodes))]
+        processes = [
+            context.Process(
+                target=_self_play_worker,
+                args=(queue, self.game, factory, self.args, num_episodes, seed),
+                daemon=True,
+            )
+            for factory, num_episodes, seed in zip(nn_factories, episodes, seeds)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for _ in range(sum(episodes)):
+                message = _next_message(queue, processes)
+                if isinstance(message, str):
+                    raise RuntimeError(f"self-play worker failed:\n{message}")
+                train_examples, search_stats = message
+                self.search_stats += search_stats
+                yield train_examples
+        finally:
+            for process in processes:
+                if process.is_alive():  # the iteration was abandoned
+                    process.terminate()
+                process.join()
+            if server is not None:
+                server.close()
+                log.debug(f"Self play inference batches: {server.mean_batch_size:.1f}")
+
     def learn(self):
         """
         Performs numIters iterations with numEps episodes of self-play in each
@@ -147,62 +400,79 @@ class Coach(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
                     TrainingExample[BoardTensor, PolicyTensor]
                 ] = deque([], maxlen=self.args.max_len_of_queue)
 
-                for _ in tqdm(range(self.args.num_eps), desc="Self Play"):
-                    self.mcts = MCTS(
-                        self.game, self.nn, self.args.to_mcts_args()
-                    )  # reset search tree
-                    iteration_train_examples += self.execute_episode()
+                self.search_stats = SearchStats()
+                if self.args.self_play_workers > 1:
+                    for train_examples in tqdm(
+                        self.parallel_self_play(),
+                        total=sum(self.worker_episodes()),
+                        desc="Self Play",
+                    ):
+                        iteration_train_examples += train_examples
+                elif self.args.concurrent_episodes > 1:
+                    for train_examples in tqdm(
+                        self.concurrent_self_play(self.args.num_eps),
+                        total=self.args.num_eps,
+                        desc="Self Play",
+                    ):
+                        iteration_train_examples += train_examples
+                else:
+                    for _ in tqdm(range(self.args.num_eps), desc="Self Play"):
+                        iteration_train_examples += self.self_play_episode()
+                if self.args.telemetry:
+                    log.info(f"Self play search: {self.search_stats}")
 
                 # save the iteration examples to the history
-                self.train_examples_history.append(list(iteration_train_examples))
-
-            if (
-                len(self.train_examples_history)
-                > self.args.num_iters_for_train_examples_history
-            ):
-                log.warning(
-                    f"Removing the oldest entry in train_examples. len(train_examplesHistory) = {len(self.train_examples_history)}"
-                )
-                self.train_examples_history.pop(0)
-            # backup history to a file
-            # NB! the examples were collected using the model from the previous iteration, so (i-1)
-            self.save_train_examples(i - 1)
-
-            # shuffle examples before training
-            train_examples: list[TrainingExample[BoardTensor, PolicyTensor]] = []
-            for e in self.train_examples_history:
-                train_examples.extend(e)
-            shuffle(train_examples)
+                if self.args.replay_buffer:
+                    self.add_to_replay_buffer(list(iteration_train_examples))
+                else:
+                    self.train_examples_history.append(list(iteration_train_examples))
+
+            train_examples: Sequence[TrainingExample[BoardTensor, PolicyTensor]]
+            if self.args.replay_buffer:
+                # on disk, the networks train on batches of sample_examples
+                train_examples = self.replay_buffer or []
+            else:
+                if (
+                    len(self.train_examples_history)
+                    > self.args.num_iters_for_train_examples_history
+                ):
+                    log.warning(
+                        f"Removing the oldest entry in train_examples. len(train_examplesHistory) = {len(self.train_examples_history)}"
+                    )
+                    self.train_examples_history.pop(0)
+                    if self.example_shards:
+                        self.example_shards.pop(0)
+                # backup history to a file
+                # NB! the examples were collected using the model from the previous iteration, so (i-1)
+                self.save_train_examples(i - 1)
+
+                # shuffle examples before training
+                train_examples = []
+                for e in self.train_examples_history:
+                    train_examples.extend(e)
+                shuffle(train_examples)
 
             # training new network, keeping a copy of the old one
             self.nn.save_checkpoint(
                 folder=self.args.checkpoint, filename="temp.pth.tar"
             )
 
+            if self.pnet is None:
+                self.pnet = self.nn.__class__(self.game)
             self.pnet.load_checkpoint(
                 folder=self.args.checkpoint, filename="temp.pth.tar"
             )  # #TODO: using file system to pass the model is not the best way
             # we should add a method to pass the model directly.
             pmcts = MCTS(self.game, self.pnet, self.args.to_mcts_args())
 
-            def get_p1_policy(board: BoardTensor) -> int:
-                return int(
-                    np.argmax(a=pmcts.get_action_probabilities(board, temperature=0))
-                )
-
             self.nn.train(train_examples)
             nmcts = MCTS(self.game, self.nn, self.args.to_mcts_args())
 
-            def get_p2_policy(board: BoardTensor) -> int:
-                return int(
-                    np.argmax(nmcts.get_action_probabilities(board, temperature=0))
-                )
-
             log.info("PITTING AGAINST PREVIOUS VERSION")
 
             arena = Arena[BoardTensor, BooleanBoard, PolicyTensor](
-                get_p1_policy,
-                get_p2_policy,
+                MctsPlayer(pmcts),
+                MctsPlayer(nmcts),
                 self.game,
             )
             pwins, nwins, draws = arena.play_games(self.args.arena_compare)
@@ -225,21 +495,72 @@ class Coach(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
                     folder=self.args.checkpoint, filename="best.pth.tar"
                 )
 
+    def replay_capacity(self) -> int:
+        """
+        Returns:
+            capacity: args.replay_capacity, or room for
+                num_iters_for_train_examples_history full iterations
+        """
+        if self.args.replay_capacity is not None:
+            return self.args.replay_capacity
+        return (
+            self.args.max_len_of_queue * self.args.num_iters_for_train_examples_history
+        )
+
+    def add_to_replay_buffer(
+        self, examples: list[TrainingExample[BoardTensor, PolicyTensor]]
+    ) -> None:
+        """
+        Add the examples of an iteration to replay_buffer, creating it in
+        args.checkpoint/REPLAY_FOLDER on the first non-empty iteration.
+        """
+        if self.replay_buffer is None:
+            if not examples:
+                return
+            self.replay_buffer = ReplayBuffer.create(
+                os.path.join(self.args.checkpoint, REPLAY_FOLDER),
+                self.replay_capacity(),
+                self.args.num_iters_for_train_examples_history,
+                examples[0],
+            )
+        self.replay_buffer.add_iteration(examples)
+
     def get_checkpoint_file(self, iteration: int) -> CheckpointFile:
         return "checkpoint_" + str(iteration) + ".pth.tar"
 
     def save_train_examples(self, iteration: int):
+        """
+        Write the iterations of train_examples_history that have no shard yet
+        to one compressed shard each, then the manifest of the history to
+        get_checkpoint_file(iteration) + ".examples". Shards are written once:
+        an iteration leaving the history is only dropped from the manifest.
+        """
         folder = self.args.checkpoint
         if not os.path.exists(folder):
             os.makedirs(folder)
         filename = os.path.join(
             folder, self.get_checkpoint_file(iteration) + ".examples"
         )
-        with open(filename, "wb+") as f:
-            Pickler(f).dump(self.train_examples_history)
-        f.closed
+        for examples in self.train_examples_history[len(self.example_shards) :]:
+            # unique, a restarted run numbers its iterations from 1 again
+            shard = f"{filename}.{secrets.token_hex(4)}.npz"
+            write_shard(shard, examples)
+            self.example_shards.append(shard)
+        write_manifest(
+            filename, [os.path.relpath(shard, folder) for shard in self.example_shards]
+        )
 
     def load_train_examples(self):
+        if self.args.replay_buffer:
+            folder = os.path.join(self.args.load_folder_file[0], REPLAY_FOLDER)
+            if ReplayBuffer.exists(folder):
+                self.replay_buffer = ReplayBuffer.open(folder)
+                log.info(f"Reopened the replay buffer of {len(self.replay_buffer)}")
+                self.skip_first_self_play = True
+                return
+            log.warning(f'No replay buffer in "{folder}", starting a new one')
+            return
+
         model_file = os.path.join(
             self.args.load_folder_file[0], self.args.load_folder_file[1]
         )
@@ -251,9 +572,64 @@ class Coach(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
                 return
         else:
             log.info("File with train_examples found. Loading it...")
-            with open(examples_file, "rb") as f:
-                self.train_examples_history = Unpickler(f).load()
+            shards = read_manifest(examples_file)
+            if shards is None:  # a history pickled by earlier versions
+                with open(examples_file, "rb") as f:
+                    self.train_examples_history = Unpickler(f).load()
+                self.example_shards = []
+            else:
+                folder = os.path.dirname(examples_file)
+                self.example_shards = [os.path.join(folder, s) for s in shards]
+                self.train_examples_history = [
+                    read_shard(shard) for shard in self.example_shards
+                ]
             log.info("Loading done!")
 
             # examples based on the model were already collected (loaded)
             self.skip_first_self_play = True
+
+
+def _self_play_worker(
+    queue: "Queue[Any]",
+    game: GenericGame[Any, Any, Any],
+    nn_factory: NNFactory,
+    args: CoachArgs,
+    num_episodes: int,
+    seed: random.SeedSequence,
+) -> None:
+    """
+    Worker of Coach.parallel_self_play: build the network once, then play
+    num_episodes episodes, args.concurrent_episodes at a time, putting
+    (train_examples, search_stats) of each on queue. A failure is put as its
+    traceback.
+    """
+    try:
+        random.seed(seed.generate_state(1))  # the moves of execute_episode
+        # self-play only predicts, the network may be an InferenceClient
+        coach = Coach(game, cast(NeuralNetInterface[Any, Any, Any], nn_factory()), args)
+        episodes: Iterator[list[TrainingExample[Any, Any]]]
+        if args.concurrent_episodes > 1:
+            episodes = coach.concurrent_self_play(num_episodes)
+        else:
+            episodes = (coach.self_play_episode() for _ in range(num_episodes))
+        for train_examples in episodes:
+            queue.put((train_examples, coach.search_stats))
+            coach.search_stats = SearchStats()
+    except Exception:
+        queue.put(traceback.format_exc())
+
+
+def _next_message(
+    queue: "Queue[Any]", processes: Sequence[multiprocessing.process.BaseProcess]
+) -> Any:
+    """
+    Returns:
+        message: the next message of the self-play workers, raising if they
+            all exited without sending one (e.g. killed out of memory)
+    """
+    while True:
+        try:
+            return queue.get(timeout=1.0)
+        except Empty:
+            if not any(process.is_alive() for process in processes):
+                raise RuntimeError("self-play workers exited early") from None
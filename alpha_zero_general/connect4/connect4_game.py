@@ -7,6 +7,7 @@ from alpha_zero_general.connect4 import (
 )
 from alpha_zero_general.connect4.connect4_logic import Connect4Board
 from alpha_zero_general.game import GenericGame
+from alpha_zero_general.zobrist import ZobristHash, flip
 
 DEFAULT_CONNECT4_BOARD_HEIGHT = 6
 DEFAULT_CONNECT4_BOARD_WIDTH = 7
@@ -29,6 +30,7 @@ class Connect4Game(
     ):
         # GenericGame.__init__(self)
         self._base_board = Connect4Board(height, width, win_length, np_pieces)
+        self.zobrist = ZobristHash(height * width)
 
     def get_init_board(self) -> Connect4BoardTensor:
         return self._base_board.chip_tensor
@@ -47,6 +49,14 @@ class Connect4Game(
         b.add_chip(action, player)
         return b.chip_tensor, -player
 
+    def get_next_canonical_state(
+        self, canonical_board: Connect4BoardTensor, board_hash: int, action: int
+    ) -> tuple[Connect4BoardTensor, int]:
+        next_board, next_player = self.get_next_state(canonical_board, 1, action)
+        row = (canonical_board[:, action] == 0).sum() - 1  # where the chip lands
+        board_hash ^= self.zobrist.key(int(row) * next_board.shape[1] + action, 1)
+        return self.get_canonical_form(next_board, next_player), flip(board_hash)
+
     def get_valid_moves(
         self, board: Connect4BoardTensor, player: int
     ) -> Connect4BooleanBoardTensor:
@@ -86,7 +96,7 @@ class Connect4Game(
         return array2string(board)
 
     def get_board_hash(self, board: Connect4BoardTensor) -> int:
-        return hash(board.tobytes())
+        return self.zobrist.board_hash(board)
 
     @staticmethod
     def display(board: Connect4BoardTensor) -> None:
@@ -12,7 +12,8 @@ from alpha_zero_general.connect4.connect4_game import (
     Connect4Game,
     Connect4PolicyTensor,
 )
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import NeuralNetInterface, replay_batches
+from alpha_zero_general.replay_buffer import ReplayBuffer
 
 log = logging.getLogger(__name__)
 
@@ -65,6 +66,15 @@ class Connect4NNInterface(
         """
         examples: list of examples, each example is of form (board, pi, v)
         """
+        if isinstance(examples, ReplayBuffer):
+            # sampled batch by batch, the buffer stays on disk
+            self.nn.model.fit(
+                replay_batches(examples, args.batch_size),
+                steps_per_epoch=max(1, len(examples) // args.batch_size),
+                epochs=args.epochs,
+            )
+            return
+
         input_boards, target_pis, target_vs = list(zip(*examples))
         input_boards = np.asarray(input_boards)
         target_pis = np.asarray(target_pis)
@@ -92,6 +102,15 @@ class Connect4NNInterface(
         # print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return pi[0], v[0]
 
+    def predict_batch(
+        self, boards: list[Connect4BoardTensor]
+    ) -> tuple[Connect4PolicyTensor, np.ndarray]:
+        """
+        boards: list of np arrays with boards, evaluated in one forward pass
+        """
+        pi, v = self.nn.model.predict(np.asarray(boards), verbose=0)
+        return pi, v.reshape(len(boards))
+
     def save_checkpoint(
         self, folder: str = "checkpoint", filename: str = "checkpoint.pth.tar"
     ) -> None:
@@ -1,3 +1,5 @@
+from hashlib import blake2b
+
 import numpy as np
 
 from alpha_zero_general import GenericBoardTensor
@@ -137,7 +139,9 @@ class DotsAndBoxesGame(
         return np.array2string(board)
 
     def get_board_hash(self, board: GenericBoardTensor) -> int:
-        return hash(board.tobytes())
+        # unlike hash(), the same in every process, for MCTS.save_tree
+        digest = blake2b(board.tobytes(), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
 
     @staticmethod
     def display(board: GenericBoardTensor) -> None:
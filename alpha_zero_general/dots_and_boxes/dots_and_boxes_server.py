@@ -14,15 +14,30 @@ from alpha_zero_general.dots_and_boxes.dots_and_boxes_game import (
 from alpha_zero_general.dots_and_boxes.dots_and_boxes_players import GreedyRandomPlayer
 from alpha_zero_general.dots_and_boxes.keras.n_net import DotsAndBoxesNNInterface
 from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.parallel_mcts import NetLoader, RootParallelMCTS
 
 USE_ALPHA_ZERO = True
+ROOT_PARALLEL_WORKERS = 1  # search each move in that many processes
+TIME_BUDGET_MS = 500  # per move, with up to 10000 simulations
+# search tree loaded at startup if present, saved at exit
+TREE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "3x3.tree")
+MAX_TREE_BYTES = 2**30  # the tree outlives the requests, evict past this size
 
 app = Flask(__name__)
 
 # #TODO: is it one mcts per game? and one game per server?
-mcts: MCTS[
-    DotsAndBoxesBoardTensor, DotsAndBoxesBooleanBoardTensor, DotsAndBoxesPolicyTensor
-]
+mcts: (
+    MCTS[
+        DotsAndBoxesBoardTensor,
+        DotsAndBoxesBooleanBoardTensor,
+        DotsAndBoxesPolicyTensor,
+    ]
+    | RootParallelMCTS[
+        DotsAndBoxesBoardTensor,
+        DotsAndBoxesBooleanBoardTensor,
+        DotsAndBoxesPolicyTensor,
+    ]
+)
 game: DotsAndBoxesGame
 
 
@@ -40,6 +55,8 @@ def predict():
         action = GreedyRandomPlayer(game).play(board)
 
     resp = Response(str(action))
+    if USE_ALPHA_ZERO:  # simulations that fit in the time budget on this host
+        resp.headers["X-MCTS-Simulations"] = str(mcts.sims_used)
     # https://stackoverflow.com/questions/5584923/a-cors-post-request-works-from-plain-javascript-but-why-not-with-jquery
     # https://stackoverflow.com/questions/25860304/how-do-i-set-response-headers-in-flask
     resp.headers["Access-Control-Allow-Origin"] = "*"
@@ -48,10 +65,28 @@ def predict():
 
 if __name__ == "__main__":
     game = DotsAndBoxesGame(n=3)
-    nn1 = DotsAndBoxesNNInterface(game)
-    mcts = MCTS(game, nn1, MctsArgs(num_mcts_sims=50, c_puct=1.0))
-    nn1.load_checkpoint(
-        os.path.join("..", "pretrained_models", "dotsandboxes", "keras", "3x3"),
-        "best.pth.tar",
-    )
-    app.run(debug=False, host="0.0.0.0", port=8888)
+    folder = os.path.join("..", "pretrained_models", "dotsandboxes", "keras", "3x3")
+    if ROOT_PARALLEL_WORKERS > 1:
+        mcts = RootParallelMCTS(
+            game,
+            NetLoader(DotsAndBoxesNNInterface, game, folder, "best.pth.tar"),
+            MctsArgs(num_mcts_sims=50, c_puct=1.0, dirichlet_alpha=0.3),
+            ROOT_PARALLEL_WORKERS,
+        )
+    else:
+        nn1 = DotsAndBoxesNNInterface(game)
+        args = MctsArgs(
+            num_mcts_sims=10000,
+            c_puct=1.0,
+            time_budget_ms=TIME_BUDGET_MS,
+            max_bytes=MAX_TREE_BYTES,
+        )
+        mcts = MCTS(game, nn1, args)
+        nn1.load_checkpoint(folder, "best.pth.tar")
+        if os.path.exists(TREE_FILE):  # warm start on the positions seen before
+            mcts.load_tree(TREE_FILE)
+    try:
+        app.run(debug=False, host="0.0.0.0", port=8888)
+    finally:
+        if isinstance(mcts, MCTS):
+            mcts.save_tree(TREE_FILE)
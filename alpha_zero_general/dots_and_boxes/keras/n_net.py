@@ -13,7 +13,8 @@ from alpha_zero_general.dots_and_boxes.dots_and_boxes_game import (
 from alpha_zero_general.dots_and_boxes.keras.dots_and_boxes_n_net import (
     DotsAndBoxesNNet,
 )
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import NeuralNetInterface, replay_batches
+from alpha_zero_general.replay_buffer import ReplayBuffer
 
 
 @dataclass(frozen=True)
@@ -55,6 +56,11 @@ def normalize_score(board: DotsAndBoxesBoardTensor) -> None:
     board[:, 1, -1] = 0
 
 
+def normalized(boards: DotsAndBoxesBoardTensor) -> DotsAndBoxesBoardTensor:
+    normalize_score(boards)
+    return boards
+
+
 class DotsAndBoxesNNInterface(
     NeuralNetInterface[
         DotsAndBoxesBoardTensor,
@@ -76,6 +82,15 @@ class DotsAndBoxesNNInterface(
         """
         examples: list of examples, each example is of form (board, pi, v)
         """
+        if isinstance(examples, ReplayBuffer):
+            # sampled batch by batch, the buffer stays on disk
+            self.nn.model.fit(
+                replay_batches(examples, args.batch_size, encode=normalized),
+                steps_per_epoch=max(1, len(examples) // args.batch_size),
+                epochs=args.epochs,
+            )
+            return
+
         input_boards, target_pis, target_vs = list(zip(*examples))
         input_boards = np.asarray(input_boards)
 
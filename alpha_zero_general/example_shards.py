@@ -0,0 +1,66 @@
+import json
+import os
+from collections.abc import Sequence
+from typing import Any
+
+from numpy import asarray, load, savez_compressed
+
+from alpha_zero_general import TrainingExample
+
+MANIFEST_VERSION = 1
+
+
+def write_shard(path: str, examples: Sequence[TrainingExample[Any, Any]]) -> None:
+    """
+    Write the examples of one self-play iteration to path as a compressed
+    .npz of boards, policies and values. Shards are written once and never
+    rewritten; manifests say which of them are in use.
+    """
+    with open(f"{path}.tmp", "wb") as f:
+        savez_compressed(
+            f,
+            boards=asarray([e[0] for e in examples]),
+            policies=asarray([e[1] for e in examples]),
+            values=asarray([e[2] for e in examples], dtype=float),
+        )
+    os.replace(f"{path}.tmp", path)
+
+
+def read_shard(path: str) -> list[TrainingExample[Any, Any]]:
+    """
+    Returns:
+        examples: those written to path by write_shard
+    """
+    # object boards (Tafl) are pickled, from our own checkpoint folder
+    with load(path, allow_pickle=True) as shard:
+        boards, policies, values = shard["boards"], shard["policies"], shard["values"]
+    return [
+        TrainingExample(board, policy, float(value))
+        for board, policy, value in zip(boards, policies, values.tolist())
+    ]
+
+
+def write_manifest(path: str, shards: list[str]) -> None:
+    """
+    Write the manifest of a history of examples: the file names of its
+    shards, oldest iteration first, relative to the manifest's folder.
+    """
+    with open(f"{path}.tmp", "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "shards": shards}, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def read_manifest(path: str) -> list[str] | None:
+    """
+    Returns:
+        shards: the shard names listed by the manifest at path, None if the
+            file is not a manifest (e.g. a pickled history)
+    """
+    with open(path, "rb") as f:
+        if f.read(1) != b"{":
+            return None
+        f.seek(0)
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{path}: unknown manifest version {manifest.get('version')}")
+    return list(manifest["shards"])
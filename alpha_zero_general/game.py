@@ -157,6 +157,27 @@ class GenericGame(ABC, Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         """
         raise NotImplementedError("get_board_hash must be implemented by the subclass")
 
+    def get_next_canonical_state(
+        self, canonical_board: BoardTensor, board_hash: int, action: int
+    ) -> tuple[BoardTensor, int]:
+        """
+        Input:
+            canonical_board: current board in canonical form
+            board_hash: get_board_hash(canonical_board)
+            action: action taken by player 1
+
+        Returns:
+            next_board: canonical form of the board after action
+            next_hash: get_board_hash(next_board)
+
+        Used by MCTS to walk the tree. This default hashes next_board from
+        scratch, games with Zobrist hashing (see zobrist.py) override it to
+        update board_hash with the cells action changes.
+        """
+        next_board, next_player = self.get_next_state(canonical_board, 1, action)
+        next_board = self.get_canonical_form(next_board, next_player)
+        return next_board, self.get_board_hash(next_board)
+
     # #TODO: planned
     # @abstractmethod
     # def move_is_valid(self, board: BoardTensor, player: int, action: int) -> bool:
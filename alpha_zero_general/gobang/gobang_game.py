@@ -11,6 +11,7 @@ from alpha_zero_general.gobang import (
     GobangPolicyTensor,
 )
 from alpha_zero_general.gobang.gobang_logic import Board
+from alpha_zero_general.zobrist import ZobristHash, flip
 
 
 class GobangGame(
@@ -19,6 +20,7 @@ class GobangGame(
     def __init__(self, n: int = 15, nir: int = 5):
         self.n = n
         self.n_in_row = nir
+        self.zobrist = ZobristHash(n * n)
 
     def get_init_board(self) -> GobangBoardTensor:
         # return initial board (numpy board)
@@ -46,6 +48,14 @@ class GobangGame(
         b.execute_move(move, player)
         return (b.pieces, -player)
 
+    def get_next_canonical_state(
+        self, canonical_board: GobangBoardTensor, board_hash: int, action: int
+    ) -> tuple[GobangBoardTensor, int]:
+        next_board, next_player = self.get_next_state(canonical_board, 1, action)
+        if action != self.n * self.n:  # the stone placed on cell action
+            board_hash ^= self.zobrist.key(action, 1)
+        return self.get_canonical_form(next_board, next_player), flip(board_hash)
+
     def get_valid_moves(
         self, board: GobangBoardTensor, player: int
     ) -> GobangBooleanBoardTensor:
@@ -130,7 +140,7 @@ class GobangGame(
         return array2string(board)
 
     def get_board_hash(self, board: GobangBoardTensor) -> int:
-        return hash(board.tobytes())
+        return self.zobrist.board_hash(board)
 
     @staticmethod
     def display(board: GobangBoardTensor) -> None:
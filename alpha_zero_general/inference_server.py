@@ -0,0 +1,302 @@
+import multiprocessing
+import time
+from collections.abc import Callable
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty
+from typing import Any, Generic, NamedTuple
+
+from numpy import asarray, dtype, empty, float64, int64, ndarray, prod
+
+from alpha_zero_general.game import BoardTensor, BooleanBoard, GenericGame, PolicyTensor
+from alpha_zero_general.parallel_mcts import NNFactory
+
+POLL_SECONDS = 1.0  # how often a waiting client checks the server is alive
+
+
+class _Layout(NamedTuple):
+    """
+    Shapes of the shared arrays of an InferenceServer, one row per slot,
+    client_slots consecutive slots per client.
+    """
+
+    num_slots: int
+    client_slots: int
+    board_shape: tuple[int, ...]
+    board_dtype: str
+    action_size: int
+
+
+class _SharedArrays:
+    """
+    Boards, policies and values of every slot, plus the counters of the
+    server, as numpy views of one shared memory block.
+    """
+
+    def __init__(self, layout: _Layout, name: str | None = None) -> None:
+        board_dtype = dtype(layout.board_dtype)
+        board_bytes = (
+            layout.num_slots * int(prod(layout.board_shape)) * board_dtype.itemsize
+        )
+        board_bytes += -board_bytes % 8  # align the float64 arrays
+        policy_bytes = layout.num_slots * layout.action_size * 8
+        size = board_bytes + policy_bytes + layout.num_slots * 8 + 2 * 8
+        self.memory = SharedMemory(name, create=name is None, size=size)
+        buffer = self.memory.buf
+        self.boards: ndarray[Any, Any] = ndarray(
+            (layout.num_slots, *layout.board_shape), board_dtype, buffer
+        )
+        self.policies: ndarray[Any, Any] = ndarray(
+            (layout.num_slots, layout.action_size), float64, buffer, board_bytes
+        )
+        self.values: ndarray[Any, Any] = ndarray(
+            layout.num_slots, float64, buffer, board_bytes + policy_bytes
+        )
+        # batches evaluated, boards evaluated
+        self.counters: ndarray[Any, Any] = ndarray(
+            2, int64, buffer, board_bytes + policy_bytes + layout.num_slots * 8
+        )
+
+    def close(self) -> None:
+        del self.boards, self.policies, self.values, self.counters
+        self.memory.close()
+
+
+def _serve(
+    requests: "multiprocessing.Queue[tuple[int, int] | None]",
+    ready: list[Any],
+    alive: Connection,
+    layout: _Layout,
+    memory_name: str,
+    nn_factory: NNFactory,
+    max_batch_size: int,
+    max_wait_ms: float,
+) -> None:
+    """
+    Server loop: wait for a (client, boards) request, gather more for up to
+    max_wait_ms or till max_batch_size boards, evaluate their boards with one
+    predict_batch call, write the answers and release the clients, till None
+    arrives. alive is never written: the clients see it close when this
+    process exits, however it exits.
+    """
+    nn = nn_factory()
+    shared = _SharedArrays(layout, memory_name)
+    num_clients = layout.num_slots // layout.client_slots
+    stopping = False
+    while not stopping:
+        request = requests.get()
+        if request is None:
+            break
+        batch = [request]
+        size = request[1]
+        deadline = time.perf_counter() + max_wait_ms / 1000
+        # each client has one request in flight, no use waiting for more
+        while size < max_batch_size and len(batch) < num_clients:
+            try:
+                request = requests.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except Empty:
+                break
+            if request is None:
+                stopping = True
+                break
+            batch.append(request)
+            size += request[1]
+        rows = [
+            client * layout.client_slots + i
+            for client, count in batch
+            for i in range(count)
+        ]
+        policies, values = nn.predict_batch([shared.boards[i].copy() for i in rows])
+        shared.policies[rows] = asarray(policies)
+        shared.values[rows] = asarray(values).reshape(len(rows))
+        shared.counters += 1, len(rows)
+        for client, _ in batch:
+            ready[client].release()
+    shared.close()
+    alive.close()
+
+
+class InferenceClient:
+    """
+    Predictor proxy of an InferenceServer for MCTS in another process:
+    predict and predict_batch write the boards to the client's slots of the
+    shared memory, queue the client and board numbers and wait for the
+    server's answer, so only those numbers are pickled. A batch larger than
+    the client's slots goes in several requests. Waiting raises RuntimeError
+    if the server process exits. Build it with InferenceServer.client, which
+    is picklable and runs in the worker.
+
+    It only predicts: training and checkpoints stay with the network of the
+    server.
+    """
+
+    def __init__(
+        self,
+        game: GenericGame[Any, Any, Any],
+        requests: "multiprocessing.Queue[tuple[int, int] | None]",
+        ready: Any,  # the client's semaphore
+        alive: Connection,  # closed when the server exits
+        layout: _Layout,
+        memory_name: str,
+        client: int,
+    ) -> None:
+        self.requests = requests
+        self.ready = ready
+        self.alive = alive
+        self.layout = layout
+        self.client = client
+        self.shared = _SharedArrays(layout, memory_name)
+
+    def predict(self, board: Any) -> tuple[Any, float]:
+        policies, values = self.predict_batch([board])
+        return policies[0], float(values[0])
+
+    def predict_batch(self, boards: list[Any]) -> tuple[Any, Any]:
+        slots = self.layout.client_slots
+        policies = empty((len(boards), self.layout.action_size))
+        values = empty(len(boards))
+        for first in range(0, len(boards), slots):
+            count = min(slots, len(boards) - first)
+            rows = slice(self.client * slots, self.client * slots + count)
+            self.shared.boards[rows] = boards[first : first + count]
+            self.requests.put((self.client, count))
+            self._wait()
+            policies[first : first + count] = self.shared.policies[rows]
+            values[first : first + count] = self.shared.values[rows]
+        return policies, values
+
+    def _wait(self) -> None:
+        while not self.ready.acquire(timeout=POLL_SECONDS):
+            if self.alive.poll():  # end of file: the server is gone
+                raise RuntimeError("the InferenceServer process exited")
+
+
+class InferenceServer(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Local inference service: one process owns the network built by
+    nn_factory (see NetLoader) and evaluates the boards of num_clients
+    clients, typically self-play or arena workers, in batches of up to
+    max_batch_size boards, waiting at most max_wait_ms for a batch to fill.
+
+    Boards, policies and values go through shared memory, client_slots
+    slots per client, so boards must be numpy arrays of the shape and dtype
+    of game.get_init_board(). A client is used through the InferenceClient
+    proxy built by client(i), which MCTS takes as its network. Each client
+    has one request in flight at a time, of up to client_slots boards.
+
+    The server process is started with "spawn", see RootParallelMCTS. Call
+    close (or use it as a context manager) to stop it and free the memory.
+    """
+
+    game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor]
+    layout: _Layout
+    shared: _SharedArrays
+    process: multiprocessing.process.BaseProcess | None  # None once closed
+    _counters: list[int]  # batches and boards evaluated, read at close
+
+    def __init__(
+        self,
+        game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor],
+        nn_factory: NNFactory,
+        num_clients: int,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 1.0,
+        client_slots: int = 1,
+    ) -> None:
+        if min(num_clients, max_batch_size, client_slots) < 1:
+            raise ValueError(
+                "num_clients, max_batch_size and client_slots must be positive"
+            )
+        board = asarray(game.get_init_board())
+        self.game = game
+        self.layout = _Layout(
+            num_clients * client_slots,
+            client_slots,
+            board.shape,
+            board.dtype.str,
+            game.get_action_size(),
+        )
+        self.shared = _SharedArrays(self.layout)
+        self.shared.counters[:] = 0
+        self._counters = [0, 0]
+        context = multiprocessing.get_context("spawn")
+        self._requests: "multiprocessing.Queue[tuple[int, int] | None]" = (
+            context.Queue()
+        )
+        self._ready = [context.Semaphore(0) for _ in range(num_clients)]
+        self._alive, alive = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_serve,
+            args=(
+                self._requests,
+                self._ready,
+                alive,
+                self.layout,
+                self.shared.memory.name,
+                nn_factory,
+                max_batch_size,
+                max_wait_ms,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        alive.close()  # the server holds the only write end
+
+    def client(self, i: int) -> Callable[[], InferenceClient]:
+        """
+        Returns:
+            factory: builds the proxy of client i, to pass as the
+                nn_factory of a worker process
+        """
+        return _ClientFactory(
+            self.game,
+            self._requests,
+            self._ready[i],
+            self._alive,
+            self.layout,
+            self.shared.memory.name,
+            i,
+        )
+
+    @property
+    def mean_batch_size(self) -> float:
+        """
+        Boards per predict_batch call of the server so far.
+        """
+        counters = self.shared.counters.tolist() if self.process else self._counters
+        batches, boards = counters
+        return boards / batches if batches else 0.0
+
+    def close(self) -> None:
+        if self.process is None:
+            return
+        self._requests.put(None)
+        self.process.join()
+        self.process = None
+        self._counters = self.shared.counters.tolist()
+        self.shared.close()
+        self.shared.memory.unlink()
+        self._alive.close()
+
+    def __enter__(self) -> "InferenceServer[BoardTensor, BooleanBoard, PolicyTensor]":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class _ClientFactory(NamedTuple):
+    """
+    Picklable arguments of an InferenceClient, built when called.
+    """
+
+    game: GenericGame[Any, Any, Any]
+    requests: Any
+    ready: Any
+    alive: Connection
+    layout: _Layout
+    memory_name: str
+    client: int
+
+    def __call__(self) -> InferenceClient:
+        return InferenceClient(*self)
@@ -1,8 +1,31 @@
 import logging
 import math
-from typing import Generic, cast
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Generator
+from dataclasses import dataclass, fields
+from typing import Any, Generic, Literal, NamedTuple, TypeVar, cast
 
-from numpy import argwhere, array, zeros
+from numpy import (
+    arange,
+    argmax,
+    argsort,
+    argwhere,
+    array,
+    asarray,
+    concatenate,
+    exp,
+    flatnonzero,
+    float32,
+    float64,
+    full,
+    inf,
+    int32,
+    int_,
+)
+from numpy import log as ln
+from numpy import random, sort, uint64, where, zeros
+from numpy.typing import NDArray
 
 from alpha_zero_general import (
     EPS,
@@ -13,10 +36,121 @@ from alpha_zero_general import (
     MctsArgs,
 )
 from alpha_zero_general.game import BoardTensor, BooleanBoard, GenericGame, PolicyTensor
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import Predictor
+from alpha_zero_general.tree_file import NodeRecord, TreeFile
 
 log = logging.getLogger(__name__)
 
+PATH_CAPACITY = 64  # initial search depth the path buffers hold, grown on demand
+EVICTION_WATERMARK = 0.9  # an over-budget table is evicted down to this fraction
+NODE_OVERHEAD_BYTES = 400  # rough per-node cost of the dict entries and objects
+CHILD_EDGE_BYTES = 100  # rough cost of an entry of MCTS.children
+
+T = TypeVar("T")
+# A search coroutine: it yields the board it would pass to nn.predict, or the
+# list of boards it would pass to nn.predict_batch, is sent back what that call
+# returns, and returns its result. MCTS.run drives one with the MCTS's network.
+SearchSteps = Generator[Any, Any, T]
+
+
+class TableOccupancy(NamedTuple):
+    nodes: int  # positions held by the tree, expanded or terminal
+    max_nodes: int | None  # budget from args.max_nodes and args.max_bytes
+    estimated_bytes: int
+    evictions: int  # nodes evicted since the tree was created
+    child_edges: int  # edges whose child the descent finds in MCTS.children
+
+
+@dataclass
+class SearchStats:
+    """
+    Counters of the searches of MCTS with args.telemetry, one per move in
+    MCTS.search_stats. Stats add up, so players and Coach can aggregate them
+    over games. TreeParallelMCTS threads update them without locks, so their
+    counts are approximate.
+    """
+
+    moves: int = 0  # get_action_probabilities calls counted
+    simulations: int = 0
+    nn_calls: int = 0  # predict and predict_batch calls
+    game_calls: int = 0  # game rule calls, hashing included
+    descents: int = 0
+    total_depth: int = 0  # edges walked by all the descents
+    max_depth: int = 0
+    transposition_hits: int = 0  # new edges leading to an expanded node
+    nodes_allocated: int = 0  # leaves expanded
+    nn_seconds: float = 0.0
+    game_seconds: float = 0.0
+    search_seconds: float = 0.0  # wall time of the moves
+
+    @property
+    def mean_depth(self) -> float:
+        return self.total_depth / self.descents if self.descents else 0.0
+
+    @property
+    def tree_seconds(self) -> float:
+        """
+        The search time spent neither in the network nor in the game rules.
+        """
+        return self.search_seconds - self.nn_seconds - self.game_seconds
+
+    def __add__(self, other: "SearchStats") -> "SearchStats":
+        total = SearchStats(
+            **{
+                f.name: getattr(self, f.name) + getattr(other, f.name)
+                for f in fields(self)
+            }
+        )
+        total.max_depth = max(self.max_depth, other.max_depth)
+        return total
+
+    def __str__(self) -> str:
+        seconds = self.search_seconds or 1.0
+        return (
+            f"{self.moves} moves, {self.simulations} sims, "
+            f"{self.nn_calls} nn calls, {self.nodes_allocated} nodes, "
+            f"{self.transposition_hits} transpositions, depth "
+            f"{self.mean_depth:.1f} mean {self.max_depth} max, "
+            f"{self.search_seconds:.2f}s: nn {self.nn_seconds / seconds:.0%} "
+            f"game {self.game_seconds / seconds:.0%} "
+            f"tree {self.tree_seconds / seconds:.0%}"
+        )
+
+
+class _Timed:
+    """
+    Proxy of the game or the network of an MCTS with args.telemetry, adding
+    the count and the time of every method call to its search_stats.
+    """
+
+    def __init__(
+        self, target: Any, mcts: "MCTS[Any, Any, Any]", kind: Literal["nn", "game"]
+    ) -> None:
+        self._target = target
+        self._mcts = mcts
+        self._calls = f"{kind}_calls"
+        self._seconds = f"{kind}_seconds"
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        return self._timed(attr)
+
+    def _timed(self, method: Callable[..., Any]) -> Callable[..., Any]:
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats = self._mcts.search_stats
+                if stats is not None:
+                    setattr(stats, self._calls, getattr(stats, self._calls) + 1)
+                    seconds = getattr(stats, self._seconds)
+                    setattr(stats, self._seconds, seconds + time.perf_counter() - start)
+
+        return timed
+
 
 class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
     """
@@ -24,7 +158,7 @@ class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
     """
 
     game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor]
-    nn: NeuralNetInterface[BoardTensor, BooleanBoard, PolicyTensor]
+    nn: Predictor
     args: MctsArgs
 
     q_values_cache: dict[tuple[int, int], float]  # Q_sa, Q value of board_hash,action
@@ -40,15 +174,42 @@ class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
     valid_moves_cache: dict[int, GenericBooleanBoardTensor]  # ref-note: old Vs
     # cache the valid moves returned by game.get_valid_moves of key board_hash
     board_cache: dict[int, GenericBoardTensor]  # restore the board from hash
+    children: dict[int, dict[int, int]]  # board_hash -> {action: child board_hash}
+    # with args.cache_children, a descent through a known edge looks its child
+    # up here and in board_cache instead of calling get_next_canonical_state
+    root_hash: int | None  # board_hash of the last searched position
+    proven: dict[int, float]  # solved non-terminal nodes, value for their mover
+    widening_order: dict[int, NDArray[int_]]  # valid actions by decreasing prior
+    representatives: dict[int, int]  # board_hash -> hash of its representative
+    symmetry_lookups: int  # distinct boards mapped to their representative
+    symmetry_hits: int  # of those, boards whose representative was in the tree
+    _root_board: GenericBoardTensor | None  # root as passed, before symmetry
+    rng: random.Generator  # draws the root noise
+    gumbel_action: int | None  # action chosen by the last Gumbel root search
+    sims_used: int  # simulations run by the last get_action_probabilities
+    search_seconds: float  # and the time they took
+    search_stats: SearchStats | None  # of the last move, with args.telemetry
+    evictions: int
+    _budgeted: bool  # whether args sets max_nodes or max_bytes
+    _last_used: "OrderedDict[int, None] | None"  # LRU order, if evicting by LRU
+    _bytes_per_node: int | None  # measured on the first expanded node
+    _stored: TreeFile | None  # tree of load_tree, its nodes copied in on demand
+
+    # preallocated search path, (board_hash, action) of the ith traversed edge
+    _path_hashes: list[int]
+    _path_actions: list[int]
 
     def __init__(
         self,
         game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor],
-        nn: NeuralNetInterface[BoardTensor, BooleanBoard, PolicyTensor],
+        nn: Predictor,
         args: MctsArgs,
     ) -> None:
         self.game = game
         self.nn = nn
+        if args.telemetry:
+            self.game = cast(GenericGame[Any, Any, Any], _Timed(game, self, "game"))
+            self.nn = cast(Predictor, _Timed(nn, self, "nn"))
         self.args = args
         self.q_values_cache = {}
         self.n_edge_visit = {}
@@ -57,17 +218,235 @@ class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         self.game_value_cache = {}
         self.valid_moves_cache = {}
         self.board_cache = {}
+        self.children = {}
+        self.root_hash = None
+        self.proven = {}
+        self.widening_order = {}
+        self.representatives = {}
+        self.symmetry_lookups = 0
+        self.symmetry_hits = 0
+        self._root_board = None
+        self.rng = RNG if args.seed is None else random.default_rng(args.seed)
+        self.gumbel_action = None
+        self.sims_used = 0
+        self.search_seconds = 0.0
+        self.search_stats = None
+        self.evictions = 0
+        budgeted = args.max_nodes is not None or args.max_bytes is not None
+        self._budgeted = budgeted
+        self._last_used = OrderedDict() if budgeted and args.eviction == "lru" else None
+        self._bytes_per_node = None
+        self._stored = None
+        self._path_hashes = [0] * PATH_CAPACITY
+        self._path_actions = [0] * PATH_CAPACITY
 
-    def _cached_hash(self, canonical_board: BoardTensor) -> int:
+    def _cached_hash(self, canonical_board: BoardTensor, h: int | None = None) -> int:
         """
-        Cache the board and return the hash of the board.
+        Cache the board and return the hash of the board, h if it is known.
         """
-        h = self.game.get_board_hash(canonical_board)
+        if h is None:
+            h = self.game.get_board_hash(canonical_board)
+        if self.args.check_hashes:
+            self._check_hash(canonical_board, h)
         if h not in self.board_cache:
             self.board_cache[h] = canonical_board
-        # we can also check collision here
+        if self._stored is not None and not self._is_expanded(h):
+            self._fault_in(h)
+        if self._last_used is not None:
+            self._last_used[h] = None
+            self._last_used.move_to_end(h)
         return h
 
+    def save_tree(self, path: str) -> None:
+        """
+        Write the expanded nodes, their N, Q and P over the valid actions and
+        their explored edges, to path (see TreeFile). Nodes of the tree of
+        load_tree that were never reached are written back as they were.
+
+        Boards, game values and solver proofs are not saved. Board hashes
+        must be the same in every process, like the Zobrist hashes.
+        """
+        hashes = [h for h in self.board_cache if self._is_expanded(h)]
+        tree = TreeFile.build(
+            self._tree_header(),
+            hashes,
+            [self._node_record(h) for h in hashes],
+            [self.children.get(h, {}) for h in hashes],
+        )
+        if self._stored is not None:
+            tree = tree.merge(self._stored)
+        tree.write(path)
+
+    def load_tree(self, path: str) -> None:
+        """
+        Warm start from a tree written by save_tree. The file is memory-mapped
+        and a node is only copied into the tree when a search first reaches
+        it (see _fault_in), so loading takes the same time for any tree size.
+        """
+        tree = TreeFile.open(path)
+        if not (tree.header == self._tree_header()).all():
+            raise ValueError(
+                f"{path} holds the tree of another game, hashing or file version"
+            )
+        self._stored = tree
+
+    def _tree_header(self) -> NDArray[uint64]:
+        init_hash = self.game.get_board_hash(self.game.get_init_board())
+        return TreeFile.make_header(self.game.get_action_size(), init_hash)
+
+    def _fault_in(self, h: int) -> None:
+        """
+        Copy the node h from the tree of load_tree, if it holds it.
+        """
+        stored = cast(TreeFile, self._stored)
+        i = stored.find(h)
+        if i is None:
+            return
+        record = stored.record(i)
+        self._restore_node(h, record)
+        if self.args.widening_base is not None:
+            ranks = argsort(-record.p, kind="stable")
+            self.widening_order[h] = record.actions[ranks].astype(int_)
+        self.children[h] = {**stored.edges(i), **self.children.get(h, {})}
+
+    def _check_hash(self, canonical_board: BoardTensor, h: int) -> None:
+        """
+        args.check_hashes: raise if h is not the hash of canonical_board, or
+        if the tree holds another board under h.
+        """
+        if self.game.get_board_hash(canonical_board) != h:
+            raise RuntimeError(f"incremental hash {h:#x} is off for the board")
+        if h in self.board_cache and self.game.get_board_str(
+            self.board_cache[h]
+        ) != self.game.get_board_str(canonical_board):
+            raise RuntimeError(f"board hash collision on {h:#x}")
+
+    def _node(
+        self, canonical_board: BoardTensor, raw_hash: int | None = None
+    ) -> tuple[BoardTensor, int]:
+        """
+        Returns:
+            board: the board the tree holds for canonical_board, its
+                representative with args.symmetry, canonical_board otherwise
+            h: the hash of board
+
+        raw_hash is the hash of canonical_board if it is known.
+        """
+        if not self.args.symmetry:
+            return canonical_board, self._cached_hash(canonical_board, raw_hash)
+        if raw_hash is None:
+            raw_hash = self.game.get_board_hash(canonical_board)
+        elif self.args.check_hashes:
+            self._check_hash(canonical_board, raw_hash)
+        h = self.representatives.get(raw_hash)
+        if h is None or h not in self.board_cache:
+            representative, _ = self._representative(canonical_board)
+            h = self.game.get_board_hash(representative)
+            self.symmetry_lookups += 1
+            self.symmetry_hits += h in self.board_cache
+            self.representatives[raw_hash] = h
+            self._cached_hash(representative)
+        elif self._last_used is not None:
+            self._last_used[h] = None
+            self._last_used.move_to_end(h)
+        return cast(BoardTensor, self.board_cache[h]), h
+
+    def _representative(
+        self, canonical_board: BoardTensor
+    ) -> tuple[GenericBoardTensor, NDArray[int_]]:
+        """
+        Pick the board of canonical_board's symmetry class (get_symmetries)
+        with the smallest bytes, which is the same for the whole class.
+
+        Returns:
+            representative: that board
+            permutation: the action of canonical_board that each action of the
+                representative stands for; actions get_symmetries leaves out of
+                pi (e.g. pass in TicTacToe) map to themselves
+        """
+        action_size = self.game.get_action_size()
+        symmetries = self.game.get_symmetries(
+            canonical_board, cast(PolicyTensor, arange(action_size, dtype=float64))
+        )
+        representative, pi = min(symmetries, key=lambda s: asarray(s[0]).tobytes())
+        permutation = asarray(pi).astype(int_)
+        if len(permutation) < action_size:
+            permutation = concatenate(
+                [permutation, arange(len(permutation), action_size)]
+            )
+        return representative, permutation
+
+    def symmetry_hit_rate(self) -> float:
+        """
+        Returns:
+            rate: share of the distinct boards met by the search that were a
+                symmetry of a position already in the tree
+        """
+        return (
+            self.symmetry_hits / self.symmetry_lookups if self.symmetry_lookups else 0.0
+        )
+
+    def occupancy(self) -> TableOccupancy:
+        """
+        Returns:
+            occupancy: the size of the tree against its budget
+        """
+        nodes = len(self.board_cache)
+        return TableOccupancy(
+            nodes=nodes,
+            max_nodes=self._max_nodes(),
+            estimated_bytes=nodes * (self._measure_node() or 0),
+            evictions=self.evictions,
+            child_edges=sum(len(edges) for edges in self.children.values()),
+        )
+
+    def _measure_node(self) -> int | None:
+        """
+        Returns:
+            bytes: the estimated size of a node, measured once on the root,
+                with the entry of children leading to it and its widening
+                order
+        """
+        if self._bytes_per_node is None and self.root_hash is not None:
+            if self._is_expanded(self.root_hash):
+                node_bytes = self._node_bytes(self.root_hash) + CHILD_EDGE_BYTES
+                if self.root_hash in self.widening_order:
+                    node_bytes += self.widening_order[self.root_hash].nbytes
+                self._bytes_per_node = node_bytes
+        return self._bytes_per_node
+
+    def _max_nodes(self) -> int | None:
+        self._measure_node()
+        max_nodes = self.args.max_nodes
+        if self.args.max_bytes is not None and self._bytes_per_node:
+            by_bytes = self.args.max_bytes // self._bytes_per_node
+            max_nodes = by_bytes if max_nodes is None else min(max_nodes, by_bytes)
+        return max_nodes
+
+    def _enforce_budget(self, protected: set[int]) -> None:
+        """
+        Evict nodes down to EVICTION_WATERMARK of the budget once it is
+        exceeded, least recently used or least visited first. Nodes in
+        protected (the paths just searched) and the root are never evicted.
+        """
+        max_nodes = self._max_nodes()
+        if max_nodes is None or len(self.board_cache) <= max_nodes:
+            return
+        excess = len(self.board_cache) - int(max_nodes * EVICTION_WATERMARK)
+        if self._last_used is not None:
+            candidates = list(self._last_used)  # least recently used first
+        else:
+            candidates = sorted(self.board_cache, key=self._node_visits)
+        victims: list[int] = []
+        for h in candidates:
+            if len(victims) == excess:
+                break
+            if h not in protected and h != self.root_hash:
+                victims.append(h)
+        for h in victims:
+            self._evict(h)
+        self.evictions += len(victims)
+
     def get_action_probabilities(
         self, canonical_board: BoardTensor, temperature: int = 1
     ) -> PolicyTensor:
@@ -86,37 +465,343 @@ class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         Returns:
             prob: a policy vector where the probability of the ith action is
                    proportional to n_edge_visit[(board,action)]**(1./temp)
+
+        With args.leaf_batch_size > 1 the simulations run in rounds of
+        search_batch, otherwise one search per simulation. With
+        args.reuse_root_visits, visits the root kept from earlier searches (see
+        advance) count towards num_mcts_sims.
+
+        With args.root_search == "gumbel" the root is searched by
+        gumbel_search instead, and prob is its improved policy, or a one-hot
+        vector on gumbel_action when temp is 0.
+
+        With args.early_stop and temp 0, a position with a single valid move
+        is not searched, and the PUCT search stops as soon as the most visited
+        action leads by more than the simulations left. sims_used records the
+        simulations actually run; a descent of search_batch dropped on a
+        collision does not count.
+
+        With args.time_budget_ms, simulations (or rounds of search_batch) run
+        till the deadline, capped by num_mcts_sims; a round in flight when it
+        passes is finished. search_seconds records the time taken. If the
+        root got no visit at all, prob is uniform over the valid moves. The
+        Gumbel root search always runs num_mcts_sims simulations.
+
+        With args.solver the search stops once the root is proven, and a
+        root proven won or drawn gets a one-hot prob on a move that achieves
+        it, whatever the temperature.
+
+        With args.symmetry the search runs on the representative of the
+        board's symmetry class (see _representative) and prob is mapped back
+        to the actions of canonical_board.
+
+        With args.telemetry, search_stats counts the work of this call (see
+        SearchStats).
+        """
+        return self.run(
+            self.get_action_probabilities_steps(canonical_board, temperature)
+        )
+
+    def get_action_probabilities_steps(
+        self, canonical_board: BoardTensor, temperature: int = 1
+    ) -> SearchSteps[PolicyTensor]:
+        """
+        get_action_probabilities as a coroutine (see SearchSteps), so a caller
+        can run many searches at once and evaluate their leaves together. An
+        MCTS runs one coroutine at a time, they share its tree and path
+        buffers. The network calls it yields are not counted by
+        args.telemetry, and search_seconds includes the time spent suspended.
         """
+        if self.args.telemetry:
+            self.search_stats = SearchStats(moves=1)
+            start = time.perf_counter()
 
-        for _ in range(self.args.num_mcts_sims):
-            self.search(canonical_board)
+        if not self.args.symmetry:
+            prob = yield from self._root_policy_steps(canonical_board, temperature)
+        else:
+            representative, permutation = self._representative(canonical_board)
+            rep_hash = self.game.get_board_hash(representative)
+            self.representatives[rep_hash] = rep_hash
+            self._root_board = canonical_board
+            rep_prob = yield from self._root_policy_steps(
+                cast(BoardTensor, representative), temperature
+            )
+            if self.gumbel_action is not None:
+                self.gumbel_action = int(permutation[self.gumbel_action])
+            prob = zeros(len(rep_prob))
+            prob[permutation] = rep_prob
+
+        if self.search_stats is not None:
+            self.search_stats.simulations = self.sims_used
+            self.search_stats.search_seconds = time.perf_counter() - start
+        return cast(PolicyTensor, prob)
+
+    def run(self, steps: SearchSteps[T]) -> T:
+        """
+        Drive the search coroutine steps, evaluating what it yields with nn.
+
+        Returns:
+            result: what steps returns
+        """
+        try:
+            request = next(steps)
+            while True:
+                if isinstance(request, list):
+                    request = steps.send(self.nn.predict_batch(request))
+                else:
+                    request = steps.send(self.nn.predict(request))
+        except StopIteration as done:
+            return cast(T, done.value)
+
+    def _root_policy_steps(
+        self, canonical_board: BoardTensor, temperature: int
+    ) -> SearchSteps[PolicyTensor]:
+        """
+        get_action_probabilities in the frame of canonical_board as stored.
+        """
+        start = time.perf_counter()
 
         h = self._cached_hash(canonical_board)
-        counts = array(
-            [
-                self.n_edge_visit[(h, a)] if (h, a) in self.n_edge_visit else 0
-                for a in range(self.game.get_action_size())
-            ]
-        )
+        self.root_hash = h
+        self.gumbel_action = None
+        num_sims = max(0, self.args.num_mcts_sims)
+        if self.args.reuse_root_visits:
+            num_sims = max(0, num_sims - self._node_visits(h))
+        self.sims_used = 0
+        early_stop = self.args.early_stop and temperature == 0
+        deadline = None
+        if self.args.time_budget_ms is not None:
+            deadline = start + self.args.time_budget_ms / 1000
 
-        if temperature == 0:
-            all_best_action = argwhere(a=counts == max(counts)).flatten()
-            random_best_action = RNG.choice(all_best_action)
-            # prob: PolicyTensorType = zeros(len(counts))
-            prob = cast(PolicyTensor, zeros(len(counts)))
-            prob[random_best_action] = 1
-            return prob
-
-        counts = [x ** (1.0 / temperature) for x in counts]
-        counts_sum = float(sum(counts))
-        prob = cast(PolicyTensor, array([x / counts_sum for x in counts]))
-        return prob
+        if early_stop:
+            valid_actions = flatnonzero(self.game.get_valid_moves(canonical_board, 1))
+            if len(valid_actions) == 1:
+                self.gumbel_action = int(valid_actions[0])
+                prob = zeros(self.game.get_action_size())
+                prob[valid_actions[0]] = 1
+                return cast(PolicyTensor, prob)
+
+        if self.args.root_search == "gumbel":
+            improved_policy = yield from self._gumbel_search_steps(
+                canonical_board, num_sims
+            )
+            self.sims_used = num_sims
+            self.search_seconds = time.perf_counter() - start
+            if temperature == 0:
+                improved_policy = zeros(len(improved_policy))
+                improved_policy[self.gumbel_action] = 1
+            return cast(PolicyTensor, improved_policy)
+
+        remaining = num_sims
+        while remaining > 0:
+            if self.args.solver and self._solved_value(h) is not None:
+                break
+            if early_stop and self._is_decided(h, remaining):
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            batch_size = yield from self._search_round_steps(canonical_board, remaining)
+            remaining -= batch_size
+            self.sims_used += batch_size
+        self.search_seconds = time.perf_counter() - start
+
+        proven_action = self._proven_action(h) if self.args.solver else None
+        if proven_action is not None:
+            prob = zeros(self.game.get_action_size())
+            prob[proven_action] = 1
+            return cast(PolicyTensor, prob)
+
+        counts = self._visit_counts(h)
+        if counts.sum() == 0:  # out of time before the first backup
+            counts = asarray(self.game.get_valid_moves(canonical_board, 1), dtype=int_)
+        return cast(PolicyTensor, counts_to_policy(counts, temperature))
+
+    def _search_round_steps(
+        self, canonical_board: BoardTensor, remaining: int
+    ) -> SearchSteps[int]:
+        """
+        Run the next simulations of get_action_probabilities: a round of
+        search_batch with args.leaf_batch_size > 1, one search otherwise.
+
+        Returns:
+            simulations: how many were backed up, at most remaining. A descent
+                of search_batch dropped on a collision is not charged.
+        """
+        if self.args.leaf_batch_size > 1:
+            batch_size = min(self.args.leaf_batch_size, remaining)
+            return (yield from self._search_batch_steps(canonical_board, batch_size))
+        yield from self._search_steps(canonical_board)
+        return 1
+
+    def _is_decided(self, h: int, remaining: int) -> bool:
+        """
+        Whether remaining more simulations cannot change the most visited
+        action of the root h.
+        """
+        counts = self._visit_counts(h)
+        if len(counts) < 2:
+            return True
+        second, first = sort(counts)[-2:]
+        return first - second > remaining
+
+    def gumbel_search(
+        self, canonical_board: BoardTensor, num_sims: int
+    ) -> GenericPolicyTensor:
+        """
+        Root search of Gumbel AlphaZero (Danihelka et al., 2022): sample
+        args.gumbel_num_actions root actions without replacement by
+        Gumbel-top-k over the prior, then split the num_sims simulations over
+        them by sequential halving, keeping the better half by
+        g + logits + sigma(q) after each phase. Below the root, simulations
+        are the usual PUCT search. The survivor is stored in gumbel_action.
+
+        Returns:
+            improved_policy: softmax(logits + sigma(completed q)), the policy
+                target; unvisited actions get a value interpolated from the
+                root value and the visited ones
+        """
+        return self.run(self._gumbel_search_steps(canonical_board, num_sims))
+
+    def _gumbel_search_steps(
+        self, canonical_board: BoardTensor, num_sims: int
+    ) -> SearchSteps[GenericPolicyTensor]:
+        h = self.root_hash = self._cached_hash(canonical_board)
+        root_value = None
+        if not self._is_expanded(h):
+            root_value = -(yield from self._search_steps(canonical_board))
+            num_sims -= 1
+
+        prior, _ = self._priors_and_values(h)
+        valid = prior > 0
+        logits = ln(prior, where=valid, out=full(len(prior), -inf))
+        scores = logits + self.rng.gumbel(size=len(prior))
+        num_actions = min(self.args.gumbel_num_actions, int(valid.sum()))
+        survivors = list(argsort(-scores)[:num_actions])
+
+        while num_sims > 0:
+            phases = max(1, math.ceil(math.log2(len(survivors))))
+            per_action = max(1, num_sims // (phases * len(survivors)))
+            for action in survivors:
+                for _ in range(min(per_action, num_sims)):
+                    yield from self._search_action_steps(
+                        canonical_board, h, int(action)
+                    )
+                    num_sims -= 1
+            if len(survivors) == 1:
+                continue
+            sigma_q = self._sigma(self._completed_q(h, root_value))
+            survivors.sort(key=lambda a: -(scores[a] + sigma_q[a]))
+            survivors = survivors[: len(survivors) // 2]
+
+        sigma_q = self._sigma(self._completed_q(h, root_value))
+        self.gumbel_action = int(max(survivors, key=lambda a: scores[a] + sigma_q[a]))
+        improved = exp(logits + sigma_q - (logits + sigma_q).max())
+        return cast(GenericPolicyTensor, improved / improved.sum())
+
+    def _search_action_steps(
+        self, canonical_board: BoardTensor, h: int, action: int
+    ) -> SearchSteps[None]:
+        """
+        One simulation from the root h that is forced through action.
+        """
+        next_board, child = self._child(canonical_board, h, action)
+        self._link_child(h, action, child)
+        v = yield from self._search_steps(next_board)
+        self._update_edge(h, action, v)
+
+    def _completed_q(self, h: int, root_value: float | None) -> NDArray[float64]:
+        """
+        Q(s,a) of the visited root actions, v_mix of the others: the root value
+        averaged with the prior weighted Q of the visited actions. A reused root
+        has no network value, its visit weighted Q stands in for it.
+        """
+        prior, q = self._priors_and_values(h)
+        counts = self._visit_counts(h)
+        visited = counts > 0
+        total = counts.sum()
+        if total == 0:
+            return zeros(len(prior)) + (root_value or 0.0)
+        if root_value is None:
+            root_value = float((counts * q).sum() / total)
+        visited_prior = prior[visited].sum()
+        if visited_prior > 0:
+            weighted_q = float((prior * q)[visited].sum() / visited_prior)
+        else:
+            weighted_q = float(q[visited].mean())
+        v_mix = (root_value + total * weighted_q) / (1 + total)
+        return where(visited, q, v_mix)
+
+    def _sigma(self, q: NDArray[float64]) -> NDArray[float64]:
+        """
+        Monotone transform of completed values into logit units: q is rescaled
+        to [0, 1] by its min and max, then grows with the visits of the most
+        visited root action.
+        """
+        max_visits = self._visit_counts(cast(int, self.root_hash)).max()
+        scale = (self.args.gumbel_c_visit + max_visits) * self.args.gumbel_c_scale
+        spread = q.max() - q.min()
+        return scale * (q - q.min()) / spread if spread > 0 else zeros(len(q))
+
+    def advance(self, action: int) -> None:
+        """
+        Move the root to its child through action, e.g. once action has been
+        played. The statistics of the child's subtree are kept for the next
+        get_action_probabilities and every other node is freed.
+
+        Does nothing before the first search.
+        """
+        if self.root_hash is None:
+            return
+        if self.args.symmetry:
+            self._advance_representative(action)
+            return
+        child = self.children.get(self.root_hash, {}).get(action)
+        if child is None:  # never explored, nothing to keep
+            next_board, child = self.game.get_next_canonical_state(
+                self.board_cache[self.root_hash], self.root_hash, action
+            )
+            self._prune(set())
+            self.board_cache[child] = next_board
+        else:
+            self._prune(self._reachable(child))
+        self.root_hash = child
+
+    def _advance_representative(self, action: int) -> None:
+        """
+        advance with args.symmetry: action is an action of the root as passed
+        to get_action_probabilities, whose board is kept to follow the
+        orientation of the game.
+        """
+        root_board = cast(BoardTensor, self._root_board)
+        next_board, next_player = self.game.get_next_state(root_board, 1, action)
+        next_board = self.game.get_canonical_form(next_board, next_player)
+        representative, _ = self._representative(next_board)
+        child = self.game.get_board_hash(representative)
+        self._prune(self._reachable(child) if child in self.board_cache else set())
+        self.board_cache.setdefault(child, representative)
+        self.representatives[self.game.get_board_hash(next_board)] = child
+        self._root_board = next_board
+        self.root_hash = child
+
+    def _reachable(self, h: int) -> set[int]:
+        """
+        Returns:
+            hashes: h and every node reachable from it through explored edges
+        """
+        reachable = {h}
+        stack = [h]
+        while stack:
+            for child in self.children.get(stack.pop(), {}).values():
+                if child not in reachable:
+                    reachable.add(child)
+                    stack.append(child)
+        return reachable
 
     def search(self, canonical_board: BoardTensor) -> float:
         """
-        This function performs one iteration of MCTS. It is recursively called
-        till a leaf node is found. The action chosen at each node is one that
-        has the maximum upper confidence bound as in the paper.
+        This function performs one iteration of MCTS. It descends from
+        canonical_board till a leaf node is found. The action chosen at each
+        node is one that has the maximum upper confidence bound as in the paper.
 
         Once a leaf node is found, the neural network is called to return an
         initial policy P and a value v for the state. This value is propagated
@@ -124,6 +809,15 @@ class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         outcome is propagated up the search path.
         Update attr n_edge_visit, n_node_visit and q_values_cache.
 
+        The descent and the backup are loops over an explicit path instead of
+        one recursive call per ply, so deep games neither pay a Python frame
+        per level nor hit the recursion limit.
+
+        search only drives _search_steps, which get_action_probabilities and
+        gumbel_search run directly, so a subclass changes what a simulation
+        does by overriding _search_steps. An override of search is only seen
+        by the callers of search.
+
         NOTE: the return values are the negative of the value of the current
         state. This is done since v is in [-1,1] and if v is the value of a
         state for the current player, then its value is -v for the other player.
@@ -135,41 +829,352 @@ class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         We should improve the documentation when we have a better understanding
         on how players work. #TODO
         """
+        return self.run(self._search_steps(canonical_board))
 
-        h = self._cached_hash(canonical_board)
+    def _search_steps(self, canonical_board: BoardTensor) -> SearchSteps[float]:
+        """
+        search as a coroutine (see SearchSteps): one simulation, yielding its
+        leaf for evaluation. Every simulation outside search_batch runs
+        through here, so this is the method to override.
+        """
+        depth, board, h = self._descend(canonical_board)
 
+        solved_value = self._solved_value(h)
+        if solved_value is not None:  # terminal or proven node
+            v = -solved_value
+        else:  # leaf node
+            policy, value = yield board
+            valid_move = self.game.get_valid_moves(board, 1)
+            self._expand_leaf(h, policy, valid_move)
+            v = -float(asarray(value).item())  # nets return v as a (1,) array
+
+        if self.args.solver and solved_value is not None:
+            self._solve(self._path_hashes, self._path_actions, depth, solved_value)
+        v = self._backup(self._path_hashes, self._path_actions, depth, v)
+        if self._budgeted:
+            self._enforce_budget({h, *self._path_hashes[:depth]})
+        return v
+
+    def search_batch(self, canonical_board: BoardTensor, batch_size: int) -> int:
+        """
+        Descend batch_size paths from canonical_board, evaluate the distinct
+        leaves they reach with one nn.predict_batch call, then back all the
+        paths up.
+
+        Every edge on a pending path carries args.virtual_loss lost visits,
+        which steers the next descents of the round to other leaves. A descent
+        that reaches a leaf already pending in this round is dropped, and one
+        that reaches a terminal state is backed up right away.
+
+        Returns:
+            backups: the number of descents backed up, batch_size less the
+                dropped ones
+        """
+        return self.run(self._search_batch_steps(canonical_board, batch_size))
+
+    def _search_batch_steps(
+        self, canonical_board: BoardTensor, batch_size: int
+    ) -> SearchSteps[int]:
+        loss = self.args.virtual_loss
+        leaves: list[tuple[BoardTensor, int, list[int], list[int]]] = []
+        pending: set[int] = set()
+        terminals = 0
+
+        for _ in range(batch_size):
+            depth, board, h = self._descend(canonical_board, loss)
+            solved_value = self._solved_value(h)
+            if solved_value is not None:  # terminal or proven node
+                if self.args.solver:
+                    self._solve(
+                        self._path_hashes, self._path_actions, depth, solved_value
+                    )
+                self._backup(
+                    self._path_hashes, self._path_actions, depth, -solved_value, loss
+                )
+                terminals += 1
+            elif h in pending:  # collision with another descent of the round
+                self._remove_virtual_loss(
+                    self._path_hashes, self._path_actions, depth, loss
+                )
+            else:  # leaf node
+                pending.add(h)
+                path = self._path_hashes[:depth], self._path_actions[:depth]
+                leaves.append((board, h, *path))
+
+        if not leaves:
+            return terminals
+
+        policies, values = yield [board for board, *_ in leaves]
+        values = asarray(values).reshape(len(leaves))
+        for (board, h, hashes, actions), policy, v in zip(leaves, policies, values):
+            valid_move = self.game.get_valid_moves(board, 1)
+            self._expand_leaf(h, policy, valid_move)
+            self._backup(hashes, actions, len(hashes), -float(v), loss)
+        if self._budgeted:
+            self._enforce_budget(
+                {n for _, h, hashes, _ in leaves for n in (h, *hashes)}
+            )
+        return terminals + len(leaves)
+
+    def _expand_leaf(
+        self, h: int, policy: GenericPolicyTensor, valid_move: GenericBooleanBoardTensor
+    ) -> None:
+        """
+        Expand the leaf h with its prior (see _prior), and rank its actions by
+        prior for args.widening_base.
+        """
+        if self.search_stats is not None:
+            self.search_stats.nodes_allocated += 1
+        prior = self._prior(h, policy, valid_move)
+        if self.args.widening_base is not None:  # ranked before h is selectable
+            valid_actions = flatnonzero(valid_move)
+            ranks = argsort(-asarray(prior)[valid_actions], kind="stable")
+            self.widening_order[h] = valid_actions[ranks]
+        self._expand(h, prior, valid_move)
+
+    def _candidates(self, h: int) -> NDArray[int_] | None:
+        """
+        Returns:
+            actions: the actions the expanded node h selects among under
+                progressive widening, None without args.widening_base
+        """
+        if self.args.widening_base is None:
+            return None
+        order = self.widening_order[h]
+        width = self.args.widening_base * (self._node_visits(h) + 1) ** (
+            self.args.widening_exponent
+        )
+        return order[: math.ceil(width)]
+
+    def _prior(
+        self, h: int, policy: GenericPolicyTensor, valid_move: GenericBooleanBoardTensor
+    ) -> GenericPolicyTensor:
+        """
+        The masked network policy of the leaf h, mixed with Dirichlet noise
+        if h is the root and args.dirichlet_alpha > 0. A root kept by advance
+        is already expanded and keeps its prior.
+        """
+        prior = mask_policy(policy, valid_move)
+        if h != self.root_hash or self.args.dirichlet_alpha <= 0:
+            return prior
+        valid_actions = flatnonzero(valid_move)
+        noise = self.rng.dirichlet([self.args.dirichlet_alpha] * len(valid_actions))
+        prior = prior * (1 - self.args.dirichlet_epsilon)
+        prior[valid_actions] += self.args.dirichlet_epsilon * noise
+        return prior
+
+    def _descend(
+        self, canonical_board: BoardTensor, virtual_loss: int = 0
+    ) -> tuple[int, BoardTensor, int]:
+        """
+        Follow the highest upper confidence bound from canonical_board down to
+        the first terminal or unexpanded node, adding virtual_loss to every
+        traversed edge. The path is written to _path_hashes[:depth] and
+        _path_actions[:depth], which are reused (and grown) across calls.
+
+        Returns:
+            depth: the number of edges on the path
+            board: the canonical board of the node the descent stopped at
+            h: its hash, with game_value_cache[h] filled
+        """
+        depth = 0
+        board, h = self._node(canonical_board)
+        while True:
+            if depth:
+                self._link_child(
+                    self._path_hashes[depth - 1], self._path_actions[depth - 1], h
+                )
+            if (
+                self._game_value(h, board) != 0
+                or not self._is_expanded(h)
+                or h in self.proven
+            ):
+                if self.search_stats is not None:
+                    self.search_stats.descents += 1
+                    self.search_stats.total_depth += depth
+                    self.search_stats.max_depth = max(
+                        self.search_stats.max_depth, depth
+                    )
+                return depth, board, h
+
+            action = self._select_action(h)
+            if virtual_loss:
+                self._add_virtual_loss(h, action, virtual_loss)
+            if depth == len(self._path_hashes):
+                self._path_hashes.extend([0] * depth)
+                self._path_actions.extend([0] * depth)
+            self._path_hashes[depth] = h
+            self._path_actions[depth] = action
+            depth += 1
+
+            board, h = self._child(board, h, action)
+
+    def _link_child(self, h: int, action: int, child: int) -> None:
+        """
+        Record that action leads from the node h to the node child.
+        """
+        self.children.setdefault(h, {})[action] = child
+
+    def _game_value(self, h: int, board: BoardTensor) -> float:
+        """
+        Returns:
+            value: game_value_cache[h], filled from the game for the node
+                board on first use
+        """
         if h not in self.game_value_cache:
-            self.game_value_cache[h] = self.game.get_game_ended(canonical_board, 1)
-        if self.game_value_cache[h] != 0:  # terminal node
-            return -self.game_value_cache[h]
-
-        if h not in self.policy_cache:  # leaf node
-            self.policy_cache[h], v = self.nn.predict(canonical_board)
-            valid_move = self.game.get_valid_moves(canonical_board, 1)
-            self.policy_cache[h] = self.policy_cache[h] * valid_move  # mask invalid
-            sum_policy_cache_h: float = sum(self.policy_cache[h])
-            if sum_policy_cache_h > 0:
-                self.policy_cache[h] /= sum_policy_cache_h
+            self.game_value_cache[h] = self.game.get_game_ended(board, 1)
+        return self.game_value_cache[h]
+
+    def _child(
+        self, board: BoardTensor, h: int, action: int
+    ) -> tuple[BoardTensor, int]:
+        """
+        Returns:
+            board: the node (see _node) reached by action from the node board
+            h: its hash, updated from the parent's by the game, or looked up
+                with args.cache_children if the edge was walked before
+        """
+        if self.args.cache_children:
+            child = self.children.get(h, {}).get(action)
+            if child is not None and child in self.board_cache:
+                if self._last_used is not None:
+                    self._last_used[child] = None
+                    self._last_used.move_to_end(child)
+                return cast(BoardTensor, self.board_cache[child]), child
+        next_board, next_hash = self.game.get_next_canonical_state(board, h, action)
+        if self.search_stats is None:
+            return self._node(next_board, next_hash)
+        child_board, child = self._node(next_board, next_hash)
+        if self._is_expanded(child) and action not in self.children.get(h, {}):
+            self.search_stats.transposition_hits += 1
+        return child_board, child
+
+    def _solved_value(self, h: int) -> float | None:
+        """
+        Returns:
+            value: the game value of the node h for its player to move if it
+                is terminal or proven, None otherwise
+        """
+        if self.game_value_cache.get(h, 0) != 0:
+            return self.game_value_cache[h]
+        return self.proven.get(h)
+
+    def _solve(
+        self, hashes: list[int], actions: list[int], depth: int, value: float
+    ) -> None:
+        """
+        MCTS-Solver backup (Winands et al., 2008) of value, the solved value of
+        the node at the end of the path. A parent with a winning move is a
+        proven win. Otherwise the move is excluded from selection, and the
+        parent is proven once it has no move left, with its best move's value.
+        Stops at the first parent left unproven.
+        """
+        for i in range(depth - 1, -1, -1):
+            parent = hashes[i]
+            if parent in self.proven:
+                return
+            if -value >= 1:  # a winning move
+                self.proven[parent] = -value
             else:
-                # if all valid moves were masked make all valid moves equally probable
+                self._exclude_solved(parent, actions[i])
+                if self._has_selectable_action(parent):
+                    return
+                values = [
+                    self._solved_value(child)
+                    for child in self.children.get(parent, {}).values()
+                ]
+                if not values or None in values:  # a child was evicted
+                    return
+                self.proven[parent] = max(-cast(float, v) for v in values)
+            value = self.proven[parent]
+
+    def _exclude_solved(self, h: int, action: int) -> None:
+        """
+        Exclude the solved move action of the node h from selection, and
+        from its widening order.
+        """
+        self._exclude_action(h, action)
+        if h in self.widening_order:
+            order = self.widening_order[h]
+            self.widening_order[h] = order[order != action]
+
+    def _proven_action(self, h: int) -> int | None:
+        """
+        Returns:
+            action: a move of the node h that achieves its proven win or draw,
+                None if h is not proven or is a proven loss
+        """
+        if h not in self.proven or self.proven[h] <= -1:
+            return None
+        for action, child in self.children.get(h, {}).items():
+            child_value = self._solved_value(child)
+            if child_value is not None and -child_value == self.proven[h]:
+                return action
+        return None
+
+    def _backup(
+        self,
+        hashes: list[int],
+        actions: list[int],
+        depth: int,
+        v: float,
+        virtual_loss: int = 0,
+    ) -> float:
+        """
+        Back up v, the value of the node at the end of the path for the player
+        who moved into it, through the first depth edges in reverse, removing
+        their virtual_loss on the way.
 
-                # NB! All valid moves may be masked if either your NNet architecture is insufficient or you've get overfitting or something else.
-                # If you have got dozens or hundreds of these messages you should pay attention to your NNet and/or training process.
-                # #TODO: better error message
-                log.error("All valid moves were masked, doing a workaround.")
-                self.policy_cache[h] = self.policy_cache[h] + valid_move
-                self.policy_cache[h] /= sum(self.policy_cache[h])
+        Returns:
+            v: the value backed up for the player to move at the path's root
+        """
+        for i in range(depth - 1, -1, -1):
+            if virtual_loss:
+                self._add_virtual_loss(hashes[i], actions[i], -virtual_loss)
+            self._update_edge(hashes[i], actions[i], v)
+            v = -v
+        return v
 
-            self.valid_moves_cache[h] = valid_move
-            self.n_node_visit[h] = 0
-            return -v
+    def _remove_virtual_loss(
+        self, hashes: list[int], actions: list[int], depth: int, virtual_loss: int
+    ) -> None:
+        """
+        Take the virtual_loss back from the first depth edges of a dropped path.
+        """
+        for i in range(depth):
+            self._add_virtual_loss(hashes[i], actions[i], -virtual_loss)
 
+    # Node store primitives. `search` only touches the tree through these, so
+    # a subclass can swap the dict store for another layout (see array_mcts and
+    # sparse_mcts).
+
+    def _is_expanded(self, h: int) -> bool:
+        """
+        Whether the node of board hash h has been evaluated by the network.
+        """
+        return h in self.policy_cache
+
+    def _expand(
+        self, h: int, policy: GenericPolicyTensor, valid_move: GenericBooleanBoardTensor
+    ) -> None:
+        """
+        Store the masked prior and the valid moves of a newly evaluated node.
+        """
+        self.policy_cache[h] = policy
+        self.valid_moves_cache[h] = valid_move
+        self.n_node_visit[h] = 0
+
+    def _select_action(self, h: int) -> int:
+        """
+        Pick the valid action with the highest upper confidence bound.
+        """
         valid_move = self.valid_moves_cache[h]
         best_u = float("-inf")
         best_action = -1
+        candidates = self._candidates(h)
+        actions = range(self.game.get_action_size())
 
-        # pick the action with the highest upper confidence bound
-        for action in range(self.game.get_action_size()):
+        for action in actions if candidates is None else candidates.tolist():
             if not valid_move[action]:
                 continue
             if (h, action) in self.q_values_cache:
@@ -191,12 +1196,12 @@ class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
                 best_u = u
                 best_action = action
 
-        action = best_action
-        next_board, next_player = self.game.get_next_state(canonical_board, 1, action)
-        next_board = self.game.get_canonical_form(next_board, next_player)
-
-        v = self.search(next_board)
+        return best_action
 
+    def _update_edge(self, h: int, action: int, v: float) -> None:
+        """
+        Back up the value v through the edge (h, action).
+        """
         if (h, action) in self.q_values_cache:
             self.q_values_cache[(h, action)] = (
                 self.n_edge_visit[(h, action)] * self.q_values_cache[(h, action)] + v
@@ -208,4 +1213,232 @@ class MCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
 
         self.n_node_visit[h] += 1
 
-        return -v
+    def _add_virtual_loss(self, h: int, action: int, loss: int) -> None:
+        """
+        Count loss extra visits of value -1 on the edge (h, action); a negative
+        loss takes them back.
+        """
+        n = self.n_edge_visit.get((h, action), 0)
+        q = self.q_values_cache.get((h, action), 0.0)
+        if n + loss == 0:  # back to an unvisited edge
+            del self.n_edge_visit[(h, action)]
+            del self.q_values_cache[(h, action)]
+        else:
+            self.q_values_cache[(h, action)] = (n * q - loss) / (n + loss)
+            self.n_edge_visit[(h, action)] = n + loss
+        self.n_node_visit[h] += loss
+
+    def _exclude_action(self, h: int, action: int) -> None:
+        """
+        Never select action at the node h again, its outcome is proven.
+        """
+        valid_move = asarray(self.valid_moves_cache[h]).copy()
+        valid_move[action] = 0
+        self.valid_moves_cache[h] = valid_move
+
+    def _has_selectable_action(self, h: int) -> bool:
+        """
+        Whether the node h has a valid move that is not excluded.
+        """
+        return bool(asarray(self.valid_moves_cache[h]).any())
+
+    def _node_visits(self, h: int) -> int:
+        """
+        Returns:
+            visits: N(s,*) of the node h, 0 if it is not expanded
+        """
+        return self.n_node_visit.get(h, 0)
+
+    def _node_record(self, h: int) -> NodeRecord:
+        """
+        Returns:
+            record: the statistics of the expanded node h over its valid
+                actions, for save_tree
+        """
+        actions = flatnonzero(self.valid_moves_cache[h]).astype(int32)
+        edges = [(h, a) for a in actions.tolist()]
+        return NodeRecord(
+            visits=self.n_node_visit[h],
+            actions=actions,
+            n=array([self.n_edge_visit.get(e, 0) for e in edges], dtype=int32),
+            q=array([self.q_values_cache.get(e, 0.0) for e in edges], dtype=float32),
+            p=asarray(self.policy_cache[h])[actions].astype(float32),
+        )
+
+    def _restore_node(self, h: int, record: NodeRecord) -> None:
+        """
+        Expand the node h with the statistics of record, for load_tree.
+        """
+        policy = zeros(self.game.get_action_size())
+        policy[record.actions] = record.p
+        valid_move = zeros(self.game.get_action_size(), dtype=int_)
+        valid_move[record.actions] = 1
+        self._expand(h, policy, valid_move)
+        actions, n_edge, q_edge = record.actions, record.n, record.q
+        for action, n, q in zip(actions.tolist(), n_edge.tolist(), q_edge.tolist()):
+            if n:
+                self.n_edge_visit[(h, action)] = n
+                self.q_values_cache[(h, action)] = q
+        self.n_node_visit[h] = record.visits
+
+    def _prune(self, keep: set[int]) -> None:
+        """
+        Free every node whose board hash is not in keep.
+        """
+        self.q_values_cache = {
+            k: q for k, q in self.q_values_cache.items() if k[0] in keep
+        }
+        self.n_edge_visit = {k: n for k, n in self.n_edge_visit.items() if k[0] in keep}
+        self.n_node_visit = {h: n for h, n in self.n_node_visit.items() if h in keep}
+        self.policy_cache = {h: p for h, p in self.policy_cache.items() if h in keep}
+        self.valid_moves_cache = {
+            h: v for h, v in self.valid_moves_cache.items() if h in keep
+        }
+        self.game_value_cache = {
+            h: v for h, v in self.game_value_cache.items() if h in keep
+        }
+        self.board_cache = {h: b for h, b in self.board_cache.items() if h in keep}
+        self.children = {h: c for h, c in self.children.items() if h in keep}
+        self.proven = {h: v for h, v in self.proven.items() if h in keep}
+        self.widening_order = {
+            h: o for h, o in self.widening_order.items() if h in keep
+        }
+        self.representatives = {
+            raw: h for raw, h in self.representatives.items() if h in keep
+        }
+        if self._last_used is not None:
+            self._last_used = OrderedDict(
+                (h, None) for h in self._last_used if h in keep
+            )
+
+    def _evict(self, h: int) -> None:
+        """
+        Free the node h and its outgoing edges. Edges into it are kept, a later
+        descent through them expands it again.
+        """
+        for action in self.children.pop(h, {}):
+            self.q_values_cache.pop((h, action), None)
+            self.n_edge_visit.pop((h, action), None)
+        self.n_node_visit.pop(h, None)
+        self.policy_cache.pop(h, None)
+        self.valid_moves_cache.pop(h, None)
+        self.game_value_cache.pop(h, None)
+        self.proven.pop(h, None)
+        self.widening_order.pop(h, None)
+        self.board_cache.pop(h, None)
+        if self._last_used is not None:
+            self._last_used.pop(h, None)
+
+    def _node_bytes(self, h: int) -> int:
+        """
+        Returns:
+            bytes: a rough estimate of the memory held by the expanded node h
+        """
+        return (
+            asarray(self.board_cache[h]).nbytes
+            + asarray(self.policy_cache[h]).nbytes
+            + asarray(self.valid_moves_cache[h]).nbytes
+            + NODE_OVERHEAD_BYTES
+        )
+
+    def _priors_and_values(self, h: int) -> tuple[NDArray[float64], NDArray[float64]]:
+        """
+        Returns:
+            prior: P(s,a) of every action of the expanded node h
+            q: Q(s,a) of every action, 0 if unvisited
+        """
+        q = array(
+            [
+                self.q_values_cache.get((h, a), 0.0)
+                for a in range(self.game.get_action_size())
+            ]
+        )
+        return asarray(self.policy_cache[h], dtype=float64), q
+
+    def _visit_counts(self, h: int) -> NDArray[int_]:
+        """
+        Returns:
+            counts: n_edge_visit of every action of the node h, 0 if unvisited
+        """
+        return array(
+            [
+                self.n_edge_visit[(h, a)] if (h, a) in self.n_edge_visit else 0
+                for a in range(self.game.get_action_size())
+            ]
+        )
+
+
+class MctsPlayer(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Arena player that plays the most visited action of an MCTS and re-roots
+    the tree on every move, its own and the opponent's (through notify), so
+    each search starts from the visits it already has.
+    """
+
+    mcts: MCTS[BoardTensor, BooleanBoard, PolicyTensor]
+    sims_used: list[int]  # simulations run for each move played
+    search_stats: SearchStats  # summed over the moves played, with telemetry
+
+    def __init__(self, mcts: MCTS[BoardTensor, BooleanBoard, PolicyTensor]) -> None:
+        self.mcts = mcts
+        self.sims_used = []
+        self.search_stats = SearchStats()
+
+    def __call__(self, canonical_board: BoardTensor) -> int:
+        probs = self.mcts.get_action_probabilities(canonical_board, temperature=0)
+        self.sims_used.append(self.mcts.sims_used)
+        if self.mcts.search_stats is not None:
+            self.search_stats += self.mcts.search_stats
+        action = int(argmax(probs))
+        self.mcts.advance(action)
+        return action
+
+    def start_game(self) -> None:
+        self.mcts.root_hash = None  # the last game's tree does not lead here
+
+    def notify(self, board: BoardTensor, action: int) -> None:
+        self.mcts.advance(action)
+
+
+def mask_policy(
+    policy: GenericPolicyTensor, valid_move: GenericBooleanBoardTensor
+) -> GenericPolicyTensor:
+    """
+    Mask the invalid moves out of the network policy and renormalize it.
+    """
+    policy = policy * valid_move  # mask invalid
+    sum_policy: float = policy.sum()
+    if sum_policy > 0:
+        policy /= sum_policy
+    else:
+        # if all valid moves were masked make all valid moves equally probable
+
+        # NB! All valid moves may be masked if either your NNet architecture is insufficient or you've get overfitting or something else.
+        # If you have got dozens or hundreds of these messages you should pay attention to your NNet and/or training process.
+        # #TODO: better error message
+        log.error("All valid moves were masked, doing a workaround.")
+        policy = policy + valid_move
+        policy /= policy.sum()
+    return policy
+
+
+def counts_to_policy(counts: NDArray[int_], temperature: float) -> GenericPolicyTensor:
+    """
+    Turn root visit counts into a policy.
+
+    Returns:
+        prob: a policy vector where the probability of the ith action is
+               proportional to counts[i]**(1./temp), or a one-hot vector on a
+               random most visited action when temp is 0
+    """
+    if temperature == 0:
+        all_best_action = argwhere(a=counts == max(counts)).flatten()
+        random_best_action = RNG.choice(all_best_action)
+        prob = cast(GenericPolicyTensor, zeros(len(counts)))
+        prob[random_best_action] = 1
+        return prob
+
+    counts = [x ** (1.0 / temperature) for x in counts]
+    counts_sum = float(sum(counts))
+    prob = cast(GenericPolicyTensor, array([x / counts_sum for x in counts]))
+    return prob
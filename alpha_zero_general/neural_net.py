@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Any, Generic
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any, Generic, Protocol
+
+from numpy import array, random
 
 from alpha_zero_general import (
     BoardTensor,
@@ -9,6 +12,19 @@ from alpha_zero_general import (
     TrainingExample,
 )
 from alpha_zero_general.game import GenericGame
+from alpha_zero_general.replay_buffer import ReplayBuffer
+
+
+class Predictor(Protocol):
+    """
+    What a search needs of a network: the predict and predict_batch of
+    NeuralNetInterface, which an InferenceClient also has without being a
+    trainable network.
+    """
+
+    def predict(self, board: Any) -> tuple[GenericPolicyTensor, float]: ...
+
+    def predict_batch(self, boards: list[Any]) -> tuple[GenericPolicyTensor, Any]: ...
 
 
 # #TODO/REF: rename to NNInterface
@@ -29,7 +45,9 @@ class NeuralNetInterface(ABC, Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         )
 
     @abstractmethod
-    def train(self, examples: list[TrainingExample[BoardTensor, PolicyTensor]]) -> None:
+    def train(
+        self, examples: Sequence[TrainingExample[BoardTensor, PolicyTensor]]
+    ) -> None:
         """
         Impure function, trains the neural network with examples obtained from
         self-play.
@@ -38,7 +56,9 @@ class NeuralNetInterface(ABC, Generic[BoardTensor, BooleanBoard, PolicyTensor]):
             examples: a list of TrainingExample, where each example is of form
                 (board, pi, v). pi is the MCTS informed policy vector for
                 the given board, and v is its value. The examples has
-                board in its canonical form.
+                board in its canonical form. With CoachArgs.replay_buffer it
+                is a ReplayBuffer, too big to load whole: draw the batches
+                with sample_examples or replay_batches.
         """
         raise NotImplementedError("train method must be implemented by the subclass")
 
@@ -55,6 +75,24 @@ class NeuralNetInterface(ABC, Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         """
         raise NotImplementedError("predict method must be implemented by the subclass")
 
+    def predict_batch(self, boards: list[Any]) -> tuple[GenericPolicyTensor, Any]:
+        """
+        Input:
+            boards: a list of boards in their canonical form.
+
+        Returns:
+            pis: an array of shape (len(boards), game.get_action_size)
+            vs: an array of len(boards) values in [-1,1]
+
+        The default calls predict once per board. Override it to run the boards
+        through the network as a single batch.
+        """
+        predictions = [self.predict(board) for board in boards]
+        return (
+            array([pi for pi, _ in predictions]),
+            array([v for _, v in predictions]).reshape(len(boards)),
+        )
+
     @abstractmethod
     def save_checkpoint(self, folder: str, filename: str) -> None:
         """
@@ -73,3 +111,34 @@ class NeuralNetInterface(ABC, Generic[BoardTensor, BooleanBoard, PolicyTensor]):
         raise NotImplementedError(
             "load_checkpoint method must be implemented by the subclass"
         )
+
+
+def sample_examples(
+    examples: Sequence[TrainingExample[Any, Any]], batch_size: int
+) -> tuple[Any, Any, Any]:
+    """
+    Returns:
+        boards, pis, vs: arrays of batch_size examples drawn uniformly with
+            replacement, with ReplayBuffer.sample when examples is a replay
+            buffer so only the batch is read from disk
+    """
+    if isinstance(examples, ReplayBuffer):
+        return examples.sample(batch_size)
+    sample_ids = random.randint(len(examples), size=batch_size)
+    boards, pis, vs = list(zip(*[examples[i] for i in sample_ids]))
+    return array(boards), array(pis), array(vs)
+
+
+def replay_batches(
+    buffer: ReplayBuffer,
+    batch_size: int,
+    encode: Callable[[Any], Any] | None = None,
+) -> Iterator[tuple[Any, tuple[Any, Any]]]:
+    """
+    Endless (boards, (pis, vs)) batches sampled from buffer, for a Keras
+    Model.fit with steps_per_epoch. encode, if given, maps the boards to the
+    network input.
+    """
+    while True:
+        boards, pis, vs = buffer.sample(batch_size)
+        yield (boards if encode is None else encode(boards)), (pis, vs)
@@ -3,7 +3,7 @@ from typing import cast
 
 import numpy as np
 
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import NeuralNetInterface, replay_batches
 from alpha_zero_general.othello import (
     OthelloBoardTensor,
     OthelloBooleanBoardTensor,
@@ -13,6 +13,7 @@ from alpha_zero_general.othello import (
 )
 from alpha_zero_general.othello.keras.othello_n_net import OthelloNNet
 from alpha_zero_general.othello.othello_game import OthelloGame
+from alpha_zero_general.replay_buffer import ReplayBuffer
 
 args = OthelloNNArg(
     lr=0.001,
@@ -38,6 +39,15 @@ class NNetWrapper(
         """
         examples: list of examples, each example is of form (board, pi, v)
         """
+        if isinstance(examples, ReplayBuffer):
+            # sampled batch by batch, the buffer stays on disk
+            self.nn.model.fit(
+                replay_batches(examples, args.batch_size),
+                steps_per_epoch=max(1, len(examples) // args.batch_size),
+                epochs=args.epochs,
+            )
+            return
+
         input_boards, target_pis, target_vs = cast(
             tuple[list[OthelloBoardTensor], list[OthelloPolicyTensor], list[float]],
             list(zip(*examples)),  # pyright: ignore = pyright problem
@@ -69,6 +79,15 @@ class NNetWrapper(
         # print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return pi[0], v[0]
 
+    def predict_batch(
+        self, boards: list[OthelloBoardTensor]
+    ) -> tuple[OthelloPolicyTensor, np.ndarray]:
+        """
+        boards: list of np arrays with boards, evaluated in one forward pass
+        """
+        pi, v = self.nn.model.predict(np.asarray(boards), verbose=0)
+        return pi, v.reshape(len(boards))
+
     def save_checkpoint(
         self, folder: str = "checkpoint", filename: str = "checkpoint.pth.tar"
     ) -> None:
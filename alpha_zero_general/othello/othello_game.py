@@ -9,6 +9,7 @@ from alpha_zero_general.othello import (
     OthelloPolicyTensor,
 )
 from alpha_zero_general.othello.othello_logic import OthelloBoard
+from alpha_zero_general.zobrist import ZobristHash, flip
 
 
 class OthelloGame(
@@ -23,6 +24,7 @@ class OthelloGame(
 
     def __init__(self, n: int):
         self.n = n
+        self.zobrist = ZobristHash(n * n)
 
     def get_init_board(self):
         # return initial board (numpy board)
@@ -52,6 +54,14 @@ class OthelloGame(
         b.execute_move(move, player)
         return (array(b.pieces), -player)
 
+    def get_next_canonical_state(
+        self, canonical_board: OthelloBoardTensor, board_hash: int, action: int
+    ) -> tuple[OthelloBoardTensor, int]:
+        next_board, next_player = self.get_next_state(canonical_board, 1, action)
+        # the placed disc and the flipped ones
+        board_hash = self.zobrist.diff_hash(board_hash, canonical_board, next_board)
+        return self.get_canonical_form(next_board, next_player), flip(board_hash)
+
     def get_valid_moves(self, board: OthelloBoardTensor, player: int):
         # return a fixed size binary vector
         valid_moves = [0] * self.get_action_size()
@@ -105,7 +115,7 @@ class OthelloGame(
         return array2string(board)
 
     def get_board_hash(self, board: OthelloBoardTensor) -> int:
-        return hash(board.tobytes())
+        return self.zobrist.board_hash(board)
 
     def string_representation_readable(self, board: OthelloBoardTensor) -> str:
         board_s = "".join(
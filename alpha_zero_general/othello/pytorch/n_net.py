@@ -1,12 +1,11 @@
 import os
-import time
 
 import numpy as np
 import torch
 import torch.optim as optim
 from tqdm import tqdm
 
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import NeuralNetInterface, sample_examples
 from alpha_zero_general.othello import (
     OthelloBoardDataType,
     OthelloBoardTensor,
@@ -58,8 +57,7 @@ class OthelloTorchNNInterface(
 
             tq = tqdm(range(batch_count), desc="Training Net")
             for _ in tq:
-                sample_ids = np.random.randint(len(examples), size=args.batch_size)
-                boards, pis, vs = list(zip(*[examples[i] for i in sample_ids]))
+                boards, pis, vs = sample_examples(examples, args.batch_size)
                 boards = torch.FloatTensor(np.array(boards).astype(np.float64))
                 target_pis = torch.FloatTensor(np.array(pis))
                 target_vs = torch.FloatTensor(np.array(vs).astype(np.float64))
@@ -92,9 +90,6 @@ class OthelloTorchNNInterface(
         """
         board: np array with board
         """
-        # timing
-        time.time()
-
         # preparing input
         board_torch = torch.FloatTensor(board.astype(OthelloBoardDataType))
         if args.cuda:
@@ -104,9 +99,24 @@ class OthelloTorchNNInterface(
         with torch.no_grad():
             pi, v = self.nn(board_torch)
 
-        # print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return torch.exp(pi).data.cpu().numpy()[0], v.data.cpu().numpy()[0]  # type: ignore # pytorch problem
 
+    def predict_batch(
+        self, boards: list[OthelloBoardTensor]
+    ) -> tuple[OthelloPolicyTensor, np.ndarray]:
+        """
+        boards: list of np arrays with boards, evaluated in one forward pass
+        """
+        board_torch = torch.FloatTensor(np.asarray(boards).astype(OthelloBoardDataType))
+        if args.cuda:
+            board_torch = board_torch.contiguous().cuda()
+        board_torch = board_torch.view(len(boards), self.board_x, self.board_y)
+        self.nn.eval()
+        with torch.no_grad():
+            pi, v = self.nn(board_torch)
+
+        return torch.exp(pi).data.cpu().numpy(), v.data.cpu().numpy().reshape(len(boards))  # type: ignore # pytorch problem
+
     def loss_pi(self, targets: torch.Tensor, outputs: torch.Tensor) -> torch.Tensor:
         return -torch.sum(targets * outputs) / targets.size()[0]
 
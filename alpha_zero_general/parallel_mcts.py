@@ -0,0 +1,154 @@
+import multiprocessing
+from collections.abc import Callable
+from dataclasses import replace
+from multiprocessing.connection import Connection
+from typing import Any, Generic
+
+from numpy import random
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.game import BoardTensor, BooleanBoard, GenericGame, PolicyTensor
+from alpha_zero_general.mcts import MCTS, SearchStats, counts_to_policy
+from alpha_zero_general.neural_net import NeuralNetInterface, Predictor
+
+NNFactory = Callable[[], Predictor]
+
+
+class NetLoader(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Picklable network factory for worker processes: builds nn_class(game) and
+    loads folder/filename into it. Works with every NeuralNetInterface, Keras
+    or PyTorch, since only the class and the checkpoint cross the process
+    boundary, not the model.
+    """
+
+    def __init__(
+        self,
+        nn_class: type[NeuralNetInterface[BoardTensor, BooleanBoard, PolicyTensor]],
+        game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor],
+        folder: str,
+        filename: str,
+    ) -> None:
+        self.nn_class = nn_class
+        self.game = game
+        self.folder = folder
+        self.filename = filename
+
+    def __call__(self) -> NeuralNetInterface[BoardTensor, BooleanBoard, PolicyTensor]:
+        nn = self.nn_class(self.game)
+        nn.load_checkpoint(self.folder, self.filename)
+        return nn
+
+
+def _search_worker(
+    conn: Connection,
+    game: GenericGame[Any, Any, Any],
+    nn_factory: NNFactory,
+    args: MctsArgs,
+) -> None:
+    """
+    Worker loop: build the network once, then answer every (board, num_sims)
+    request with the root visit counts of a fresh search, till None arrives.
+    """
+    nn = nn_factory()
+    while (request := conn.recv()) is not None:
+        board, num_sims = request
+        mcts = MCTS(game, nn, replace(args, num_mcts_sims=num_sims))
+        mcts.get_action_probabilities(board)
+        conn.send(mcts._visit_counts(mcts.root_hash))
+    conn.close()
+
+
+class RootParallelMCTS(Generic[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Root parallelization: num_workers processes search the same root
+    independently, each with its own seed, and the root visit counts are
+    summed before the temperature is applied. args.num_mcts_sims is the total
+    budget, split evenly between the workers.
+
+    The workers only differ by their root noise, so args.dirichlet_alpha must
+    be positive when there is more than one. nn_factory runs in each worker
+    to build its network, it must be picklable (see NetLoader). Workers are
+    started with "spawn", so scripts creating this must guard their entry
+    point with `if __name__ == "__main__":`.
+
+    Every search starts from scratch, advance is a no-op kept for MctsPlayer.
+    The workers keep no telemetry, search_stats is always None.
+    Call close (or use it as a context manager) to stop the workers.
+    """
+
+    game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor]
+    args: MctsArgs
+    num_sims: list[int]  # share of args.num_mcts_sims of each worker
+    sims_used: int  # simulations run by the last get_action_probabilities
+    search_stats: SearchStats | None  # None, as for MCTS without telemetry
+    conns: list[Connection]
+    processes: list[multiprocessing.process.BaseProcess]
+
+    def __init__(
+        self,
+        game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor],
+        nn_factory: NNFactory,
+        args: MctsArgs,
+        num_workers: int,
+    ) -> None:
+        if not 1 <= num_workers <= args.num_mcts_sims:
+            raise ValueError(
+                f"num_workers must be in [1, num_mcts_sims], got {num_workers}"
+            )
+        if num_workers > 1 and args.dirichlet_alpha <= 0:
+            raise ValueError("root parallel workers need dirichlet_alpha > 0 to differ")
+        self.game = game
+        self.args = args
+        share, extra = divmod(args.num_mcts_sims, num_workers)
+        self.num_sims = [share + (i < extra) for i in range(num_workers)]
+        self.sims_used = 0
+        self.search_stats = None
+
+        context = multiprocessing.get_context("spawn")
+        seeds = random.SeedSequence(args.seed).generate_state(num_workers)
+        self.conns = []
+        self.processes = []
+        for seed in seeds:
+            conn, worker_conn = context.Pipe()
+            worker_args = replace(args, seed=int(seed))
+            process = context.Process(
+                target=_search_worker,
+                args=(worker_conn, game, nn_factory, worker_args),
+                daemon=True,
+            )
+            process.start()
+            worker_conn.close()
+            self.conns.append(conn)
+            self.processes.append(process)
+
+    def get_action_probabilities(
+        self, canonical_board: BoardTensor, temperature: int = 1
+    ) -> PolicyTensor:
+        """
+        Same as MCTS.get_action_probabilities, over the summed visit counts of
+        the workers.
+        """
+        for conn, num_sims in zip(self.conns, self.num_sims):
+            conn.send((canonical_board, num_sims))
+        counts = sum(conn.recv() for conn in self.conns)
+        self.sims_used = sum(self.num_sims)
+        return counts_to_policy(counts, temperature)  # type: ignore
+
+    def advance(self, action: int) -> None:
+        pass
+
+    def close(self) -> None:
+        for conn in self.conns:
+            conn.send(None)
+            conn.close()
+        for process in self.processes:
+            process.join()
+        self.conns = []
+        self.processes = []
+
+    def __enter__(self) -> "RootParallelMCTS[BoardTensor, BooleanBoard, PolicyTensor]":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
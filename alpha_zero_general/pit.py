@@ -2,18 +2,17 @@
 Using Othello as an example, this script pits two agents against each other.
 """
 
-import numpy as np
-
 from alpha_zero_general import MctsArgs
 from alpha_zero_general.arena import Arena
-from alpha_zero_general.mcts import MCTS
-from alpha_zero_general.othello.othello_game import OthelloBoardTensor, OthelloGame
+from alpha_zero_general.mcts import MCTS, MctsPlayer
+from alpha_zero_general.othello.othello_game import OthelloGame
 from alpha_zero_general.othello.othello_players import (
     GreedyOthelloPlayer,
     HumanOthelloPlayer,
     RandomPlayer,
 )
 from alpha_zero_general.othello.pytorch.n_net import OthelloTorchNNInterface as NNet
+from alpha_zero_general.parallel_mcts import NetLoader, RootParallelMCTS
 
 """
 use this script to play any two agents against each other, or play manually with
@@ -22,6 +21,8 @@ any agent.
 
 MINI_OTHELLO = False  # Play in 6x6 instead of the normal 8x8.
 HUMAN_VS_CPU = True
+ROOT_PARALLEL_WORKERS = 1  # split the first agent's search over more processes
+TREE_FILE = None  # warm start the first agent from a tree of MCTS.save_tree
 
 if MINI_OTHELLO:
     g = OthelloGame(6)
@@ -36,32 +37,40 @@ hp = HumanOthelloPlayer(g).play
 FOLDER = "./pretrained_models/othello/pytorch/"
 
 # nnet players
-n1 = NNet(g)
 if MINI_OTHELLO:
-    n1.load_checkpoint(FOLDER, "6x100x25_best.pth.tar")
-else:
-    n1.load_checkpoint(FOLDER, "8x8_100checkpoints_best.pth.tar")
-args1 = MctsArgs(num_mcts_sims=50, c_puct=1.0)
-mcts1 = MCTS(g, n1, args1)
-
-
-def n1p(x: OthelloBoardTensor) -> int:
-    return int(np.argmax(mcts1.get_action_probabilities(x, temperature=0)))
-
-
-if HUMAN_VS_CPU:
-    player2 = hp
+    CHECKPOINT = "6x100x25_best.pth.tar"
 else:
-    n2 = NNet(g)
-    n2.load_checkpoint(FOLDER, "8x8_100checkpoints_best.pth.tar")
-    args2 = MctsArgs(num_mcts_sims=50, c_puct=1.0)
-    mcts2 = MCTS(g, n2, args2)
-
-    def n2p(x: OthelloBoardTensor) -> int:
-        return int(np.argmax(mcts2.get_action_probabilities(x, temperature=0)))
-
-    player2 = n2p  # Player 2 is neural network if it's cpu vs cpu.
-
-arena = Arena(n1p, player2, g, display=OthelloGame.display)
-
-print(arena.play_games(2, verbose=True))
+    CHECKPOINT = "8x8_100checkpoints_best.pth.tar"
+
+if __name__ == "__main__":  # root parallel workers re-import this script
+    if ROOT_PARALLEL_WORKERS > 1:
+        args1 = MctsArgs(num_mcts_sims=50, c_puct=1.0, dirichlet_alpha=0.3)
+        loader = NetLoader(NNet, g, FOLDER, CHECKPOINT)
+        mcts1 = RootParallelMCTS(g, loader, args1, ROOT_PARALLEL_WORKERS)
+    else:
+        n1 = NNet(g)
+        n1.load_checkpoint(FOLDER, CHECKPOINT)
+        args1 = MctsArgs(
+            num_mcts_sims=50, c_puct=1.0, reuse_root_visits=True, early_stop=True
+        )
+        mcts1 = MCTS(g, n1, args1)
+        if TREE_FILE is not None:
+            mcts1.load_tree(TREE_FILE)
+    n1p = MctsPlayer(mcts1)  # re-roots its tree on both players' moves
+
+    if HUMAN_VS_CPU:
+        player2 = hp
+    else:
+        n2 = NNet(g)
+        n2.load_checkpoint(FOLDER, "8x8_100checkpoints_best.pth.tar")
+        args2 = MctsArgs(
+            num_mcts_sims=50, c_puct=1.0, reuse_root_visits=True, early_stop=True
+        )
+        mcts2 = MCTS(g, n2, args2)
+        n2p = MctsPlayer(mcts2)
+
+        player2 = n2p  # Player 2 is neural network if it's cpu vs cpu.
+
+    arena = Arena(n1p, player2, g, display=OthelloGame.display)
+
+    print(arena.play_games(2, verbose=True))
@@ -1,3 +1,4 @@
+import sys
 import warnings
 from collections.abc import Callable
 from typing import Any, TypeVar
@@ -19,3 +20,10 @@ def deprecated(func: F) -> F:
         return func(*args, **kwargs)
 
     return wrapper  # type: ignore
+
+
+def is_gil_enabled() -> bool:
+    """
+    See https://docs.python.org/3.13/library/sys.html#sys._is_gil_enabled
+    """
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
@@ -0,0 +1,192 @@
+import logging
+import os
+from collections.abc import Sequence
+from typing import Any, overload
+
+from numpy import arange, asarray, float32, int64, lib, load, ndarray, random, save
+from numpy.typing import NDArray
+
+from alpha_zero_general import TrainingExample
+
+log = logging.getLogger(__name__)
+
+ARRAY_FILES = "boards.npy", "policies.npy", "values.npy"
+STATE_FILE = "iterations.npy"  # max_iterations, head, then each iteration's size
+
+
+class ReplayBuffer(Sequence[TrainingExample[Any, Any]]):
+    """
+    The training examples of the last max_iterations self-play iterations,
+    at most capacity of them, in preallocated memory-mapped arrays: a ring
+    whose oldest iteration is evicted whole when a new one does not fit.
+    Nothing but the examples sampled is read into RAM, and open maps an
+    existing buffer back in constant time.
+
+    The buffer lives in a folder: one .npy file per array (ARRAY_FILES,
+    capacity rows each) and STATE_FILE, which says where each iteration is.
+    The state is replaced atomically, after evictions and after the new
+    rows are flushed, so a buffer interrupted mid-update reopens as it was
+    before or after it.
+
+    It is a Sequence of TrainingExample in insertion order, and it is what
+    Coach passes to NeuralNetInterface.train: networks train on batches of
+    sample, which draws random rows with one fancy index per array, rather
+    than iterating over it all.
+    """
+
+    folder: str
+    capacity: int  # rows of the arrays
+    max_iterations: int
+    boards: NDArray[Any]  # (capacity, *board shape)
+    policies: NDArray[float32]  # (capacity, action size)
+    values: NDArray[float32]  # (capacity,)
+    head: int  # row of the oldest example
+    iteration_sizes: list[int]  # examples of each iteration, oldest first
+
+    def __init__(
+        self,
+        folder: str,
+        arrays: tuple[NDArray[Any], NDArray[float32], NDArray[float32]],
+        max_iterations: int,
+        head: int,
+        iteration_sizes: list[int],
+    ) -> None:
+        """
+        Use create or open.
+        """
+        self.folder = folder
+        self.boards, self.policies, self.values = arrays
+        self.capacity = len(self.values)
+        self.max_iterations = max_iterations
+        self.head = head
+        self.iteration_sizes = iteration_sizes
+
+    @classmethod
+    def create(
+        cls,
+        folder: str,
+        capacity: int,
+        max_iterations: int,
+        example: TrainingExample[Any, Any],
+    ) -> "ReplayBuffer":
+        """
+        Returns:
+            buffer: an empty buffer in folder, replacing any buffer there, for
+                examples with the board and policy shapes of example
+        """
+        if capacity < 1 or max_iterations < 1:
+            raise ValueError("capacity and max_iterations must be positive")
+        os.makedirs(folder, exist_ok=True)
+        board = asarray(example.board)
+        rows = [
+            (board.shape, board.dtype),
+            (asarray(example.policy).shape, float32),
+            ((), float32),
+        ]
+        arrays = tuple(
+            lib.format.open_memmap(
+                os.path.join(folder, name), "w+", dtype, (capacity, *shape)
+            )
+            for name, (shape, dtype) in zip(ARRAY_FILES, rows)
+        )
+        buffer = cls(folder, arrays, max_iterations, 0, [])  # type: ignore[arg-type]
+        buffer._write_state()
+        return buffer
+
+    @classmethod
+    def open(cls, folder: str) -> "ReplayBuffer":
+        """
+        Returns:
+            buffer: the buffer in folder, mapped read-write
+        """
+        state = load(os.path.join(folder, STATE_FILE)).tolist()
+        arrays = tuple(
+            lib.format.open_memmap(os.path.join(folder, name), "r+")
+            for name in ARRAY_FILES
+        )
+        return cls(folder, arrays, state[0], state[1], state[2:])  # type: ignore
+
+    @staticmethod
+    def exists(folder: str) -> bool:
+        return os.path.isfile(os.path.join(folder, STATE_FILE))
+
+    def __len__(self) -> int:
+        return sum(self.iteration_sizes)
+
+    @overload
+    def __getitem__(self, i: int) -> TrainingExample[Any, Any]: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[TrainingExample[Any, Any]]: ...
+
+    def __getitem__(
+        self, i: int | slice
+    ) -> TrainingExample[Any, Any] | list[TrainingExample[Any, Any]]:
+        """
+        Returns:
+            example: the ith oldest example, its board and policy views of
+                the mapped arrays
+        """
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        size = len(self)
+        if not -size <= i < size:
+            raise IndexError(f"example {i} of a buffer of {size}")
+        row = (self.head + i % size) % self.capacity
+        return TrainingExample(
+            self.boards[row], self.policies[row], float(self.values[row])
+        )
+
+    def sample(
+        self, batch_size: int, rng: random.Generator | None = None
+    ) -> tuple[NDArray[Any], NDArray[float32], NDArray[float32]]:
+        """
+        Returns:
+            boards, policies, values: batch_size examples drawn uniformly
+                with replacement, as arrays with a leading batch dimension
+        """
+        size = len(self)
+        if not size:
+            raise ValueError("cannot sample an empty replay buffer")
+        draws = (rng or random.default_rng()).integers(size, size=batch_size)
+        rows = (self.head + draws) % self.capacity
+        return self.boards[rows], self.policies[rows], self.values[rows]
+
+    def add_iteration(self, examples: Sequence[TrainingExample[Any, Any]]) -> None:
+        """
+        Append the examples of a self-play iteration, first evicting the
+        oldest iterations till it fits in capacity and max_iterations.
+        """
+        if len(examples) > self.capacity:
+            log.warning(f"Keeping the last {self.capacity} of {len(examples)} examples")
+            examples = examples[len(examples) - self.capacity :]
+        evicted = False
+        while self.iteration_sizes and (
+            len(self.iteration_sizes) >= self.max_iterations
+            or len(self) + len(examples) > self.capacity
+        ):
+            size = self.iteration_sizes.pop(0)
+            self.head = (self.head + size) % self.capacity
+            evicted = True
+        if evicted:  # before its rows get overwritten
+            self._write_state()
+        if not examples:
+            return
+
+        rows = (self.head + len(self) + arange(len(examples))) % self.capacity
+        self.boards[rows] = asarray([e.board for e in examples])
+        self.policies[rows] = asarray([e.policy for e in examples])
+        self.values[rows] = asarray([e.evaluation for e in examples])
+        for array in self.boards, self.policies, self.values:
+            array.flush()  # type: ignore[attr-defined] # a memmap
+        self.iteration_sizes.append(len(examples))
+        self._write_state()
+
+    def _write_state(self) -> None:
+        path = os.path.join(self.folder, STATE_FILE)
+        state: ndarray[Any, Any] = asarray(
+            [self.max_iterations, self.head, *self.iteration_sizes], int64
+        )
+        with open(f"{path}.tmp", "wb") as f:
+            save(f, state)
+        os.replace(f"{path}.tmp", path)
@@ -2,7 +2,8 @@ import os
 
 import numpy as np
 
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import NeuralNetInterface, replay_batches
+from alpha_zero_general.replay_buffer import ReplayBuffer
 from alpha_zero_general.rts.keras.rtsn_net import RTSNNet
 from alpha_zero_general.rts.src.config import VERBOSE_MODEL_FIT
 
@@ -41,6 +42,17 @@ class NNetWrapper(NeuralNetInterface):
         """
         from alpha_zero_general.rts.src.config_class import CONFIG
 
+        if isinstance(examples, ReplayBuffer):
+            # sampled batch by batch, the buffer stays on disk
+            batch_size = CONFIG.nnet_args.batch_size
+            self.nn.model.fit(
+                replay_batches(examples, batch_size, self.encoder.encode_multiple),
+                steps_per_epoch=max(1, len(examples) // batch_size),
+                epochs=CONFIG.nnet_args.epochs,
+                verbose=VERBOSE_MODEL_FIT,
+            )
+            return
+
         input_boards, target_pis, target_vs = list(zip(*examples))
         input_boards = np.asarray(input_boards)
         target_pis = np.asarray(target_pis)
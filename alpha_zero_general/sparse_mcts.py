@@ -0,0 +1,178 @@
+import math
+
+from numpy import (
+    asarray,
+    bool_,
+    flatnonzero,
+    float32,
+    float64,
+    inf,
+    int32,
+    int_,
+    zeros,
+)
+from numpy.typing import NDArray
+
+from alpha_zero_general import (
+    GenericBooleanBoardTensor,
+    GenericPolicyTensor,
+    MctsArgs,
+)
+from alpha_zero_general.game import BoardTensor, BooleanBoard, GenericGame, PolicyTensor
+from alpha_zero_general.mcts import MCTS, NODE_OVERHEAD_BYTES
+from alpha_zero_general.neural_net import Predictor
+from alpha_zero_general.tree_file import NodeRecord
+
+
+class SparseNode:
+    """
+    Statistics of one expanded node, one array entry per valid action only.
+    """
+
+    __slots__ = ("visits", "actions", "n", "q", "p", "puct_prior")
+
+    visits: int  # N(s,*)
+    actions: NDArray[int32]  # the valid actions, ascending
+    n: NDArray[int32]  # N(s,a) of each of them
+    q: NDArray[float32]  # Q(s,a), 0 for unvisited edges
+    p: NDArray[float32]  # P(s,a), masked prior from nn
+    puct_prior: NDArray[float32]  # c_puct * P(s,a), -inf for excluded actions
+
+    def __init__(
+        self,
+        policy: GenericPolicyTensor,
+        valid_move: GenericBooleanBoardTensor,
+        c_puct: float,
+    ) -> None:
+        self.visits = 0
+        self.actions = flatnonzero(valid_move).astype(int32)
+        self.n = zeros(len(self.actions), dtype=int32)
+        self.q = zeros(len(self.actions), dtype=float32)
+        self.p = asarray(policy)[self.actions].astype(float32)
+        self.puct_prior = (c_puct * self.p).astype(float32)
+
+    def index(self, action: int) -> int:
+        """
+        Returns:
+            i: the entry of the valid action
+        """
+        return int(self.actions.searchsorted(action))
+
+
+class SparseMCTS(MCTS[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Drop-in MCTS whose nodes only store the valid actions, with their N, Q
+    and P as compact arrays, like ArrayMCTS. Node memory and selection cost
+    grow with the number of valid moves instead of the action space, which
+    pays off when the action space dwarfs them (Tafl has n**4 actions, RTS
+    n*n*NUM_ACTS+1).
+
+    Dense vectors are only built for what leaves the tree: the root visit
+    counts behind get_action_probabilities, and the Gumbel root search.
+    """
+
+    nodes: dict[int, SparseNode]  # board_hash -> node statistics
+
+    def __init__(
+        self,
+        game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor],
+        nn: Predictor,
+        args: MctsArgs,
+    ) -> None:
+        super().__init__(game, nn, args)
+        self.nodes = {}
+
+    def _is_expanded(self, h: int) -> bool:
+        return h in self.nodes
+
+    def _expand(
+        self, h: int, policy: GenericPolicyTensor, valid_move: GenericBooleanBoardTensor
+    ) -> None:
+        self.nodes[h] = SparseNode(policy, valid_move, self.args.c_puct)
+
+    def _select_action(self, h: int) -> int:
+        node = self.nodes[h]
+        candidates = self._candidates(h)
+        if candidates is not None:
+            entries = node.actions.searchsorted(candidates)
+            if node.visits == 0:
+                return int(candidates[node.puct_prior[entries].argmax()])
+            u = node.q[entries] + node.puct_prior[entries] * (
+                math.sqrt(node.visits) / (1 + node.n[entries])
+            )
+            return int(candidates[u.argmax()])
+        if node.visits == 0:
+            return int(node.actions[node.puct_prior.argmax()])
+        u = node.q + node.puct_prior * (math.sqrt(node.visits) / (1 + node.n))
+        return int(node.actions[u.argmax()])
+
+    def _update_edge(self, h: int, action: int, v: float) -> None:
+        node = self.nodes[h]
+        i = node.index(action)
+        node.n[i] += 1
+        node.q[i] += (v - node.q[i]) / node.n[i]
+        node.visits += 1
+
+    def _add_virtual_loss(self, h: int, action: int, loss: int) -> None:
+        node = self.nodes[h]
+        i = node.index(action)
+        n = node.n[i]
+        node.n[i] = n + loss
+        node.q[i] = (n * node.q[i] - loss) / (n + loss) if n + loss else 0
+        node.visits += loss
+
+    def _exclude_action(self, h: int, action: int) -> None:
+        node = self.nodes[h]
+        node.puct_prior[node.index(action)] = -inf
+
+    def _has_selectable_action(self, h: int) -> bool:
+        return bool((self.nodes[h].puct_prior > -inf).any())
+
+    def _node_visits(self, h: int) -> int:
+        return self.nodes[h].visits if h in self.nodes else 0
+
+    def _prune(self, keep: set[int]) -> None:
+        super()._prune(keep)
+        self.nodes = {h: node for h, node in self.nodes.items() if h in keep}
+
+    def _evict(self, h: int) -> None:
+        super()._evict(h)
+        self.nodes.pop(h, None)
+
+    def _node_bytes(self, h: int) -> int:
+        node = self.nodes[h]
+        arrays = node.actions, node.n, node.q, node.p, node.puct_prior
+        return (
+            asarray(self.board_cache[h]).nbytes
+            + sum(a.nbytes for a in arrays)
+            + NODE_OVERHEAD_BYTES
+        )
+
+    def _node_record(self, h: int) -> NodeRecord:
+        node = self.nodes[h]
+        return NodeRecord(node.visits, node.actions, node.n, node.q, node.p)
+
+    def _restore_node(self, h: int, record: NodeRecord) -> None:
+        policy = zeros(self.game.get_action_size(), dtype=float32)
+        policy[record.actions] = record.p
+        valid_move = zeros(self.game.get_action_size(), dtype=bool_)
+        valid_move[record.actions] = True
+        node = SparseNode(policy, valid_move, self.args.c_puct)
+        node.n[:] = record.n
+        node.q[:] = record.q
+        node.visits = record.visits
+        self.nodes[h] = node
+
+    def _priors_and_values(self, h: int) -> tuple[NDArray[float64], NDArray[float64]]:
+        node = self.nodes[h]
+        prior = zeros(self.game.get_action_size())
+        q = zeros(self.game.get_action_size())
+        prior[node.actions] = node.p
+        q[node.actions] = node.q
+        return prior, q
+
+    def _visit_counts(self, h: int) -> NDArray[int_]:
+        counts = zeros(self.game.get_action_size(), dtype=int_)
+        if h in self.nodes:
+            counts[self.nodes[h].actions] = self.nodes[h].n
+        return counts
@@ -6,7 +6,8 @@ import numpy as np
 
 sys.path.append("../..")
 
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import NeuralNetInterface, replay_batches
+from alpha_zero_general.replay_buffer import ReplayBuffer
 from alpha_zero_general.tafl import (
     TaflBoardTensor,
     TaflBooleanBoardTensor,
@@ -37,6 +38,15 @@ class NNetWrapper(
         """
         examples: list of examples, each example is of form (board, pi, v)
         """
+        if isinstance(examples, ReplayBuffer):
+            # sampled batch by batch, the buffer stays on disk
+            self.nn.model.fit(
+                replay_batches(examples, args.batch_size),
+                steps_per_epoch=max(1, len(examples) // args.batch_size),
+                epochs=args.epochs,
+            )
+            return
+
         input_boards, target_pis, target_vs = list(zip(*examples))
         input_boards = np.asarray(input_boards)
         target_pis = np.asarray(target_pis)
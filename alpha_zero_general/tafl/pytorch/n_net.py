@@ -9,7 +9,7 @@ sys.path.append("../../")
 import torch
 import torch.optim as optim
 
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import NeuralNetInterface, sample_examples
 from alpha_zero_general.tafl.pytorch.tafl_n_net import TaflNN
 from alpha_zero_general.utils import AverageMeter, DotDict
 
@@ -50,8 +50,7 @@ class NNetWrapper(NeuralNetInterface):
 
             t = tqdm(range(batch_count), desc="Training Net")
             for _ in t:
-                sample_ids = np.random.randint(len(examples), size=args.batch_size)
-                boards, pis, vs = list(zip(*[examples[i] for i in sample_ids]))
+                boards, pis, vs = sample_examples(examples, args.batch_size)
                 boards = torch.FloatTensor(np.array(boards).astype(np.float64))
                 target_pis = torch.FloatTensor(np.array(pis))
                 target_vs = torch.FloatTensor(np.array(vs).astype(np.float64))
@@ -14,6 +14,7 @@ from alpha_zero_general.game import GenericGame
 from alpha_zero_general.tafl import (
     TaflBoardTensor,
     TaflBooleanBoardTensor,
+    TaflPiece,
     TaflPolicyTensor,
 )
 from alpha_zero_general.tafl.digits import int2base
@@ -26,16 +27,22 @@ from alpha_zero_general.tafl.game_variants import (
     Tawlbwrdd,
 )
 from alpha_zero_general.tafl.tafl_logic import TaflBoard
+from alpha_zero_general.zobrist import ZobristHash
+
+TIME_KEYS = 64  # plies told apart by the hash, games end after 51
 
 
 class TaflGame(GenericGame[TaflBoardTensor, TaflBooleanBoardTensor, TaflPolicyTensor]):
     name: str
     n: int  # board size
     board: TaflBoard
+    zobrist: ZobristHash  # cells of the board, then one per ply for the time
 
     def __init__(self, name: str = "Brandubh") -> None:
         self.name = name
         self.get_init_board()
+        # white and king pieces, black ones are negated
+        self.zobrist = ZobristHash(self.n * self.n + TIME_KEYS, num_pieces=2)
 
     def get_init_board(self) -> TaflBoard:
         # #TODO: add enum for game variants
@@ -74,6 +81,17 @@ class TaflGame(GenericGame[TaflBoardTensor, TaflBooleanBoardTensor, TaflPolicyTe
         b.execute_move(move, player)
         return (b, -player)
 
+    def get_next_canonical_state(
+        self, canonical_board: TaflBoard, board_hash: int, action: int
+    ) -> tuple[TaflBoard, int]:
+        next_board, _ = self.get_next_state(canonical_board, 1, action)
+        # the moved piece and the captured ones, the canonical form is the board
+        for piece, next_piece in zip(canonical_board.pieces, next_board.pieces):
+            if piece != next_piece:
+                board_hash ^= self._piece_key(piece) ^ self._piece_key(next_piece)
+        board_hash ^= self._time_key(canonical_board.time)
+        return next_board, board_hash ^ self._time_key(next_board.time)
+
     def get_valid_moves(self, board: TaflBoard, player: int) -> TaflBoardTensor:
         # return a fixed size binary vector
         # Note: Ignoreing the passed in player variable since we are not inverting colors for get_canonical_form and Arena calls with constant 1.
@@ -88,8 +106,10 @@ class TaflGame(GenericGame[TaflBoardTensor, TaflBooleanBoardTensor, TaflPolicyTe
         return np.array(valid_moves)
 
     def get_game_ended(self, board: TaflBoard, player: int) -> int:
-        # return 0 if not ended, if player 1 won, -1 if player 1 lost
-        return board.done * player
+        # return 0 if not ended, 1 if the player to move won, -1 if they lost
+        # Note: like get_valid_moves, the player comes from the board, since the
+        # canonical form does not invert colors and MCTS calls with constant 1.
+        return board.done * board.get_player_to_move()
 
     def get_canonical_form(self, board: TaflBoard, player: int) -> TaflBoard:
         b = board.get_copy()
@@ -122,9 +142,18 @@ class TaflGame(GenericGame[TaflBoardTensor, TaflBooleanBoardTensor, TaflPolicyTe
         return str(board)
 
     def get_board_hash(self, board: TaflBoard) -> int:
-        # #TODO: check the type of board here!
-        # return hash(board.tobytes())
-        return hash(board)
+        h = self._time_key(board.time)
+        for piece in board.pieces:
+            h ^= self._piece_key(piece)
+        return h
+
+    def _piece_key(self, piece: TaflPiece) -> int:
+        if piece.x < 0:  # captured
+            return 0
+        return self.zobrist.key(piece.y * self.n + piece.x, piece.type)
+
+    def _time_key(self, time: int) -> int:
+        return self.zobrist.key(self.n * self.n + time % TIME_KEYS, 1)
 
     def get_score(self, board: TaflBoard, player: int) -> int:
         if board.done:
@@ -13,7 +13,8 @@ from typing import cast
 
 import numpy as np
 
-from alpha_zero_general.neural_net import NeuralNetInterface
+from alpha_zero_general.neural_net import NeuralNetInterface, replay_batches
+from alpha_zero_general.replay_buffer import ReplayBuffer
 from alpha_zero_general.tic_tac_toe import (
     TicTacToeBoardTensor,
     TicTacToeBooleanBoardTensor,
@@ -48,6 +49,15 @@ class NNetWrapper(
         """
         examples: list of examples, each example is of form (board, pi, v)
         """
+        if isinstance(examples, ReplayBuffer):
+            # sampled batch by batch, the buffer stays on disk
+            self.nn.model.fit(
+                replay_batches(examples, args.batch_size),
+                steps_per_epoch=max(1, len(examples) // args.batch_size),
+                epochs=args.epochs,
+            )
+            return
+
         input_boards, target_pis, target_vs = cast(
             tuple[list[TicTacToeBoardTensor], list[TicTacToePolicyTensor], list[float]],
             list(zip(*examples)),  # pyright: ignore = pyright problem
@@ -80,6 +90,15 @@ class NNetWrapper(
         # print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return pi[0], v[0]
 
+    def predict_batch(
+        self, boards: list[TicTacToeBoardTensor]
+    ) -> tuple[TicTacToePolicyTensor, np.ndarray]:
+        """
+        boards: list of np arrays with boards, evaluated in one forward pass
+        """
+        pi, v = self.nn.model.predict(np.asarray(boards), verbose=0)
+        return pi, v.reshape(len(boards))
+
     def save_checkpoint(
         self, folder: str = "checkpoint", filename: str = "checkpoint.pth.tar"
     ) -> None:
@@ -10,6 +10,7 @@ from alpha_zero_general.tic_tac_toe import (
     TicTacToePolicyTensor,
 )
 from alpha_zero_general.tic_tac_toe.tic_tac_toe_logic import TicTacToeBoard
+from alpha_zero_general.zobrist import ZobristHash, flip
 
 """
 Game class implementation for the game of TicTacToe.
@@ -29,6 +30,7 @@ class TicTacToeGame(
 ):
     def __init__(self, n: int = 3) -> None:
         self.n = n
+        self.zobrist = ZobristHash(n * n)
 
     def get_init_board(self):
         # return initial board (numpy board)
@@ -56,6 +58,14 @@ class TicTacToeGame(
         b.execute_move(move, player)
         return (b.pieces, -player)
 
+    def get_next_canonical_state(
+        self, canonical_board: TicTacToeBoardTensor, board_hash: int, action: int
+    ) -> tuple[TicTacToeBoardTensor, int]:
+        next_board, next_player = self.get_next_state(canonical_board, 1, action)
+        if action != self.n * self.n:  # the piece placed on cell action
+            board_hash ^= self.zobrist.key(action, 1)
+        return self.get_canonical_form(next_board, next_player), flip(board_hash)
+
     def get_valid_moves(self, board: TicTacToeBoardTensor, player: int):
         # return a fixed size binary vector
         valids = [0] * self.get_action_size()
@@ -113,7 +123,7 @@ class TicTacToeGame(
         return np.array2string(board)
 
     def get_board_hash(self, board: TicTacToeBoardTensor) -> int:
-        return hash(board.tobytes())
+        return self.zobrist.board_hash(board)
 
     @staticmethod
     def display(board: TicTacToeBoardTensor):
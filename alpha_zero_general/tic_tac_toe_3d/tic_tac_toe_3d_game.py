@@ -11,6 +11,7 @@ from alpha_zero_general.tic_tac_toe_3d import (
     TicTacToe3DPolicyTensor,
 )
 from alpha_zero_general.tic_tac_toe_3d.tic_tac_toe_3d_logic import Board
+from alpha_zero_general.zobrist import ZobristHash, flip
 
 """
 Game class implementation for the game of 3D TicTacToe or Qubic.
@@ -29,6 +30,7 @@ class TicTacToe3DGame(
 ):
     def __init__(self, n: int = 4):
         self.n = n
+        self.zobrist = ZobristHash(n * n * n)
 
     def get_init_board(self) -> TicTacToe3DBoardTensor:
         # return initial board (numpy board)
@@ -58,6 +60,14 @@ class TicTacToe3DGame(
         b.execute_move(move, player)
         return (b.pieces, -player)
 
+    def get_next_canonical_state(
+        self, canonical_board: TicTacToe3DBoardTensor, board_hash: int, action: int
+    ) -> tuple[TicTacToe3DBoardTensor, int]:
+        next_board, next_player = self.get_next_state(canonical_board, 1, action)
+        if action != self.n * self.n * self.n:  # the piece placed on cell action
+            board_hash ^= self.zobrist.key(action, 1)
+        return self.get_canonical_form(next_board, next_player), flip(board_hash)
+
     def get_valid_moves(self, board: TicTacToe3DBoardTensor, player: int):
         # return a fixed size binary vector
         valids = [0] * self.get_action_size()
@@ -122,7 +132,7 @@ class TicTacToe3DGame(
         return np.array2string(board)
 
     def get_board_hash(self, board: GenericBoardTensor) -> int:
-        return hash(board.tobytes())
+        return self.zobrist.board_hash(board)
 
     @staticmethod
     def display(board: TicTacToe3DBoardTensor) -> None:
@@ -0,0 +1,227 @@
+import os
+from typing import NamedTuple
+
+from numpy import (
+    arange,
+    argsort,
+    array,
+    concatenate,
+    cumsum,
+    float32,
+    int32,
+    int64,
+    isin,
+    lib,
+    memmap,
+    repeat,
+    uint64,
+    zeros,
+)
+from numpy.typing import NDArray
+
+from alpha_zero_general.zobrist import MASK64
+
+TREE_FILE_VERSION = 1
+
+
+class NodeRecord(NamedTuple):
+    visits: int  # N(s,*)
+    actions: NDArray[int32]  # the valid actions, ascending
+    n: NDArray[int32]  # N(s,a) of each of them
+    q: NDArray[float32]  # Q(s,a), 0 for unvisited edges
+    p: NDArray[float32]  # P(s,a)
+
+
+class TreeFile(NamedTuple):
+    """
+    The expanded nodes of an MCTS tree as flat arrays, sorted by board hash,
+    with the statistics of node i's valid actions in the edge arrays at
+    edge_offsets[i]:edge_offsets[i + 1] and its explored edges in the child
+    arrays at child_offsets[i]:child_offsets[i + 1].
+
+    write stores the arrays one after the other as .npy arrays in one file,
+    and open memory-maps them back, so opening costs the same for any tree
+    size. Boards are not stored: a descent recomputes them from its root.
+    """
+
+    header: NDArray[uint64]  # TREE_FILE_VERSION, action size, init board hash
+    hashes: NDArray[uint64]  # ascending
+    visits: NDArray[int64]
+    edge_offsets: NDArray[int64]
+    actions: NDArray[int32]
+    n: NDArray[int32]
+    q: NDArray[float32]
+    p: NDArray[float32]
+    child_offsets: NDArray[int64]
+    child_actions: NDArray[int32]
+    child_hashes: NDArray[uint64]
+
+    @staticmethod
+    def make_header(action_size: int, init_hash: int) -> NDArray[uint64]:
+        """
+        Returns:
+            header: the header of the trees of a game whose initial board
+                hashes to init_hash, which tells games apart, and processes
+                whose hash() is salted differently
+        """
+        return array([TREE_FILE_VERSION, action_size, init_hash & MASK64], uint64)
+
+    @classmethod
+    def build(
+        cls,
+        header: NDArray[uint64],
+        hashes: list[int],
+        records: list[NodeRecord],
+        children: list[dict[int, int]],
+    ) -> "TreeFile":
+        """
+        Returns:
+            tree: the nodes hashes, with their records and explored edges
+                {action: child hash}
+        """
+        child_hashes = [child for edges in children for child in edges.values()]
+        if any(not 0 <= h <= MASK64 for h in [*hashes, *child_hashes]):
+            raise ValueError("saved trees need 64-bit board hashes, see zobrist.py")
+        tree = cls(
+            header=header,
+            hashes=array(hashes, uint64),
+            visits=array([r.visits for r in records], int64),
+            edge_offsets=_offsets([len(r.actions) for r in records]),
+            actions=concatenate([zeros(0, int32), *(r.actions for r in records)]),
+            n=concatenate([zeros(0, int32), *(r.n for r in records)]),
+            q=concatenate([zeros(0, float32), *(r.q for r in records)]),
+            p=concatenate([zeros(0, float32), *(r.p for r in records)]),
+            child_offsets=_offsets([len(edges) for edges in children]),
+            child_actions=array([a for edges in children for a in edges], int32),
+            child_hashes=array(child_hashes, uint64),
+        )
+        return tree.select(argsort(tree.hashes, kind="stable"))
+
+    def select(self, rows: NDArray[int64]) -> "TreeFile":
+        """
+        Returns:
+            tree: the nodes rows of this tree, in that order
+        """
+        edge_offsets, edges = _gather(self.edge_offsets, rows)
+        child_offsets, child_edges = _gather(self.child_offsets, rows)
+        return TreeFile(
+            header=self.header,
+            hashes=self.hashes[rows],
+            visits=self.visits[rows],
+            edge_offsets=edge_offsets,
+            actions=self.actions[edges],
+            n=self.n[edges],
+            q=self.q[edges],
+            p=self.p[edges],
+            child_offsets=child_offsets,
+            child_actions=self.child_actions[child_edges],
+            child_hashes=self.child_hashes[child_edges],
+        )
+
+    def merge(self, base: "TreeFile") -> "TreeFile":
+        """
+        Returns:
+            tree: the nodes of this tree, and those of base it does not hold
+        """
+        added = base.select(isin(base.hashes, self.hashes, invert=True).nonzero()[0])
+        fields = {}
+        for name in self._fields[1:]:
+            first, second = getattr(self, name), getattr(added, name)
+            if name.endswith("offsets"):
+                fields[name] = concatenate([first, second[1:] + first[-1]])
+            else:
+                fields[name] = concatenate([first, second])
+        tree = TreeFile(header=self.header, **fields)
+        return tree.select(argsort(tree.hashes, kind="stable"))
+
+    def write(self, path: str) -> None:
+        """
+        Write the tree to path, through a temporary file so that a process
+        mapping the old file keeps reading it whole.
+        """
+        with open(f"{path}.tmp", "wb") as f:
+            for field in self:
+                lib.format.write_array(f, field, allow_pickle=False)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def open(cls, path: str) -> "TreeFile":
+        """
+        Returns:
+            tree: the tree written to path, its arrays read-only memory maps
+        """
+        fields = []
+        with open(path, "rb") as f:
+            for _ in cls._fields:
+                major, _ = lib.format.read_magic(f)
+                read_header = (
+                    lib.format.read_array_header_1_0
+                    if major == 1
+                    else lib.format.read_array_header_2_0
+                )
+                shape, _, dtype = read_header(f)
+                offset = f.tell()
+                size = dtype.itemsize * int(array(shape).prod())
+                if size:  # an empty array cannot be mapped
+                    fields.append(memmap(path, dtype, "r", offset, shape))
+                else:
+                    fields.append(zeros(shape, dtype))
+                f.seek(offset + size)
+        return cls(*fields)
+
+    def find(self, h: int) -> int | None:
+        """
+        Returns:
+            i: the index of the node of hash h, None if the tree lacks it
+        """
+        if not 0 <= h <= MASK64:
+            return None
+        i = int(self.hashes.searchsorted(uint64(h)))
+        if i < len(self.hashes) and int(self.hashes[i]) == h:
+            return i
+        return None
+
+    def record(self, i: int) -> NodeRecord:
+        """
+        Returns:
+            record: a copy of the statistics of node i
+        """
+        edges = slice(self.edge_offsets[i], self.edge_offsets[i + 1])
+        return NodeRecord(
+            visits=int(self.visits[i]),
+            actions=array(self.actions[edges]),
+            n=array(self.n[edges]),
+            q=array(self.q[edges]),
+            p=array(self.p[edges]),
+        )
+
+    def edges(self, i: int) -> dict[int, int]:
+        """
+        Returns:
+            edges: the explored edges of node i, {action: child hash}
+        """
+        edges = slice(self.child_offsets[i], self.child_offsets[i + 1])
+        return dict(
+            zip(self.child_actions[edges].tolist(), self.child_hashes[edges].tolist())
+        )
+
+
+def _offsets(counts: list[int] | NDArray[int64]) -> NDArray[int64]:
+    offsets = zeros(len(counts) + 1, int64)
+    cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def _gather(
+    offsets: NDArray[int64], rows: NDArray[int64]
+) -> tuple[NDArray[int64], NDArray[int64]]:
+    """
+    Returns:
+        offsets: the offsets of the entries of rows, packed in their order
+        entries: the indices of those entries in the unpacked arrays
+    """
+    starts = offsets[:-1][rows]
+    counts = offsets[1:][rows] - starts
+    packed = _offsets(counts)
+    entries = repeat(starts - packed[:-1], counts) + arange(packed[-1])
+    return packed, entries
@@ -0,0 +1,206 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from numpy import asarray
+
+from alpha_zero_general import (
+    GenericBooleanBoardTensor,
+    GenericPolicyTensor,
+    MctsArgs,
+)
+from alpha_zero_general.array_mcts import ArrayMCTS
+from alpha_zero_general.game import BoardTensor, BooleanBoard, GenericGame, PolicyTensor
+from alpha_zero_general.mcts import PATH_CAPACITY, SearchSteps
+from alpha_zero_general.neural_net import Predictor
+from alpha_zero_general.py313_backport import is_gil_enabled
+
+log = logging.getLogger(__name__)
+
+LOCK_STRIPES = 64  # node locks, a node takes the one of board_hash % LOCK_STRIPES
+PARALLEL_ROUND = 8  # simulations per thread between two checks of the stop rules
+
+
+class _SearchPath(threading.local):
+    """
+    Search path buffers of one thread, see MCTS._path_hashes.
+    """
+
+    def __init__(self) -> None:
+        self.hashes = [0] * PATH_CAPACITY
+        self.actions = [0] * PATH_CAPACITY
+
+
+class TreeParallelMCTS(ArrayMCTS[BoardTensor, BooleanBoard, PolicyTensor]):
+    """
+    Tree parallelization: args.num_threads threads run simulations on one
+    shared tree. Each descent adds args.virtual_loss to the edges it walks,
+    which steers concurrent descents to different leaves, and backs it out
+    with its update. Everything the tree holds about a node (N, Q, virtual
+    loss, widening order, children, cached board and game value) is read and
+    written under one of LOCK_STRIPES reentrant locks, picked by the node's
+    hash; the path buffers are thread local.
+
+    Threads only scale on a free-threaded build (Python 3.13t with the GIL
+    off). With the GIL enabled the search runs on a single thread, as
+    ArrayMCTS would, and a warning is logged.
+
+    The network is called from every thread, so its predict must be thread
+    safe. The root is expanded before the threads start, and the Gumbel root
+    search runs on the calling thread. Table budgets and the solver mutate
+    the tree outside of a single node, so they are not supported. Call close
+    (or use it as a context manager) to stop the threads.
+    """
+
+    num_threads: int  # threads searching, 1 when the GIL is enabled
+    _locks: list[threading.RLock]
+    _local: _SearchPath
+    _executor: ThreadPoolExecutor | None
+
+    def __init__(
+        self,
+        game: GenericGame[BoardTensor, BooleanBoard, PolicyTensor],
+        nn: Predictor,
+        args: MctsArgs,
+    ) -> None:
+        if args.num_threads < 1:
+            raise ValueError(f"num_threads must be positive, got {args.num_threads}")
+        if args.max_nodes is not None or args.max_bytes is not None:
+            raise ValueError("tree parallel search does not support table budgets")
+        if args.solver:
+            raise ValueError("tree parallel search does not support the solver")
+        if args.leaf_batch_size > 1:
+            raise ValueError("tree parallel search needs leaf_batch_size 1")
+        self._local = _SearchPath()  # before MCTS.__init__ sets the path buffers
+        super().__init__(game, nn, args)
+        self.num_threads = args.num_threads
+        if self.num_threads > 1 and is_gil_enabled():
+            log.warning("the GIL is enabled, searching on a single thread")
+            self.num_threads = 1
+        self._locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._executor = None
+
+    @property  # type: ignore[override]
+    def _path_hashes(self) -> list[int]:
+        return self._local.hashes
+
+    @_path_hashes.setter
+    def _path_hashes(self, hashes: list[int]) -> None:
+        self._local.hashes = hashes
+
+    @property  # type: ignore[override]
+    def _path_actions(self) -> list[int]:
+        return self._local.actions
+
+    @_path_actions.setter
+    def _path_actions(self, actions: list[int]) -> None:
+        self._local.actions = actions
+
+    def _lock(self, h: int) -> threading.RLock:
+        return self._locks[h % LOCK_STRIPES]
+
+    def _search_round_steps(
+        self, canonical_board: BoardTensor, remaining: int
+    ) -> SearchSteps[int]:
+        """
+        Split up to num_threads * PARALLEL_ROUND simulations between the
+        threads, and wait for all of them. The threads call the network
+        themselves, nothing is yielded.
+        """
+        root_expanded = self.root_hash is not None and self._is_expanded(self.root_hash)
+        if self.num_threads == 1 or not root_expanded:
+            return (yield from super()._search_round_steps(canonical_board, remaining))
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.num_threads)
+        round_size = min(remaining, self.num_threads * PARALLEL_ROUND)
+        share, extra = divmod(round_size, self.num_threads)
+        counts = [share + (i < extra) for i in range(self.num_threads)]
+        futures = [
+            self._executor.submit(self._simulate, canonical_board, count)
+            for count in counts
+            if count
+        ]
+        for future in futures:
+            future.result()
+        return round_size
+
+    def _simulate(self, canonical_board: BoardTensor, count: int) -> None:
+        """
+        Thread body: run count simulations from canonical_board, like search
+        with the virtual loss of search_batch.
+        """
+        loss = self.args.virtual_loss
+        for _ in range(count):
+            depth, board, h = self._descend(canonical_board, loss)
+            solved_value = self._solved_value(h)
+            if solved_value is not None:  # terminal node
+                v = -solved_value
+            else:  # leaf node
+                policy, value = self.nn.predict(board)
+                valid_move = self.game.get_valid_moves(board, 1)
+                self._expand_leaf(h, policy, valid_move)
+                v = -float(asarray(value).item())
+            self._backup(self._path_hashes, self._path_actions, depth, v, loss)
+
+    # Node store primitives of ArrayMCTS and the caches of MCTS, under the
+    # lock of the node they write.
+
+    def _cached_hash(self, canonical_board: BoardTensor, h: int | None = None) -> int:
+        if h is None:
+            h = self.game.get_board_hash(canonical_board)
+        with self._lock(h):
+            return super()._cached_hash(canonical_board, h)
+
+    def _link_child(self, h: int, action: int, child: int) -> None:
+        with self._lock(h):
+            super()._link_child(h, action, child)
+
+    def _game_value(self, h: int, board: BoardTensor) -> float:
+        with self._lock(h):
+            return super()._game_value(h, board)
+
+    def _expand_leaf(
+        self, h: int, policy: GenericPolicyTensor, valid_move: GenericBooleanBoardTensor
+    ) -> None:
+        with self._lock(h):  # its widening order along with the node
+            if h not in self.nodes:
+                super()._expand_leaf(h, policy, valid_move)
+
+    def _exclude_solved(self, h: int, action: int) -> None:
+        with self._lock(h):
+            super()._exclude_solved(h, action)
+
+    def _expand(
+        self, h: int, policy: GenericPolicyTensor, valid_move: GenericBooleanBoardTensor
+    ) -> None:
+        with self._lock(h):
+            if h not in self.nodes:  # another thread may have reached it first
+                super()._expand(h, policy, valid_move)
+
+    def _fault_in(self, h: int) -> None:
+        with self._lock(h):
+            if h not in self.nodes:
+                super()._fault_in(h)
+
+    def _select_action(self, h: int) -> int:
+        with self._lock(h):
+            return super()._select_action(h)
+
+    def _update_edge(self, h: int, action: int, v: float) -> None:
+        with self._lock(h):
+            super()._update_edge(h, action, v)
+
+    def _add_virtual_loss(self, h: int, action: int, loss: int) -> None:
+        with self._lock(h):
+            super()._add_virtual_loss(h, action, loss)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "TreeParallelMCTS[BoardTensor, BooleanBoard, PolicyTensor]":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,79 @@
+from typing import Any
+
+from numpy import asarray, bitwise_xor, random, uint64
+from numpy.typing import NDArray
+
+ZOBRIST_SEED = 0x5EED  # fixed, so hashes agree across processes and runs
+MASK64 = (1 << 64) - 1
+
+
+def flip(h: int) -> int:
+    """
+    Returns:
+        h: the hash of the negated board (players swapped) of the board h
+    """
+    return ((h << 32) | (h >> 32)) & MASK64
+
+
+class ZobristHash:
+    """
+    Zobrist hashing (Zobrist, 1970): the 64-bit hash of a board is the XOR of
+    a random key per (cell, piece) it holds, so a move updates it by XORing
+    the keys of the cells it changes instead of hashing the whole board.
+
+    Cells hold 0 (empty), a piece p in 1..num_pieces, or its opponent's -p.
+    The key of -p is the key of p with its 32-bit halves swapped, so negating
+    a board, as get_canonical_form does for player -1, swaps the halves of
+    its hash (see flip).
+    """
+
+    num_cells: int
+    keys: list[list[int]]  # keys[cell][p - 1], the key of piece p on cell
+    _key_array: NDArray[uint64]  # the same keys, for hashing whole boards
+
+    def __init__(
+        self, num_cells: int, num_pieces: int = 1, seed: int = ZOBRIST_SEED
+    ) -> None:
+        self.num_cells = num_cells
+        rng = random.default_rng(seed)
+        self._key_array = rng.integers(
+            0, 1 << 64, size=(num_cells, num_pieces), dtype=uint64, endpoint=False
+        )
+        self.keys = [[int(k) for k in row] for row in self._key_array]
+
+    def key(self, cell: int, piece: int) -> int:
+        """
+        Returns:
+            key: the key of piece on cell, 0 for an empty cell
+        """
+        if piece > 0:
+            return self.keys[cell][piece - 1]
+        if piece < 0:
+            return flip(self.keys[cell][-piece - 1])
+        return 0
+
+    def board_hash(self, board: Any) -> int:
+        """
+        Returns:
+            h: the hash of board, whose flattened cells index the keys
+        """
+        cells = asarray(board).ravel()
+        h = 0
+        for p in range(1, self._key_array.shape[1] + 1):
+            keys = self._key_array[:, p - 1]
+            h ^= int(bitwise_xor.reduce(keys[cells == p]))
+            h ^= flip(int(bitwise_xor.reduce(keys[cells == -p])))
+        return h
+
+    def diff_hash(self, h: int, board: Any, next_board: Any) -> int:
+        """
+        Returns:
+            h: the hash of next_board, from h the hash of board, XORing the
+                keys of the cells that differ between the two
+        """
+        cells, next_cells = asarray(board).ravel(), asarray(next_board).ravel()
+        for cell in (cells != next_cells).nonzero()[0]:
+            h ^= self.key(cell, int(cells[cell])) ^ self.key(
+                cell, int(next_cells[cell])
+            )
+        return h
@@ -0,0 +1,54 @@
+"""
+Search B positions with B separate MCTS objects, or with one BatchedMCTS.
+
+    python -m benchmarks.bench_batched_mcts [--sims 100] [--call-ms 1.0]
+
+The network stand-in costs --call-ms per call plus --board-ms per board, a
+rough model of a CPU inference backend whose fixed cost per call dominates
+at batch size 1. With --call-ms 0 the table shows the search overhead alone.
+"""
+
+import argparse
+from typing import Any
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.batched_mcts import BatchedMCTS
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.mcts import MCTS
+from benchmarks.common import SlowNN, print_table, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sims", type=int, default=100)
+    parser.add_argument("--call-ms", type=float, default=1.0)
+    parser.add_argument("--board-ms", type=float, default=0.02)
+    cli = parser.parse_args()
+
+    game = Connect4Game()
+    args = MctsArgs(num_mcts_sims=cli.sims, c_puct=1.0)
+    board = game.get_init_board()
+
+    rows: list[list[Any]] = []
+    for batch_size in 1, 8, 32, 128:
+        boards = [board] * batch_size
+        nn = SlowNN(game, cli.call_ms, cli.board_ms)
+        separate = timed(
+            lambda: [MCTS(game, nn, args).get_action_probabilities(b) for b in boards],
+            repeat=1,
+        )
+        batched_mcts = BatchedMCTS(game, nn, args, batch_size)
+        batched = timed(lambda: batched_mcts.get_action_probabilities(boards), repeat=1)
+        rows.append(
+            [
+                batch_size,
+                f"{batch_size * cli.sims / separate:.0f}",
+                f"{batch_size * cli.sims / batched:.0f}",
+                f"{separate / batched:.1f}x",
+            ]
+        )
+    print_table(["trees", "MCTS sims/s", "BatchedMCTS sims/s", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
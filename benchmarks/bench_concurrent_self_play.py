@@ -0,0 +1,74 @@
+"""
+Self-play throughput of Coach.concurrent_self_play with 1 to M episodes in
+flight in one process.
+
+    python -m benchmarks.bench_concurrent_self_play [--games 16] [--sims 50]
+
+Plays --games Connect4 episodes per setting. The network stand-in costs
+--call-ms per call plus --board-ms per board (see SlowNN), so the table
+shows what batching the leaves of concurrent episodes saves on a backend
+whose fixed cost per call dominates at batch size 1.
+"""
+
+import argparse
+import time
+from dataclasses import replace
+from typing import Any
+
+import numpy as np
+
+from alpha_zero_general.coach import Coach, CoachArgs
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from benchmarks.common import SlowNN, print_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=16)
+    parser.add_argument("--sims", type=int, default=50)
+    parser.add_argument("--call-ms", type=float, default=1.0)
+    parser.add_argument("--board-ms", type=float, default=0.02)
+    cli = parser.parse_args()
+
+    game = Connect4Game()
+    args = CoachArgs(
+        num_iters=1,
+        num_eps=cli.games,
+        temp_threshold=15,
+        update_threshold=0.6,
+        max_len_of_queue=200000,
+        num_mcts_sims=cli.sims,
+        arena_compare=0,
+        c_puct=1.0,
+        checkpoint="./temp/",
+        load_model=False,
+        load_folder_file=("", ""),
+        num_iters_for_train_examples_history=1,
+    )
+
+    rows: list[list[Any]] = []
+    baseline = None
+    for concurrent_episodes in 1, 4, 16:
+        np.random.seed(0)
+        nn = SlowNN(game, cli.call_ms, cli.board_ms)
+        coach = Coach(game, nn, replace(args, concurrent_episodes=concurrent_episodes))
+        start = time.perf_counter()
+        moves = sum(len(examples) for examples in coach.concurrent_self_play(cli.games))
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        rows.append(
+            [
+                concurrent_episodes,
+                f"{cli.games / seconds * 3600:.0f}",
+                f"{moves / seconds * 3600:.0f}",
+                f"{np.mean(nn.batch_sizes):.1f}",
+                f"{baseline / seconds:.1f}x",
+            ]
+        )
+    print_table(
+        ["episodes", "games/hour", "examples/hour", "boards/batch", "speedup"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Disk I/O of Coach.save_train_examples over a run: one compressed shard per
+iteration plus a manifest, against re-pickling the whole history window
+every iteration as it used to.
+
+    python -m benchmarks.bench_example_shards [--iterations 10] [--window 5]
+
+Each iteration adds --examples random Othello examples (8x8 boards, 65
+actions), and the history keeps the last --window iterations, as learn
+does with num_iters_for_train_examples_history.
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+from alpha_zero_general import TrainingExample
+from alpha_zero_general.coach import Coach, CoachArgs
+from alpha_zero_general.othello.othello_game import OthelloGame
+from benchmarks.common import HashPriorNN, print_table
+
+
+def _folder_bytes(folder: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--examples", type=int, default=20000)
+    cli = parser.parse_args()
+
+    game = OthelloGame(8)
+    rng = np.random.default_rng(0)
+    iterations = []
+    for _ in range(cli.iterations):
+        boards = rng.integers(-1, 2, size=(cli.examples, 8, 8))
+        policies = rng.dirichlet(np.ones(65), size=cli.examples)
+        values = rng.choice([-1.0, 1.0], size=cli.examples)
+        iterations.append(
+            [TrainingExample(*example) for example in zip(boards, policies, values)]
+        )
+
+    rows: list[list[Any]] = []
+    for name in "pickle", "shards":
+        with tempfile.TemporaryDirectory() as folder:
+            args = CoachArgs(
+                num_iters=cli.iterations,
+                num_eps=0,
+                temp_threshold=15,
+                update_threshold=0.6,
+                max_len_of_queue=cli.examples,
+                num_mcts_sims=0,
+                arena_compare=0,
+                c_puct=1.0,
+                checkpoint=folder,
+                load_model=False,
+                load_folder_file=(folder, f"checkpoint_{cli.iterations}.pth.tar"),
+                num_iters_for_train_examples_history=cli.window,
+            )
+            coach = Coach(game, HashPriorNN(game), args)
+            written = 0
+            save_seconds = 0.0
+            for i, examples in enumerate(iterations, 1):
+                coach.train_examples_history.append(examples)
+                if len(coach.train_examples_history) > cli.window:
+                    coach.train_examples_history.pop(0)
+                    if coach.example_shards:
+                        coach.example_shards.pop(0)
+                before = _folder_bytes(folder)
+                start = time.perf_counter()
+                if name == "pickle":
+                    path = os.path.join(folder, coach.get_checkpoint_file(i))
+                    with open(path + ".examples", "wb") as f:
+                        pickle.dump(coach.train_examples_history, f)
+                else:
+                    coach.save_train_examples(i)
+                save_seconds += time.perf_counter() - start
+                written += _folder_bytes(folder) - before
+
+            restarted = Coach(game, HashPriorNN(game), args)
+            start = time.perf_counter()
+            restarted.load_train_examples()
+            load_seconds = time.perf_counter() - start
+            rows.append(
+                [
+                    name,
+                    f"{written / 2**20:.0f}",
+                    f"{save_seconds:.1f}",
+                    f"{load_seconds:.2f}",
+                ]
+            )
+    print_table(["", "MB written", "save s", "load window s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Arena of the Gumbel root search against PUCT at low simulation budgets.
+
+    python -m benchmarks.bench_gumbel [--sims 8] [--games 20] [--playouts 4]
+
+Gumbel with --sims simulations plays PUCT with 1x, 2x and 4x as many on
+Connect4. The network stand-in has a uniform prior and the mean outcome of
+--playouts random games as value, so the strength comes from the search
+alone. Every pairing plays --games games from seeded two-ply openings, each
+opening with both colors.
+"""
+
+import argparse
+from dataclasses import replace
+from typing import Any
+
+import numpy as np
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.game import GenericGame
+from alpha_zero_general.mcts import MCTS, MctsPlayer
+from benchmarks.common import print_table
+
+
+class RolloutNN:
+    """
+    Uniform prior over the valid moves, value averaged over random playouts.
+    """
+
+    def __init__(
+        self, game: GenericGame[Any, Any, Any], playouts: int, seed: int
+    ) -> None:
+        self.game = game
+        self.playouts = playouts
+        self.rng = np.random.default_rng(seed)
+        self.predict_calls = 0
+
+    def predict(self, board: Any) -> tuple[np.ndarray[Any, Any], float]:
+        self.predict_calls += 1
+        valid_moves = self.game.get_valid_moves(board, 1)
+        value = np.mean([self.playout(board) for _ in range(self.playouts)])
+        return valid_moves / valid_moves.sum(), float(value)
+
+    def playout(self, board: Any) -> float:
+        player = 1
+        while (result := self.game.get_game_ended(board, player)) == 0:
+            valid_moves = np.flatnonzero(self.game.get_valid_moves(board, player))
+            action = int(self.rng.choice(valid_moves))
+            board, player = self.game.get_next_state(board, player, action)
+        return float(result * player)
+
+
+def play(
+    game: GenericGame[Any, Any, Any],
+    players: list[MctsPlayer[Any, Any, Any]],
+    opening: list[int],
+) -> float:
+    """
+    Returns:
+        result: the outcome for players[0], who moves first after the opening
+    """
+    board, player = game.get_init_board(), 1
+    for action in opening:
+        board, player = game.get_next_state(board, player, action)
+    first = player
+    while (result := game.get_game_ended(board, player)) == 0:
+        mover = players[0] if player == first else players[1]
+        other = players[1] if player == first else players[0]
+        action = mover(game.get_canonical_form(board, player))
+        other.notify(board, action)
+        board, player = game.get_next_state(board, player, action)
+    return float(result * player * first)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sims", type=int, default=8)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--playouts", type=int, default=4)
+    cli = parser.parse_args()
+    game = Connect4Game()
+    rng = np.random.default_rng(0)
+    openings = [
+        [int(a) for a in rng.integers(game.get_action_size(), size=2)]
+        for _ in range(cli.games // 2)
+    ]
+    gumbel_args = MctsArgs(
+        num_mcts_sims=cli.sims, c_puct=1.0, root_search="gumbel", seed=0
+    )
+
+    rows: list[list[Any]] = []
+    for factor in [1, 2, 4]:
+        puct_args = MctsArgs(num_mcts_sims=cli.sims * factor, c_puct=1.0)
+        results: list[float] = []
+        calls = {"gumbel": 0, "puct": 0}
+        for i, opening in enumerate(openings):
+            for gumbel_first in [True, False]:
+                gumbel_nn = RolloutNN(game, cli.playouts, seed=2 * i)
+                puct_nn = RolloutNN(game, cli.playouts, seed=2 * i + 1)
+                gumbel = MctsPlayer(MCTS(game, gumbel_nn, replace(gumbel_args, seed=i)))
+                puct = MctsPlayer(MCTS(game, puct_nn, puct_args))
+                if gumbel_first:
+                    results.append(play(game, [gumbel, puct], opening))
+                else:
+                    results.append(-play(game, [puct, gumbel], opening))
+                calls["gumbel"] += gumbel_nn.predict_calls
+                calls["puct"] += puct_nn.predict_calls
+        wins = sum(r > 0.5 for r in results)
+        losses = sum(r < -0.5 for r in results)
+        rows.append(
+            [
+                cli.sims,
+                cli.sims * factor,
+                f"{wins}/{len(results) - wins - losses}/{losses}",
+                f"{calls['puct'] / calls['gumbel']:.1f}x",
+            ]
+        )
+    print_table(
+        ["gumbel sims", "puct sims", "gumbel W/D/L", "puct/gumbel nn calls"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
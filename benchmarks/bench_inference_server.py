@@ -0,0 +1,68 @@
+"""
+Round trips per second through an InferenceServer, with 1 to N client
+processes sharing it, and the boards per predict_batch call it reached.
+
+    python -m benchmarks.bench_inference_server [--calls 2000] [--wait-ms 1.0]
+
+The network costs next to nothing, so the table shows the cost of the
+shared memory transport and the batching wait alone. Worker processes run
+on the cores of the machine, so the rates scale with those.
+"""
+
+import argparse
+import multiprocessing
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.inference_server import InferenceServer
+from benchmarks.common import HashPriorNN, print_table
+
+
+def _client_calls(client_factory: Callable[[], Any], board: Any, calls: int) -> None:
+    nn = client_factory()
+    for _ in range(calls):
+        nn.predict(board)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--wait-ms", type=float, default=1.0)
+    cli = parser.parse_args()
+
+    game = Connect4Game()
+    board = game.get_init_board()
+    context = multiprocessing.get_context("spawn")
+
+    rows: list[list[Any]] = []
+    for num_clients in 1, 2, 4, 8:
+        with InferenceServer(
+            game, partial(HashPriorNN, game), num_clients, max_wait_ms=cli.wait_ms
+        ) as server:
+            clients = [
+                context.Process(
+                    target=_client_calls, args=(server.client(i), board, cli.calls)
+                )
+                for i in range(num_clients)
+            ]
+            start = time.perf_counter()
+            for process in clients:
+                process.start()
+            for process in clients:
+                process.join()
+            seconds = time.perf_counter() - start
+            rows.append(
+                [
+                    num_clients,
+                    f"{num_clients * cli.calls / seconds:.0f}",
+                    f"{server.mean_batch_size:.1f}",
+                ]
+            )
+    print_table(["clients", "predictions/s", "boards/batch"], rows)
+
+
+if __name__ == "__main__":
+    main()
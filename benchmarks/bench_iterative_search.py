@@ -0,0 +1,122 @@
+"""
+Simulations per second of the iterative MCTS.search against the recursive
+descent it replaced, on RTS positions reached after some random ticks.
+
+    python -m benchmarks.bench_iterative_search [--sims 400] [--c-puct 0.1]
+
+A small c_puct makes the search follow the prior, which grows deep lines, the
+case where one Python frame per ply costs the most.
+"""
+
+import argparse
+from typing import Any, cast
+
+import numpy as np
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.mcts import MCTS, mask_policy
+from alpha_zero_general.rts.rts_game import RTSGame
+from benchmarks.common import HashPriorNN, print_table, timed
+
+
+class RecursiveMCTS(MCTS[Any, Any, Any]):
+    """
+    MCTS.search as it was before the explicit path: one call per ply.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.search_calls = 0
+
+    def search(self, canonical_board: Any) -> float:
+        self.search_calls += 1
+        h = self._cached_hash(canonical_board)
+        if h not in self.game_value_cache:
+            self.game_value_cache[h] = self.game.get_game_ended(canonical_board, 1)
+        if self.game_value_cache[h] != 0:
+            return -self.game_value_cache[h]
+        if not self._is_expanded(h):
+            policy, v = self.nn.predict(canonical_board)
+            valid_move = self.game.get_valid_moves(canonical_board, 1)
+            self._expand(h, mask_policy(policy, valid_move), valid_move)
+            return -float(np.asarray(v).item())
+        action = self._select_action(h)
+        next_board, next_player = self.game.get_next_state(canonical_board, 1, action)
+        next_board = self.game.get_canonical_form(next_board, next_player)
+        v = self.search(next_board)
+        self._update_edge(h, action, v)
+        return -v
+
+
+def random_position(game: RTSGame, ticks: int, seed: int) -> Any:
+    rng = np.random.default_rng(seed)
+    board, player = game.get_init_board(), 1
+    for _ in range(ticks):
+        valid_moves = np.flatnonzero(game.get_valid_moves(board, player))
+        next_board, next_player = game.get_next_state(
+            board, player, int(rng.choice(valid_moves))
+        )
+        if game.get_game_ended(next_board, next_player) != 0:
+            break
+        board, player = next_board, next_player
+    return game.get_canonical_form(board, player)
+
+
+def max_depth(mcts: MCTS[Any, Any, Any], board: Any) -> int:
+    depth = 0
+    while True:
+        h = mcts._cached_hash(board)
+        if mcts.game_value_cache.get(h, 0) != 0 or not mcts._is_expanded(h):
+            return depth
+        action = int(np.argmax(mcts._visit_counts(h)))
+        next_board, next_player = mcts.game.get_next_state(board, 1, action)
+        board = mcts.game.get_canonical_form(next_board, next_player)
+        depth += 1
+
+
+def simulate(mcts: MCTS[Any, Any, Any], board: Any, num_sims: int) -> None:
+    # get_action_probabilities runs MCTS._search_steps, not search, so call
+    # search directly to time the RecursiveMCTS override
+    for _ in range(num_sims):
+        mcts.search(board)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sims", type=int, default=400)
+    parser.add_argument("--c-puct", type=float, default=0.1)
+    cli = parser.parse_args()
+    args = MctsArgs(num_mcts_sims=cli.sims, c_puct=cli.c_puct)
+    game = RTSGame()
+
+    rows: list[list[Any]] = []
+    for ticks in [0, 50, 150]:
+        board = random_position(game, ticks, seed=ticks)
+        trees: dict[str, MCTS[Any, Any, Any]] = {}
+        seconds = {}
+        for name, mcts_class in [("recursive", RecursiveMCTS), ("iterative", MCTS)]:
+
+            def run() -> None:
+                trees[name] = mcts_class(game, HashPriorNN(game), args)
+                simulate(trees[name], board, cli.sims)
+
+            seconds[name] = timed(run)
+        recursive = cast(RecursiveMCTS, trees["recursive"])
+        assert recursive.search_calls >= cli.sims, "recursive search did not run"
+        mcts = trees["iterative"]
+        rows.append(
+            [
+                ticks,
+                max_depth(mcts, board),
+                f"{cli.sims / seconds['recursive']:.0f}",
+                f"{cli.sims / seconds['iterative']:.0f}",
+                f"{seconds['recursive'] / seconds['iterative']:.2f}x",
+            ]
+        )
+    print_table(
+        ["ticks", "pv depth", "recursive sims/s", "iterative sims/s", "speedup"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
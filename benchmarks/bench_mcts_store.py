@@ -0,0 +1,78 @@
+"""
+Compare the dict node store of MCTS with the array node store of ArrayMCTS
+and the sparse one of SparseMCTS.
+
+    python -m benchmarks.bench_mcts_store [--sims 200]
+
+The searches run from the initial position with the same network stand-in,
+so the difference is the cost of selection and backup. The bytes are the
+estimated size of the root node (see MCTS.occupancy).
+"""
+
+import argparse
+from typing import Any
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.array_mcts import ArrayMCTS
+from alpha_zero_general.game import GenericGame
+from alpha_zero_general.gobang.gobang_game import GobangGame
+from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.othello.othello_game import OthelloGame
+from alpha_zero_general.sparse_mcts import SparseMCTS
+from alpha_zero_general.tafl.tafl_game import TaflGame
+from benchmarks.common import HashPriorNN, print_table, timed
+
+GAMES: dict[str, GenericGame[Any, Any, Any]] = {
+    "othello 8x8": OthelloGame(8),
+    "gobang 15x15": GobangGame(15),
+    "tafl brandubh": TaflGame("Brandubh"),
+    "tafl hnefatafl": TaflGame("Hnefatafl"),
+}
+STORES: dict[str, type[MCTS[Any, Any, Any]]] = {
+    "dict": MCTS,
+    "array": ArrayMCTS,
+    "sparse": SparseMCTS,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sims", type=int, default=200)
+    cli = parser.parse_args()
+    args = MctsArgs(num_mcts_sims=cli.sims, c_puct=1.0)
+
+    rows: list[list[Any]] = []
+    for name, game in GAMES.items():
+        board = game.get_canonical_form(game.get_init_board(), 1)
+        valid_moves = int(game.get_valid_moves(board, 1).sum())
+        seconds, node_bytes = {}, {}
+        for store, mcts_class in STORES.items():
+            mcts = mcts_class(game, HashPriorNN(game), args)
+            seconds[store] = timed(
+                lambda: mcts_class(
+                    game, HashPriorNN(game), args
+                ).get_action_probabilities(board)
+            )
+            mcts.get_action_probabilities(board)
+            node_bytes[store] = mcts._node_bytes(mcts.root_hash)
+        rows.append(
+            [
+                name,
+                f"{valid_moves}/{game.get_action_size()}",
+                *(f"{cli.sims / seconds[store]:.0f}" for store in STORES),
+                *(node_bytes[store] for store in STORES),
+            ]
+        )
+    print_table(
+        [
+            "game",
+            "valid/actions",
+            *(f"{store} sims/s" for store in STORES),
+            *(f"{store} bytes" for store in STORES),
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Self-play throughput with playout cap randomization (CoachArgs
+full_search_fraction and fast_mcts_sims) against full searches on every move.
+
+    python -m benchmarks.bench_playout_cap [--games 20] [--sims 100]
+
+Plays --games Connect4 self-play episodes per setting through
+Coach.execute_episode, with a fresh tree per game as Coach.learn does.
+Policy targets are the examples with a non-zero pi, value targets all of
+them. Whether the network learns as well from fewer policy targets needs
+a training run, which this does not do.
+"""
+
+import argparse
+import time
+from dataclasses import replace
+from typing import Any
+
+import numpy as np
+
+from alpha_zero_general.coach import Coach, CoachArgs
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.mcts import MCTS
+from benchmarks.common import HashPriorNN, print_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--sims", type=int, default=100)
+    cli = parser.parse_args()
+
+    game = Connect4Game()
+    full = CoachArgs(
+        num_iters=1,
+        num_eps=cli.games,
+        temp_threshold=15,
+        update_threshold=0.6,
+        max_len_of_queue=200000,
+        num_mcts_sims=cli.sims,
+        arena_compare=0,
+        c_puct=1.0,
+        checkpoint="./temp/",
+        load_model=False,
+        load_folder_file=("", ""),
+        num_iters_for_train_examples_history=1,
+        telemetry=True,
+    )
+    settings = {
+        "full search": full,
+        "cap 25%, value": replace(
+            full, full_search_fraction=0.25, fast_move_examples="value"
+        ),
+        "cap 25%, none": replace(full, full_search_fraction=0.25),
+    }
+
+    rows: list[list[Any]] = []
+    for name, args in settings.items():
+        np.random.seed(0)
+        coach = Coach(game, HashPriorNN(game), args)
+        policy_targets = value_targets = 0
+        start = time.perf_counter()
+        for _ in range(cli.games):
+            coach.mcts = MCTS(game, coach.nn, args.to_mcts_args())
+            examples = coach.execute_episode()
+            value_targets += len(examples)
+            policy_targets += sum(bool(np.any(e.policy)) for e in examples)
+        seconds = time.perf_counter() - start
+        stats = coach.search_stats
+        rows.append(
+            [
+                name,
+                f"{cli.games / seconds * 3600:.0f}",
+                f"{stats.moves / seconds * 3600:.0f}",
+                f"{stats.simulations / stats.moves:.0f}",
+                f"{policy_targets / cli.games:.0f}",
+                f"{value_targets / cli.games:.0f}",
+            ]
+        )
+    print_table(
+        [
+            "",
+            "games/hour",
+            "moves/hour",
+            "sims/move",
+            "policy targets/game",
+            "value targets/game",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Keep the training examples of the last iterations in Coach's list history,
+pickled every iteration, or in a memory-mapped ReplayBuffer.
+
+    python -m benchmarks.bench_replay_buffer [--examples 100000] [--iterations 4]
+
+Examples are 8x8 Othello-sized boards with 65-action policies, --examples
+per iteration. The list side times what learn does each iteration: flatten
+and shuffle the history, pickle it, and unpickle it on a restart. The
+buffer side times add_iteration, open and the random batches a network
+trains on.
+"""
+
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+
+import numpy as np
+
+from alpha_zero_general import TrainingExample
+from alpha_zero_general.replay_buffer import ReplayBuffer
+from benchmarks.common import print_table
+
+
+def _iteration(rng: np.random.Generator, count: int) -> list[TrainingExample[Any, Any]]:
+    boards = rng.integers(-1, 2, size=(count, 8, 8))
+    policies = rng.random((count, 65))
+    return [
+        TrainingExample(board, policy / policy.sum(), float(rng.choice([-1, 1])))
+        for board, policy in zip(boards, policies)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--examples", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=4)
+    parser.add_argument("--batches", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    cli = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    tracemalloc.start()
+    history = [_iteration(rng, cli.examples) for _ in range(cli.iterations)]
+    history_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    total = cli.examples * cli.iterations
+
+    rows: list[list[Any]] = []
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        train_examples = [e for iteration in history for e in iteration]
+        random.shuffle(train_examples)
+        flatten = time.perf_counter() - start
+        path = os.path.join(folder, "history.examples")
+        start = time.perf_counter()
+        with open(path, "wb") as f:
+            pickle.dump(history, f)
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            pickle.load(f)
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(cli.batches):
+            ids = np.random.randint(len(train_examples), size=cli.batch_size)
+            boards, pis, vs = list(zip(*[train_examples[i] for i in ids]))
+            np.array(boards), np.array(pis), np.array(vs)
+        sample = time.perf_counter() - start
+        rows.append(
+            [
+                "list + pickle",
+                f"{history_bytes / 2**20:.0f}",
+                f"{os.path.getsize(path) / 2**20:.0f}",
+                f"{flatten + save:.2f}",
+                f"{load:.3f}",
+                f"{sample / cli.batches * 1e6:.0f}",
+            ]
+        )
+
+        replay = os.path.join(folder, "replay")
+        buffer = ReplayBuffer.create(replay, total, cli.iterations, history[0][0])
+        start = time.perf_counter()
+        for iteration in history:
+            buffer.add_iteration(iteration)
+        add = (time.perf_counter() - start) / cli.iterations
+        del buffer
+        start = time.perf_counter()
+        buffer = ReplayBuffer.open(replay)
+        reopen = time.perf_counter() - start
+        batch_rng = np.random.default_rng(0)
+        start = time.perf_counter()
+        for _ in range(cli.batches):
+            buffer.sample(cli.batch_size, batch_rng)
+        sample = time.perf_counter() - start
+        disk = sum(
+            os.path.getsize(os.path.join(replay, name)) for name in os.listdir(replay)
+        )
+        rows.append(
+            [
+                "ReplayBuffer",
+                "0",
+                f"{disk / 2**20:.0f}",
+                f"{add:.2f}",
+                f"{reopen:.3f}",
+                f"{sample / cli.batches * 1e6:.0f}",
+            ]
+        )
+    print(f"{total} examples in {cli.iterations} iterations")
+    print_table(
+        [
+            "",
+            "heap MB",
+            "disk MB",
+            "per iteration s",
+            "restart s",
+            f"batch of {cli.batch_size} µs",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Simulations the MCTS-Solver saves on endgame positions.
+
+    python -m benchmarks.bench_solver [--sims 800] [--positions 20] [--plies 6]
+
+The positions are --plies moves before the end of seeded random games. A
+search without the solver always runs --sims simulations; with it, the
+search stops once the root is proven.
+"""
+
+import argparse
+from typing import Any
+
+import numpy as np
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.game import GenericGame
+from alpha_zero_general.gobang.gobang_game import GobangGame
+from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.tic_tac_toe.tic_tac_toe_game import TicTacToeGame
+from benchmarks.common import HashPriorNN, print_table, timed
+
+GAMES: dict[str, GenericGame[Any, Any, Any]] = {
+    "tictactoe": TicTacToeGame(),
+    "connect4": Connect4Game(),
+    "gobang 7x7": GobangGame(n=7, nir=4),
+}
+
+
+def endgame_position(game: GenericGame[Any, Any, Any], plies: int, seed: int) -> Any:
+    """
+    Returns:
+        board: the canonical board plies moves before the end of a random game
+    """
+    rng = np.random.default_rng(seed)
+    board, player = game.get_init_board(), 1
+    history = []
+    while game.get_game_ended(board, player) == 0:
+        history.append(game.get_canonical_form(board, player))
+        valid_moves = np.flatnonzero(game.get_valid_moves(board, player))
+        board, player = game.get_next_state(board, player, int(rng.choice(valid_moves)))
+    return history[max(0, len(history) - plies)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sims", type=int, default=800)
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--plies", type=int, default=6)
+    cli = parser.parse_args()
+    args = MctsArgs(num_mcts_sims=cli.sims, c_puct=1.0)
+    solver_args = MctsArgs(num_mcts_sims=cli.sims, c_puct=1.0, solver=True)
+
+    rows: list[list[Any]] = []
+    for name, game in GAMES.items():
+        sims_used, proven, seconds = [], 0, {"plain": 0.0, "solver": 0.0}
+        for seed in range(cli.positions):
+            board = endgame_position(game, cli.plies, seed)
+            seconds["plain"] += timed(
+                lambda: MCTS(game, HashPriorNN(game), args).get_action_probabilities(
+                    board
+                ),
+                repeat=1,
+            )
+            mcts = MCTS(game, HashPriorNN(game), solver_args)
+            seconds["solver"] += timed(
+                lambda: mcts.get_action_probabilities(board), repeat=1
+            )
+            sims_used.append(mcts.sims_used)
+            proven += mcts.root_hash in mcts.proven
+        rows.append(
+            [
+                name,
+                f"{proven}/{cli.positions}",
+                f"{np.mean(sims_used):.0f}",
+                f"{1 - np.mean(sims_used) / cli.sims:.0%}",
+                f"{seconds['plain'] / seconds['solver']:.2f}x",
+            ]
+        )
+    print_table(["game", "roots proven", "solver sims", "sims saved", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Nodes and network calls saved by keying MCTS nodes on symmetry classes.
+
+    python -m benchmarks.bench_symmetry [--sims 400]
+
+Each game is searched from its initial position, where symmetric lines are
+the most common, with and without MctsArgs.symmetry. A hit is a position met
+by the search whose symmetry class was already in the tree, i.e. a network
+evaluation saved. The network stand-in is free, so the time column shows
+the cost of get_symmetries per new position, which a real network hides.
+"""
+
+import argparse
+from typing import Any
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.game import GenericGame
+from alpha_zero_general.gobang.gobang_game import GobangGame
+from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.othello.othello_game import OthelloGame
+from alpha_zero_general.tic_tac_toe.tic_tac_toe_game import TicTacToeGame
+from benchmarks.common import HashPriorNN, print_table, timed
+
+GAMES: dict[str, GenericGame[Any, Any, Any]] = {
+    "tictactoe": TicTacToeGame(),
+    "othello 6x6": OthelloGame(6),
+    "gobang 9x9": GobangGame(n=9, nir=5),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sims", type=int, default=400)
+    cli = parser.parse_args()
+
+    rows: list[list[Any]] = []
+    for name, game in GAMES.items():
+        board = game.get_canonical_form(game.get_init_board(), 1)
+        stats = {}
+        for symmetry in [False, True]:
+            args = MctsArgs(num_mcts_sims=cli.sims, c_puct=1.0, symmetry=symmetry)
+            nn = HashPriorNN(game)
+            mcts = MCTS(game, nn, args)
+            seconds = timed(lambda: mcts.get_action_probabilities(board), repeat=1)
+            stats[symmetry] = (len(mcts.board_cache), nn.predict_calls, seconds)
+        rows.append(
+            [
+                name,
+                f"{stats[False][0]} -> {stats[True][0]}",
+                f"{stats[False][1]} -> {stats[True][1]}",
+                mcts.symmetry_hits,
+                f"{mcts.symmetry_hit_rate():.0%}",
+                f"{stats[True][2] / stats[False][2]:.2f}x",
+            ]
+        )
+    print_table(["game", "nodes", "nn calls", "hits", "hit rate", "time"], rows)
+
+
+if __name__ == "__main__":
+    main()
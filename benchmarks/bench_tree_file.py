@@ -0,0 +1,104 @@
+"""
+File size and load time of a saved MCTS tree (MCTS.save_tree, load_tree).
+
+    python -m benchmarks.bench_tree_file [--nodes 1000000] [--path tree.bin]
+
+Builds a SparseMCTS tree of --nodes nodes on Dots and Boxes 3x3 with one
+search from the opening (about 4 minutes for a million), then saves it,
+loads it back and answers the opening from the warm tree. For reference,
+the same tree's nodes and edges are also pickled and unpickled whole.
+"""
+
+import argparse
+import os
+import pickle
+import time
+from dataclasses import replace
+
+import numpy as np
+from numpy.typing import NDArray
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.dots_and_boxes.dots_and_boxes_game import DotsAndBoxesGame
+from alpha_zero_general.sparse_mcts import SparseMCTS
+from benchmarks.common import HashPriorNN, print_table, timed
+
+
+def build_tree(
+    game: DotsAndBoxesGame, args: MctsArgs, path: str
+) -> tuple[float, int, NDArray[np.int64]]:
+    """
+    Build the tree from the opening, save it to path and pickle its nodes and
+    edges to path.pickle. The tree is dropped on return, which leaves room for
+    the unpickled copy.
+
+    Returns:
+        save_seconds: the time of save_tree
+        num_nodes: the nodes of the tree
+        sample: hashes of up to 10000 of its nodes
+    """
+    tree = SparseMCTS(game, HashPriorNN(game), args)
+    start = time.perf_counter()
+    tree.get_action_probabilities(game.get_init_board())
+    print(f"built {len(tree.nodes)} nodes in {time.perf_counter() - start:.0f}s")
+
+    save_seconds = timed(lambda: tree.save_tree(path), repeat=1)
+    with open(f"{path}.pickle", "wb") as f:
+        pickle.dump((tree.nodes, tree.children), f, protocol=pickle.HIGHEST_PROTOCOL)
+    rng = np.random.default_rng(0)
+    sample = rng.choice(list(tree.nodes), size=min(10_000, len(tree.nodes)))
+    return save_seconds, len(tree.nodes), sample
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--path", default="tree.bin")
+    cli = parser.parse_args()
+
+    game = DotsAndBoxesGame(n=3)
+    board = game.get_init_board()
+    args = MctsArgs(num_mcts_sims=cli.nodes, c_puct=1.0, reuse_root_visits=True)
+    save_seconds, num_nodes, sample = build_tree(game, args, cli.path)
+    file_bytes = os.path.getsize(cli.path)
+    pickle_path = f"{cli.path}.pickle"
+    pickle_bytes = os.path.getsize(pickle_path)
+
+    def load() -> SparseMCTS:
+        warm = SparseMCTS(game, HashPriorNN(game), replace(args, num_mcts_sims=800))
+        warm.load_tree(cli.path)
+        return warm
+
+    load_seconds = timed(load)
+    warm = load()
+    move_seconds = timed(lambda: warm.get_action_probabilities(board), repeat=1)
+    cold = SparseMCTS(game, HashPriorNN(game), replace(args, num_mcts_sims=800))
+    cold_seconds = timed(lambda: cold.get_action_probabilities(board), repeat=1)
+    fault_seconds = timed(lambda: [warm._fault_in(int(h)) for h in sample], repeat=1)
+
+    def unpickle() -> None:
+        with open(pickle_path, "rb") as f:
+            pickle.load(f)
+
+    unpickle_seconds = timed(unpickle, repeat=1)
+    os.remove(pickle_path)
+    os.remove(cli.path)
+
+    print_table(
+        ["", "value"],
+        [
+            ["tree file MB", f"{file_bytes / 1e6:.1f}"],
+            ["bytes per node", f"{file_bytes / num_nodes:.0f}"],
+            ["save s", f"{save_seconds:.2f}"],
+            ["load_tree ms", f"{load_seconds * 1e3:.2f}"],
+            ["warm opening move ms", f"{move_seconds * 1e3:.2f}"],
+            ["cold opening move ms (800 sims)", f"{cold_seconds * 1e3:.0f}"],
+            ["fault in us per node", f"{fault_seconds / len(sample) * 1e6:.1f}"],
+            ["pickle MB", f"{pickle_bytes / 1e6:.1f}"],
+            ["unpickle s", f"{unpickle_seconds:.2f}"],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Simulations per second of TreeParallelMCTS from 1 to N threads.
+
+    python -m benchmarks.bench_tree_parallel [--sims 4000] [--threads 1 2 4 8]
+        [--force]
+
+Searches the Othello 8x8 opening on one shared tree. The speedup only shows
+on a free-threaded build (python3.13t, PYTHON_GIL=0); with the GIL enabled
+TreeParallelMCTS falls back to one thread, and --force runs the threads
+anyway to measure what they cost there.
+"""
+
+import argparse
+import sys
+from typing import Any
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.othello.othello_game import OthelloGame
+from alpha_zero_general.py313_backport import is_gil_enabled
+from alpha_zero_general.tree_parallel_mcts import TreeParallelMCTS
+from benchmarks.common import HashPriorNN, print_table, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sims", type=int, default=4000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--force", action="store_true")
+    cli = parser.parse_args()
+    gil = "enabled" if is_gil_enabled() else "disabled"
+    print(f"Python {sys.version.split()[0]}, GIL {gil}")
+
+    game = OthelloGame(8)
+    board = game.get_init_board()
+    rows: list[list[Any]] = []
+    baseline = None
+    for num_threads in cli.threads:
+        args = MctsArgs(num_mcts_sims=cli.sims, c_puct=1.0, num_threads=num_threads)
+
+        def search() -> None:
+            with TreeParallelMCTS(game, HashPriorNN(game), args) as mcts:
+                if cli.force:
+                    mcts.num_threads = num_threads
+                mcts.get_action_probabilities(board)
+
+        sims_per_second = cli.sims / timed(search)
+        baseline = baseline or sims_per_second
+        rows.append(
+            [
+                num_threads,
+                f"{sims_per_second:.0f}",
+                f"{sims_per_second / baseline:.2f}x",
+            ]
+        )
+    print_table(["threads", "sims/s", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Arena of progressive widening against plain PUCT at equal time per move.
+
+    python -m benchmarks.bench_widening [--ms 100 300] [--games 10]
+        [--widening-base 2]
+
+Both players search with MctsArgs.time_budget_ms, so the one whose
+simulations are cheaper gets more of them. The network stand-in has an
+informed prior, a softmax over the mover's game score after each valid
+move, and the mover's score lead as value; its cost per leaf is the same
+for both players. Every pairing plays --games games on RTS and Tafl
+(Brandubh) from seeded two-ply openings, each opening with both colors.
+"""
+
+import argparse
+from typing import Any
+
+import numpy as np
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.game import GenericGame
+from alpha_zero_general.mcts import MCTS, MctsPlayer
+from alpha_zero_general.rts.rts_game import RTSGame
+from alpha_zero_general.tafl.tafl_game import TaflGame
+from benchmarks.common import print_table
+
+GAMES: dict[str, GenericGame[Any, Any, Any]] = {
+    "rts": RTSGame(),
+    "tafl brandubh": TaflGame("Brandubh"),
+}
+
+
+class ScoreNN:
+    """
+    Prior: softmax of the mover's get_score after each valid move. Value: the
+    mover's score lead, squashed to (-1, 1).
+    """
+
+    def __init__(self, game: GenericGame[Any, Any, Any]) -> None:
+        self.game = game
+
+    def mover(self, board: Any) -> int:
+        # Tafl keeps colors in its canonical form, RTS makes the mover 1
+        return board.get_player_to_move() if hasattr(board, "time") else 1
+
+    def predict(self, board: Any) -> tuple[np.ndarray[Any, Any], float]:
+        mover = self.mover(board)
+        valid_moves = self.game.get_valid_moves(board, 1)
+        logits = np.full(len(valid_moves), -np.inf)
+        for action in np.flatnonzero(valid_moves):
+            next_board, _ = self.game.get_next_state(board, 1, int(action))
+            logits[action] = self.game.get_score(next_board, mover)
+        prior = np.exp(logits - logits.max())
+        own, other = self.game.get_score(board, mover), self.game.get_score(
+            board, -mover
+        )
+        value = np.tanh(2 * (own - other) / (abs(own) + abs(other) + 1))
+        return prior / prior.sum(), float(value)
+
+
+def play(
+    game: GenericGame[Any, Any, Any],
+    players: list[MctsPlayer[Any, Any, Any]],
+    opening: list[int],
+) -> float:
+    """
+    Returns:
+        result: the outcome for players[0], who moves first after the opening
+    """
+    board, player = game.get_init_board(), 1
+    for action in opening:
+        board, player = game.get_next_state(board, player, action)
+    first = player
+    while True:
+        canonical_board = game.get_canonical_form(board, player)
+        result = game.get_game_ended(canonical_board, 1)  # for the player to move
+        if result != 0:
+            return float(result if player == first else -result)
+        mover = players[0] if player == first else players[1]
+        other = players[1] if player == first else players[0]
+        action = mover(canonical_board)
+        other.notify(board, action)
+        board, player = game.get_next_state(board, player, action)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ms", type=float, nargs="+", default=[100, 300])
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--widening-base", type=float, default=2)
+    cli = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    rows: list[list[Any]] = []
+    for name, game in GAMES.items():
+        openings = []
+        for _ in range(cli.games // 2):
+            board, player, opening = game.get_init_board(), 1, []
+            for _ in range(2):
+                valid_moves = np.flatnonzero(game.get_valid_moves(board, player))
+                opening.append(int(rng.choice(valid_moves)))
+                board, player = game.get_next_state(board, player, opening[-1])
+            openings.append(opening)
+
+        for ms in cli.ms:
+            puct_args = MctsArgs(num_mcts_sims=100_000, c_puct=1.0, time_budget_ms=ms)
+            widening_args = MctsArgs(
+                num_mcts_sims=100_000,
+                c_puct=1.0,
+                time_budget_ms=ms,
+                widening_base=cli.widening_base,
+            )
+            results: list[float] = []
+            sims = {"widening": [], "puct": []}
+            for opening in openings:
+                for widening_first in [True, False]:
+                    widening = MctsPlayer(MCTS(game, ScoreNN(game), widening_args))
+                    puct = MctsPlayer(MCTS(game, ScoreNN(game), puct_args))
+                    if widening_first:
+                        results.append(play(game, [widening, puct], opening))
+                    else:
+                        results.append(-play(game, [puct, widening], opening))
+                    sims["widening"] += widening.sims_used
+                    sims["puct"] += puct.sims_used
+            wins = sum(r > 0.5 for r in results)
+            losses = sum(r < -0.5 for r in results)
+            rows.append(
+                [
+                    name,
+                    f"{ms:.0f}",
+                    f"{wins}/{len(results) - wins - losses}/{losses}",
+                    f"{np.mean(sims['widening']):.0f}",
+                    f"{np.mean(sims['puct']):.0f}",
+                ]
+            )
+    print_table(
+        ["game", "ms/move", "widening W/D/L", "widening sims", "puct sims"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
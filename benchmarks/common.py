@@ -0,0 +1,92 @@
+"""
+Shared helpers for the search benchmarks.
+
+The benchmarks measure search overhead, so they use a network stand-in that
+costs next to nothing, HashPriorNN, which the search tests share through
+tests/conftest.py. Run them from the repository root, e.g.
+`python -m benchmarks.bench_mcts_store`.
+"""
+
+import time
+from collections.abc import Callable
+from typing import Any
+from zlib import crc32
+
+import numpy as np
+
+from alpha_zero_general.game import GenericGame
+
+
+class HashPriorNN:
+    """
+    Network stand-in for the search tests and benchmarks: a pseudo random
+    policy and value seeded by the board bytes, so every search over the same
+    boards is reproducible, and costs next to nothing.
+    """
+
+    def __init__(self, game: GenericGame[Any, Any, Any]) -> None:
+        self.action_size = game.get_action_size()
+        self.predict_calls = 0
+        self.batch_sizes: list[int] = []
+
+    def predict(self, board: Any) -> tuple[np.ndarray[Any, Any], float]:
+        self.predict_calls += 1
+        # Tafl boards are objects, but they support astype like ndarrays
+        rng = np.random.default_rng(crc32(board.astype(np.int16).tobytes()))
+        pi = rng.random(self.action_size)
+        return pi / pi.sum(), rng.uniform(-1, 1)
+
+    def predict_batch(
+        self, boards: list[Any]
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        self.batch_sizes.append(len(boards))
+        predictions = [self.predict(board) for board in boards]
+        return np.array([pi for pi, _ in predictions]), np.array(
+            [v for _, v in predictions]
+        )
+
+
+class SlowNN(HashPriorNN):
+    """
+    HashPriorNN that sleeps call_ms per call plus board_ms per board, a rough
+    model of a CPU inference backend whose fixed cost per call dominates at
+    batch size 1.
+    """
+
+    def __init__(self, game: Any, call_ms: float, board_ms: float) -> None:
+        super().__init__(game)
+        self.call_seconds = call_ms / 1000
+        self.board_seconds = board_ms / 1000
+
+    def predict(self, board: Any) -> tuple[np.ndarray[Any, Any], float]:
+        time.sleep(self.call_seconds + self.board_seconds)
+        return super().predict(board)
+
+    def predict_batch(
+        self, boards: list[Any]
+    ) -> tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        time.sleep(self.call_seconds + self.board_seconds * len(boards))
+        self.batch_sizes.append(len(boards))
+        predictions = [HashPriorNN.predict(self, board) for board in boards]
+        return np.array([pi for pi, _ in predictions]), np.array(
+            [v for _, v in predictions]
+        )
+
+
+def timed(func: Callable[[], Any], repeat: int = 3) -> float:
+    """
+    Returns:
+        seconds: the best wall-clock time of `repeat` calls of func
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def print_table(header: list[str], rows: list[list[Any]]) -> None:
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in [header, ["-" * w for w in widths], *rows]:
+        print("  ".join(str(cell).rjust(w) for cell, w in zip(row, widths)))
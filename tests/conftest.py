@@ -0,0 +1,8 @@
+import pytest
+
+from benchmarks.common import HashPriorNN
+
+
+@pytest.fixture
+def hash_prior_nn() -> type[HashPriorNN]:
+    return HashPriorNN
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.array_mcts import ArrayMCTS
+from alpha_zero_general.gobang.gobang_game import GobangGame
+from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.tic_tac_toe.tic_tac_toe_game import TicTacToeGame
+
+
+class TestArrayMCTS:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.nn_class = hash_prior_nn
+        self.args = MctsArgs(num_mcts_sims=50, c_puct=1.0)
+
+    @pytest.mark.parametrize("game", [TicTacToeGame(), GobangGame(n=6, nir=4)])
+    def test_same_policy_as_dict_store(self, game):
+        board = game.get_canonical_form(game.get_init_board(), 1)
+        dict_mcts = MCTS(game, self.nn_class(game), self.args)
+        array_mcts = ArrayMCTS(game, self.nn_class(game), self.args)
+        for _ in range(3):
+            dict_probs = dict_mcts.get_action_probabilities(board, temperature=1)
+            array_probs = array_mcts.get_action_probabilities(board, temperature=1)
+            assert np.allclose(dict_probs, array_probs)
+            action = int(np.argmax(array_probs))
+            board, player = game.get_next_state(board, 1, action)
+            board = game.get_canonical_form(board, player)
+
+    def test_backup_is_running_mean(self):
+        game = TicTacToeGame()
+        mcts = ArrayMCTS(game, self.nn_class(game), self.args)
+        board = game.get_init_board()
+        mcts.get_action_probabilities(board)
+        node = mcts.nodes[game.get_board_hash(board)]
+        assert node.visits == self.args.num_mcts_sims - 1
+        assert node.n.sum() == node.visits
+        assert np.all(node.n[~node.valid] == 0)
+        assert np.all(np.abs(node.q) <= 1)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.batched_mcts import BatchedMCTS
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.tic_tac_toe.tic_tac_toe_game import TicTacToeGame
+
+
+class TestBatchedMCTS:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.nn_class = hash_prior_nn
+        self.args = MctsArgs(num_mcts_sims=60, c_puct=1.0)
+
+    def openings(self, game, count):
+        """
+        count distinct positions, some of them ended, a few plies in.
+        """
+        rng = np.random.default_rng(0)
+        boards = []
+        for i in range(count):
+            board, player = game.get_init_board(), 1
+            for _ in range(i % 9):
+                if game.get_game_ended(board, player) != 0:
+                    break
+                action = rng.choice(np.flatnonzero(game.get_valid_moves(board, player)))
+                board, player = game.get_next_state(board, player, action)
+            boards.append(game.get_canonical_form(board, player))
+        return boards
+
+    @pytest.mark.parametrize("game", [TicTacToeGame(), Connect4Game()])
+    def test_same_visit_counts_as_mcts(self, game):
+        boards = self.openings(game, 12)
+        nn = self.nn_class(game)
+        batched = BatchedMCTS(game, nn, self.args, batch_size=16)
+        probs = batched.get_action_probabilities(boards)
+        for b, board in enumerate(boards):
+            mcts = MCTS(game, self.nn_class(game), self.args)
+            assert np.array_equal(mcts.get_action_probabilities(board), probs[b])
+            assert np.array_equal(batched.n[b, 0], mcts._visit_counts(mcts.root_hash))
+        # one network call per simulation, for all the trees
+        assert len(nn.batch_sizes) <= self.args.num_mcts_sims
+        assert max(nn.batch_sizes) > 1
+
+    def test_trees_are_reset_between_calls(self):
+        game = TicTacToeGame()
+        boards = self.openings(game, 4)
+        batched = BatchedMCTS(game, self.nn_class(game), self.args, batch_size=4)
+        first = batched.get_action_probabilities(boards)
+        second = batched.get_action_probabilities(boards)
+        assert all(np.array_equal(a, b) for a, b in zip(first, second))
+
+    def test_rejects_unsupported_args(self):
+        game = TicTacToeGame()
+        args = MctsArgs(num_mcts_sims=10, c_puct=1.0, solver=True)
+        with pytest.raises(ValueError):
+            BatchedMCTS(game, self.nn_class(game), args, batch_size=2)
@@ -1,9 +1,19 @@
+import os
+from dataclasses import replace
+from queue import Queue
+
+import numpy as np
 import pytest
 from pytest_mock import MockerFixture
 
-from alpha_zero_general.coach import Coach, CoachArgs
+from alpha_zero_general import TrainingExample
+from alpha_zero_general import coach as coach_module
+from alpha_zero_general.coach import Coach, CoachArgs, _self_play_worker
 from alpha_zero_general.connect4.connect4_game import Connect4Game
 from alpha_zero_general.connect4.keras.n_net import Connect4NNInterface as nn
+from alpha_zero_general.example_shards import read_manifest
+from alpha_zero_general.neural_net import sample_examples
+from alpha_zero_general.replay_buffer import ReplayBuffer
 
 
 class TestCoach:
@@ -46,3 +56,168 @@ class TestCoach:
         self.coach.nn.train = mocker.MagicMock()
         self.coach.learn()
         self.coach.nn.train.assert_called()
+
+    @pytest.mark.parametrize("fast_move_examples", ["value", "none"])
+    def test_playout_cap_fast_moves(self, mocker: MockerFixture, fast_move_examples):
+        args = replace(
+            self.args,
+            num_mcts_sims=30,
+            full_search_fraction=0.0,
+            fast_move_examples=fast_move_examples,
+        )
+        coach = Coach(self.game, self.nn, args)
+        sims = []
+
+        def search(board, temperature):
+            sims.append(coach.mcts.args.num_mcts_sims)
+            return np.ones(self.game.get_action_size()) / self.game.get_action_size()
+
+        coach.mcts.get_action_probabilities = search
+        coach.game.get_game_ended = mocker.MagicMock(side_effect=[0, 0, 1])
+        train_examples = coach.execute_episode()
+        assert sims == [5, 5, 5]
+        if fast_move_examples == "none":
+            assert train_examples == []
+        else:
+            assert train_examples
+            assert all(not np.any(example.policy) for example in train_examples)
+
+    def test_worker_episodes(self):
+        args = replace(self.args, num_eps=5, self_play_workers=2)
+        assert Coach(self.game, self.nn, args).worker_episodes() == [3, 2]
+        args = replace(args, episodes_per_worker=4)
+        assert Coach(self.game, self.nn, args).worker_episodes() == [4, 4]
+
+    def test_self_play_worker_streams_seeded_episodes(self):
+        # temperature 1 throughout, the moves only depend on the seeded RNG
+        args = replace(self.args, num_mcts_sims=2, temp_threshold=100)
+        seed = np.random.SeedSequence(3)
+        queue = Queue()
+        _self_play_worker(queue, self.game, lambda: self.nn, args, 2, seed)
+        streamed = [queue.get_nowait() for _ in range(2)]
+        assert queue.empty()
+
+        coach = Coach(self.game, self.nn, args)
+        np.random.seed(seed.generate_state(1))
+        for train_examples, _ in streamed:
+            expected = coach.self_play_episode()
+            assert len(train_examples) == len(expected)
+            for example, other in zip(train_examples, expected):
+                assert np.array_equal(example.board, other.board)
+
+    def test_concurrent_self_play_batches_episodes(self, mocker: MockerFixture):
+        args = replace(self.args, num_mcts_sims=4, concurrent_episodes=3)
+        predict_batch = mocker.spy(self.nn, "predict_batch")
+        episodes = list(Coach(self.game, self.nn, args).concurrent_self_play(5))
+        assert len(episodes) == 5 and all(episodes)
+        batch_sizes = [len(call.args[0]) for call in predict_batch.call_args_list]
+        assert max(batch_sizes) == 3
+
+    def test_one_concurrent_episode_matches_execute_episode(self):
+        args = replace(self.args, num_mcts_sims=4, temp_threshold=100)
+        coach = Coach(self.game, self.nn, args)
+        np.random.seed(0)
+        expected = coach.self_play_episode()
+        np.random.seed(0)
+        (train_examples,) = coach.concurrent_self_play(1)
+        assert len(train_examples) == len(expected)
+        for example, other in zip(train_examples, expected):
+            assert np.array_equal(example.board, other.board)
+            assert np.allclose(example.policy, other.policy)
+
+    def test_replay_buffer_reopens_for_the_next_run(self, tmp_path):
+        args = replace(
+            self.args,
+            num_mcts_sims=2,
+            checkpoint=str(tmp_path),
+            load_folder_file=(str(tmp_path), "best.pth.tar"),
+            replay_buffer=True,
+        )
+        coach = Coach(self.game, self.nn, args)
+        examples = coach.self_play_episode()
+        coach.add_to_replay_buffer(examples)
+        assert len(coach.replay_buffer) == len(examples)
+
+        restarted = Coach(self.game, self.nn, args)
+        restarted.load_train_examples()
+        assert restarted.skip_first_self_play
+        assert [e.evaluation for e in restarted.replay_buffer] == [
+            e.evaluation for e in examples
+        ]
+
+    def test_learn_samples_the_replay_buffer(self, tmp_path, mocker: MockerFixture):
+        args = replace(
+            self.args,
+            num_iters=2,
+            arena_compare=0,
+            checkpoint=str(tmp_path),
+            num_iters_for_train_examples_history=2,
+            replay_buffer=True,
+        )
+        coach = Coach(self.game, self.nn, args)
+        board = self.game.get_init_board()
+        policy = np.ones(self.game.get_action_size()) / self.game.get_action_size()
+        coach.self_play_episode = mocker.MagicMock(
+            side_effect=lambda: [TrainingExample(board, policy, 1.0)] * 5
+        )
+        coach.pnet = mocker.MagicMock()
+        mocker.patch.object(coach.nn, "save_checkpoint")
+        mocker.patch.object(coach.nn, "load_checkpoint")
+        batches = []
+        mocker.patch.object(
+            coach.nn,
+            "train",
+            side_effect=lambda examples: batches.append(sample_examples(examples, 8)),
+        )
+        sample = mocker.spy(ReplayBuffer, "sample")
+        getitem = mocker.spy(ReplayBuffer, "__getitem__")
+        coach.learn()
+        # a batch per train call, and no example read one by one
+        assert sample.call_count == 2
+        getitem.assert_not_called()
+        assert len(coach.replay_buffer) == 10
+        boards, pis, vs = batches[-1]
+        assert boards.shape == (8, *board.shape) and pis.shape == (8, len(policy))
+        assert (vs == 1.0).all()
+
+    def test_train_examples_are_saved_as_shards(self, tmp_path, mocker: MockerFixture):
+        args = replace(
+            self.args,
+            num_iters=3,
+            arena_compare=0,
+            checkpoint=str(tmp_path),
+            load_folder_file=(str(tmp_path), "checkpoint_2.pth.tar"),
+            num_iters_for_train_examples_history=2,
+        )
+        coach = Coach(self.game, self.nn, args)
+        board = self.game.get_init_board()
+        policy = np.ones(self.game.get_action_size()) / self.game.get_action_size()
+        # iteration i plays one episode of one example of value i
+        coach.execute_episode = mocker.MagicMock(
+            side_effect=[[TrainingExample(board, policy, float(i))] for i in (1, 2, 3)]
+        )
+        coach.pnet = mocker.MagicMock()
+        mocker.patch.object(coach.nn, "train")
+        mocker.patch.object(coach.nn, "save_checkpoint")
+        mocker.patch.object(coach.nn, "load_checkpoint")
+        write_shard = mocker.spy(coach_module, "write_shard")
+        coach.learn()
+
+        # iteration i saves the manifest of checkpoint i - 1, with a new shard
+        manifest_files = [f"checkpoint_{i}.pth.tar.examples" for i in range(3)]
+        manifests = [read_manifest(str(tmp_path / name)) for name in manifest_files]
+        first, second, third = (manifest[-1] for manifest in manifests)
+        assert manifests == [[first], [first, second], [second, third]]
+        # each shard written once, and kept for the manifests that list it
+        assert write_shard.call_count == 3
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            [first, second, third, *manifest_files]
+        )
+
+        restarted = Coach(self.game, self.nn, args)
+        restarted.load_train_examples()
+        assert restarted.skip_first_self_play
+        assert [
+            [e.evaluation for e in examples]
+            for examples in restarted.train_examples_history
+        ] == [[2.0], [3.0]]
@@ -0,0 +1,42 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from alpha_zero_general import TrainingExample
+from alpha_zero_general.example_shards import (
+    read_manifest,
+    read_shard,
+    write_manifest,
+    write_shard,
+)
+
+
+class TestExampleShards:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        self.folder = tmp_path
+
+    def test_shard_round_trip(self):
+        examples = [
+            TrainingExample(np.full((3, 3), i, np.int8), np.eye(9)[i], (-1.0) ** i)
+            for i in range(5)
+        ]
+        path = str(self.folder / "0.npz")
+        write_shard(path, examples)
+        loaded = read_shard(path)
+        assert len(loaded) == len(examples)
+        for example, expected in zip(loaded, examples):
+            assert example.board.dtype == np.int8
+            assert np.array_equal(example.board, expected.board)
+            assert np.array_equal(example.policy, expected.policy)
+            assert example.evaluation == expected.evaluation
+
+    def test_manifest_tells_pickles_apart(self):
+        manifest = str(self.folder / "checkpoint_1.pth.tar.examples")
+        write_manifest(manifest, ["a.npz", "b.npz"])
+        assert read_manifest(manifest) == ["a.npz", "b.npz"]
+        pickled = str(self.folder / "checkpoint_0.pth.tar.examples")
+        with open(pickled, "wb") as f:
+            pickle.dump([[]], f)
+        assert read_manifest(pickled) is None
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pytest
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.inference_server import InferenceServer
+from alpha_zero_general.mcts import MCTS
+
+
+class TestInferenceServer:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = Connect4Game()
+        self.nn_class = hash_prior_nn
+        self.nn_factory = partial(hash_prior_nn, self.game)
+        self.board = self.game.get_init_board()
+
+    def test_client_predicts_like_the_network(self):
+        with InferenceServer(self.game, self.nn_factory, num_clients=1) as server:
+            client = server.client(0)()
+            pi, v = client.predict(self.board)
+            expected_pi, expected_v = self.nn_class(self.game).predict(self.board)
+            assert np.allclose(pi, expected_pi) and v == pytest.approx(expected_v)
+
+            args = MctsArgs(num_mcts_sims=30, c_puct=1.0)
+            probs = MCTS(self.game, client, args).get_action_probabilities(self.board)
+            mcts = MCTS(self.game, self.nn_class(self.game), args)
+            assert np.allclose(probs, mcts.get_action_probabilities(self.board))
+
+    def test_batches_concurrent_clients(self):
+        with InferenceServer(
+            self.game, self.nn_factory, num_clients=2, max_wait_ms=50
+        ) as server:
+            clients = [server.client(i)() for i in range(2)]
+
+            def predict_many(client):
+                return [client.predict(self.board)[1] for _ in range(10)]
+
+            with ThreadPoolExecutor(2) as pool:
+                values = list(pool.map(predict_many, clients))
+            assert values[0] == values[1]
+            assert server.mean_batch_size > 1
+
+    def test_predict_batch_fills_the_client_slots(self):
+        boards = [self.board]
+        for action in range(4):
+            boards.append(self.game.get_next_state(boards[-1], 1, action)[0])
+        with InferenceServer(
+            self.game, self.nn_factory, num_clients=1, client_slots=3
+        ) as server:
+            pis, vs = server.client(0)().predict_batch(boards)
+            # 5 boards in requests of 3 and 2
+            assert server.mean_batch_size == 2.5
+        expected_pis, expected_vs = self.nn_class(self.game).predict_batch(boards)
+        assert np.allclose(pis, expected_pis) and np.allclose(vs, expected_vs)
+
+    def test_client_raises_when_the_server_dies(self):
+        with InferenceServer(self.game, self.nn_factory, num_clients=1) as server:
+            client = server.client(0)()
+            server.process.kill()
+            server.process.join()
+            with pytest.raises(RuntimeError):
+                client.predict(self.board)
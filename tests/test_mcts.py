@@ -1,11 +1,19 @@
+import time
+from dataclasses import replace
+
 import numpy as np
 import pytest
 from pytest_mock import MockerFixture
 
 from alpha_zero_general import MctsArgs
+from alpha_zero_general.arena import Arena
+from alpha_zero_general.array_mcts import ArrayMCTS
 from alpha_zero_general.connect4.connect4_game import Connect4Game
 from alpha_zero_general.connect4.keras.n_net import Connect4NNInterface as nn
-from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.gobang.gobang_game import GobangGame
+from alpha_zero_general.mcts import MCTS, MctsPlayer, SearchStats
+from alpha_zero_general.sparse_mcts import SparseMCTS
+from alpha_zero_general.tic_tac_toe.tic_tac_toe_game import TicTacToeGame
 
 
 class TestMCTS:
@@ -32,3 +40,512 @@ class TestMCTS:
         canonicalBoard = self.game.get_canonical_form(board, 1)
         v = self.mcts.search(canonicalBoard)
         assert -1 <= v <= 1
+
+
+class TestBatchedSearch:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = TicTacToeGame()
+        self.nn_class = hash_prior_nn
+        self.board = self.game.get_init_board()
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    def test_batch_size_one_matches_search(self, mcts_class):
+        sequential = mcts_class(
+            self.game, self.nn_class(self.game), MctsArgs(num_mcts_sims=30, c_puct=1)
+        )
+        batched = mcts_class(
+            self.game, self.nn_class(self.game), MctsArgs(num_mcts_sims=30, c_puct=1)
+        )
+        for _ in range(30):
+            sequential.search(self.board)
+            batched.search_batch(self.board, 1)
+        h = self.game.get_board_hash(self.board)
+        assert np.array_equal(sequential._visit_counts(h), batched._visit_counts(h))
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    def test_leaves_are_batched(self, mcts_class):
+        nn = self.nn_class(self.game)
+        args = MctsArgs(num_mcts_sims=64, c_puct=1, leaf_batch_size=8)
+        mcts = mcts_class(self.game, nn, args)
+        probs = mcts.get_action_probabilities(self.board, temperature=1)
+        assert np.isclose(sum(probs), 1)
+        assert max(nn.batch_sizes) > 1
+        assert nn.predict_calls == sum(nn.batch_sizes)
+
+    def test_collisions_are_not_charged(self):
+        # the first round expands the root, its other descents all collide
+        args = MctsArgs(num_mcts_sims=64, c_puct=1, leaf_batch_size=8)
+        fresh = MCTS(self.game, self.nn_class(self.game), args)
+        assert fresh.search_batch(self.board, 8) == 1
+
+        mcts = MCTS(self.game, self.nn_class(self.game), args)
+        mcts.get_action_probabilities(self.board)
+        h = self.game.get_board_hash(self.board)
+        assert mcts.sims_used == args.num_mcts_sims
+        assert mcts._node_visits(h) == args.num_mcts_sims - 1
+
+    def test_virtual_loss_is_reverted(self):
+        mcts = MCTS(
+            self.game,
+            self.nn_class(self.game),
+            MctsArgs(num_mcts_sims=64, c_puct=1, leaf_batch_size=8, virtual_loss=3),
+        )
+        mcts.get_action_probabilities(self.board)
+        for h, n in mcts.n_node_visit.items():
+            edge_visits = [
+                mcts.n_edge_visit.get((h, a), 0)
+                for a in range(self.game.get_action_size())
+            ]
+            assert n == sum(edge_visits)
+        assert all(-1 <= q <= 1 for q in mcts.q_values_cache.values())
+
+    @pytest.mark.parametrize("leaf_batch_size", [1, 8])
+    def test_steps_yield_the_network_calls(self, leaf_batch_size):
+        args = MctsArgs(num_mcts_sims=64, c_puct=1, leaf_batch_size=leaf_batch_size)
+        nn = self.nn_class(self.game)
+        steps = MCTS(self.game, nn, args).get_action_probabilities_steps(self.board)
+        requests = []
+        try:
+            request = next(steps)
+            while True:
+                requests.append(request)
+                boards = request if isinstance(request, list) else [request]
+                policies, values = nn.predict_batch(boards)
+                if isinstance(request, list):
+                    request = steps.send((policies, values))
+                else:
+                    request = steps.send((policies[0], values[0]))
+        except StopIteration as done:
+            probs = done.value
+
+        expected_nn = self.nn_class(self.game)
+        expected = MCTS(self.game, expected_nn, args).get_action_probabilities(
+            self.board
+        )
+        assert np.array_equal(probs, expected)
+        boards = sum(len(r) if isinstance(r, list) else 1 for r in requests)
+        assert boards == expected_nn.predict_calls
+        assert all(isinstance(r, list) for r in requests) == (leaf_batch_size > 1)
+
+
+class TestIterativeSearch:
+    def test_path_buffers_grow(self, hash_prior_nn):
+        game = TicTacToeGame()
+        board = game.get_init_board()
+        reference = MCTS(
+            game, hash_prior_nn(game), MctsArgs(num_mcts_sims=200, c_puct=1)
+        )
+        mcts = MCTS(game, hash_prior_nn(game), MctsArgs(num_mcts_sims=200, c_puct=1))
+        mcts._path_hashes, mcts._path_actions = [0], [0]
+        assert np.array_equal(
+            reference.get_action_probabilities(board),
+            mcts.get_action_probabilities(board),
+        )
+        assert len(mcts._path_hashes) > 1
+
+
+class TestSubtreeReuse:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = TicTacToeGame()
+        self.nn = hash_prior_nn(self.game)
+        self.board = self.game.get_init_board()
+
+    def child(self, board, action):
+        next_board, next_player = self.game.get_next_state(board, 1, action)
+        return self.game.get_canonical_form(next_board, next_player)
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    def test_advance_keeps_child_subtree(self, mcts_class):
+        mcts = mcts_class(self.game, self.nn, MctsArgs(num_mcts_sims=100, c_puct=1))
+        probs = mcts.get_action_probabilities(self.board)
+        action = int(np.argmax(probs))
+        child = self.child(self.board, action)
+        child_hash = self.game.get_board_hash(child)
+        child_counts = mcts._visit_counts(child_hash)
+
+        mcts.advance(action)
+
+        assert mcts.root_hash == child_hash
+        assert np.array_equal(mcts._visit_counts(child_hash), child_counts)
+        assert mcts._node_visits(self.game.get_board_hash(self.board)) == 0
+        assert set(mcts.board_cache) == mcts._reachable(child_hash)
+
+    def test_reuse_root_visits_tops_up(self):
+        args = MctsArgs(num_mcts_sims=100, c_puct=1, reuse_root_visits=True)
+        mcts = MCTS(self.game, self.nn, args)
+        action = int(np.argmax(mcts.get_action_probabilities(self.board)))
+        mcts.advance(action)
+        child_hash = mcts.root_hash
+        kept = mcts._node_visits(child_hash)
+        assert kept > 0
+
+        calls = self.nn.predict_calls
+        mcts.get_action_probabilities(self.child(self.board, action))
+        assert mcts._node_visits(child_hash) == args.num_mcts_sims
+        assert self.nn.predict_calls - calls <= args.num_mcts_sims - kept
+
+    def test_advance_before_search_is_noop(self):
+        mcts = MCTS(self.game, self.nn, MctsArgs(num_mcts_sims=10, c_puct=1))
+        mcts.advance(0)
+        assert mcts.root_hash is None
+
+    def test_mcts_player_in_arena(self):
+        players = [
+            MctsPlayer(MCTS(self.game, self.nn, MctsArgs(num_mcts_sims=20, c_puct=1)))
+            for _ in range(2)
+        ]
+        arena = Arena(players[0], players[1], self.game)
+        assert abs(arena.play_game()) in [1, 1e-4]
+
+    def test_mcts_players_across_games(self):
+        players = [
+            MctsPlayer(MCTS(self.game, self.nn, MctsArgs(num_mcts_sims=20, c_puct=1)))
+            for _ in range(2)
+        ]
+        arena = Arena(players[0], players[1], self.game)
+        assert sum(arena.play_games(4)) == 4
+
+
+class TestBoundedTable:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = GobangGame(n=6, nir=4)
+        self.nn = hash_prior_nn(self.game)
+        self.board = self.game.get_init_board()
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    @pytest.mark.parametrize("eviction", ["lru", "least_visited"])
+    def test_node_budget_holds(self, mcts_class, eviction):
+        args = MctsArgs(num_mcts_sims=200, c_puct=1, max_nodes=50, eviction=eviction)
+        mcts = mcts_class(self.game, self.nn, args)
+        probs = mcts.get_action_probabilities(self.board)
+        occupancy = mcts.occupancy()
+        assert occupancy.nodes <= args.max_nodes
+        assert occupancy.evictions > 0
+        assert np.isclose(probs.sum(), 1)
+        assert mcts.root_hash in mcts.board_cache
+        store = mcts.nodes if mcts_class is ArrayMCTS else mcts.policy_cache
+        assert set(store) <= set(mcts.board_cache)
+
+    def test_byte_budget_holds(self):
+        args = MctsArgs(num_mcts_sims=200, c_puct=1, max_bytes=20_000)
+        mcts = ArrayMCTS(self.game, self.nn, args)
+        mcts.get_action_probabilities(self.board)
+        occupancy = mcts.occupancy()
+        assert occupancy.max_nodes == args.max_bytes // mcts._bytes_per_node
+        assert occupancy.estimated_bytes <= args.max_bytes
+
+    def test_unbounded_table_never_evicts(self):
+        mcts = MCTS(self.game, self.nn, MctsArgs(num_mcts_sims=200, c_puct=1))
+        mcts.get_action_probabilities(self.board)
+        occupancy = mcts.occupancy()
+        assert occupancy.max_nodes is None
+        assert occupancy.evictions == 0
+        assert occupancy.nodes == len(mcts.board_cache) > 50
+
+
+class TestGumbelSearch:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = GobangGame(n=6, nir=4)
+        self.nn = hash_prior_nn(self.game)
+        self.board = self.game.get_init_board()
+        self.args = MctsArgs(
+            num_mcts_sims=24, c_puct=1, root_search="gumbel", gumbel_num_actions=4
+        )
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    def test_sequential_halving(self, mcts_class):
+        mcts = mcts_class(self.game, self.nn, replace(self.args, seed=3))
+        improved_policy = mcts.get_action_probabilities(self.board)
+        counts = mcts._visit_counts(mcts.root_hash)
+        valid_move = self.game.get_valid_moves(self.board, 1)
+
+        assert counts.sum() == self.args.num_mcts_sims - 1
+        assert np.count_nonzero(counts) == self.args.gumbel_num_actions
+        assert mcts.gumbel_action == np.argmax(counts)
+        assert np.isclose(improved_policy.sum(), 1)
+        assert np.all(improved_policy[valid_move == 0] == 0)
+        assert self.nn.predict_calls == self.args.num_mcts_sims
+
+    def test_same_search_on_both_stores(self):
+        args = replace(self.args, seed=5)
+        dict_probs = MCTS(self.game, self.nn, args).get_action_probabilities(self.board)
+        array_probs = ArrayMCTS(self.game, self.nn, args).get_action_probabilities(
+            self.board
+        )
+        assert np.allclose(dict_probs, array_probs)
+
+    def test_greedy_plays_gumbel_action(self):
+        mcts = MCTS(self.game, self.nn, self.args)
+        probs = mcts.get_action_probabilities(self.board, temperature=0)
+        assert probs[mcts.gumbel_action] == 1
+        assert probs.sum() == 1
+
+
+class TestEarlyStop:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = TicTacToeGame()
+        self.nn = hash_prior_nn(self.game)
+        self.args = MctsArgs(num_mcts_sims=200, c_puct=1, early_stop=True)
+
+    @pytest.mark.parametrize("leaf_batch_size", [1, 8])
+    def test_stops_once_argmax_is_decided(self, leaf_batch_size):
+        args = replace(self.args, leaf_batch_size=leaf_batch_size)
+        board = self.game.get_init_board()
+        full = MCTS(self.game, self.nn, replace(args, early_stop=False))
+        full_probs = full.get_action_probabilities(board, temperature=0)
+        mcts = MCTS(self.game, self.nn, args)
+        probs = mcts.get_action_probabilities(board, temperature=0)
+        assert full.sims_used == args.num_mcts_sims
+        assert mcts.sims_used < args.num_mcts_sims
+        assert np.array_equal(probs, full_probs)
+
+    def test_sampling_runs_every_simulation(self):
+        mcts = MCTS(self.game, self.nn, self.args)
+        mcts.get_action_probabilities(self.game.get_init_board(), temperature=1)
+        assert mcts.sims_used == self.args.num_mcts_sims
+
+    def test_single_valid_move_is_not_searched(self):
+        board = np.array([[1, -1, 1], [1, -1, -1], [-1, 1, 0]])
+        mcts = MCTS(self.game, self.nn, self.args)
+        probs = mcts.get_action_probabilities(board, temperature=0)
+        assert probs[8] == 1
+        assert mcts.sims_used == 0
+        assert self.nn.predict_calls == 0
+
+
+class TestTimeBudget:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = TicTacToeGame()
+        self.nn = hash_prior_nn(self.game)
+        self.board = self.game.get_init_board()
+
+    @pytest.mark.parametrize("leaf_batch_size", [1, 4])
+    def test_stops_at_deadline(self, leaf_batch_size, mocker: MockerFixture):
+        predict = self.nn.predict
+        mocker.patch.object(
+            self.nn, "predict", side_effect=lambda b: (time.sleep(0.002), predict(b))[1]
+        )
+        args = MctsArgs(
+            num_mcts_sims=10_000,
+            c_puct=1,
+            leaf_batch_size=leaf_batch_size,
+            time_budget_ms=50,
+        )
+        mcts = MCTS(self.game, self.nn, args)
+        probs = mcts.get_action_probabilities(self.board)
+        assert 0 < mcts.sims_used < args.num_mcts_sims
+        assert 0.05 <= mcts.search_seconds < 0.5
+        assert np.isclose(probs.sum(), 1)
+
+    def test_valid_policy_without_time(self):
+        board = np.array([[1, -1, 1], [1, -1, 0], [-1, 0, 0]])
+        args = MctsArgs(num_mcts_sims=100, c_puct=1, time_budget_ms=0)
+        mcts = MCTS(self.game, self.nn, args)
+        probs = mcts.get_action_probabilities(board)
+        assert mcts.sims_used == 0
+        assert np.allclose(probs, self.game.get_valid_moves(board, 1) / 3)
+
+
+class TestSolver:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = TicTacToeGame()
+        self.nn = hash_prior_nn(self.game)
+        self.args = MctsArgs(num_mcts_sims=3000, c_puct=1, solver=True)
+
+    def negamax(self, board):
+        value = self.game.get_game_ended(board, 1)
+        if value != 0:
+            return value
+        values = []
+        for action in np.flatnonzero(self.game.get_valid_moves(board, 1)):
+            next_board, next_player = self.game.get_next_state(board, 1, action)
+            values.append(-self.negamax(self.game.get_canonical_form(next_board, -1)))
+        return max(values)
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    def test_win_in_one(self, mcts_class):
+        board = np.array([[1, 1, 0], [-1, -1, 0], [0, 0, 0]])
+        mcts = mcts_class(self.game, self.nn, self.args)
+        probs = mcts.get_action_probabilities(board, temperature=1)
+        assert mcts.proven[mcts.root_hash] == 1
+        assert probs[2] == 1
+        assert mcts.sims_used < 20
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    @pytest.mark.parametrize("seed", range(4))
+    def test_proves_minimax_value(self, mcts_class, seed):
+        rng = np.random.default_rng(seed)
+        board = self.game.get_init_board()
+        for _ in range(3):
+            action = rng.choice(np.flatnonzero(self.game.get_valid_moves(board, 1)))
+            next_board, next_player = self.game.get_next_state(board, 1, action)
+            board = self.game.get_canonical_form(next_board, next_player)
+        mcts = mcts_class(self.game, self.nn, self.args)
+        mcts.get_action_probabilities(board)
+        assert mcts.proven[mcts.root_hash] == self.negamax(board)
+        assert mcts.sims_used < self.args.num_mcts_sims
+
+
+class TestSymmetry:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = TicTacToeGame()
+        self.nn_class = hash_prior_nn
+        self.args = MctsArgs(num_mcts_sims=200, c_puct=1, symmetry=True)
+        self.board = np.array([[1, 0, 0], [0, 0, -1], [0, 0, 0]])  # no self-symmetry
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    def test_policy_follows_board_orientation(self, mcts_class):
+        probs = mcts_class(
+            self.game, self.nn_class(self.game), self.args
+        ).get_action_probabilities(self.board)
+        for sym_board, sym_probs in self.game.get_symmetries(self.board, probs):
+            mcts = mcts_class(self.game, self.nn_class(self.game), self.args)
+            assert np.allclose(mcts.get_action_probabilities(sym_board)[:9], sym_probs)
+
+    def test_fewer_nodes_and_evaluations(self):
+        board = self.game.get_init_board()
+        plain_nn, symmetry_nn = self.nn_class(self.game), self.nn_class(self.game)
+        plain = MCTS(self.game, plain_nn, replace(self.args, symmetry=False))
+        plain.get_action_probabilities(board)
+        mcts = MCTS(self.game, symmetry_nn, self.args)
+        probs = mcts.get_action_probabilities(board)
+        assert np.isclose(probs.sum(), 1)
+        assert probs[9] == 0  # no pass in TicTacToe
+        assert len(mcts.board_cache) < len(plain.board_cache)
+        assert mcts.symmetry_hit_rate() > 0
+        assert symmetry_nn.predict_calls < plain_nn.predict_calls
+
+    def test_advance_follows_the_played_move(self):
+        mcts = MCTS(self.game, self.nn_class(self.game), self.args)
+        action = int(np.argmax(mcts.get_action_probabilities(self.board)))
+        next_board, _ = self.game.get_next_state(self.board, 1, action)
+        next_board = self.game.get_canonical_form(next_board, -1)
+        mcts.advance(action)
+        representative, _ = mcts._representative(next_board)
+        assert mcts.root_hash == self.game.get_board_hash(representative)
+        assert mcts._node_visits(mcts.root_hash) > 0
+        assert np.isclose(mcts.get_action_probabilities(next_board).sum(), 1)
+
+
+class TestChildCache:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = GobangGame(n=6, nir=4)
+        self.nn_class = hash_prior_nn
+        self.args = MctsArgs(num_mcts_sims=200, c_puct=0.5)
+        self.board = self.game.get_init_board()
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS])
+    @pytest.mark.parametrize("max_nodes", [None, 50])
+    def test_same_policy_as_uncached(self, mcts_class, max_nodes):
+        args = replace(self.args, max_nodes=max_nodes)
+        uncached = mcts_class(
+            self.game, self.nn_class(self.game), replace(args, cache_children=False)
+        )
+        mcts = mcts_class(self.game, self.nn_class(self.game), args)
+        assert np.allclose(
+            mcts.get_action_probabilities(self.board),
+            uncached.get_action_probabilities(self.board),
+        )
+
+    def test_known_edges_are_lookups(self, mocker: MockerFixture):
+        spy = mocker.spy(self.game, "get_next_canonical_state")
+        mcts = MCTS(self.game, self.nn_class(self.game), self.args)
+        mcts.get_action_probabilities(self.board)
+        # one call per node reached, none for the descents through it again
+        assert spy.call_count == len(mcts.board_cache) - 1
+        assert mcts.occupancy().child_edges == spy.call_count
+
+
+class TestProgressiveWidening:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = GobangGame(n=6, nir=4)
+        self.nn_class = hash_prior_nn
+        self.args = MctsArgs(num_mcts_sims=100, c_puct=1, widening_base=2)
+        self.board = self.game.get_init_board()
+
+    def test_stores_agree(self):
+        probs = [
+            mcts_class(
+                self.game, self.nn_class(self.game), self.args
+            ).get_action_probabilities(self.board)
+            for mcts_class in [MCTS, ArrayMCTS, SparseMCTS]
+        ]
+        assert np.allclose(probs[0], probs[1])
+        assert np.allclose(probs[0], probs[2])
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS, SparseMCTS])
+    def test_root_visits_top_prior_actions(self, mcts_class):
+        nn = self.nn_class(self.game)
+        mcts = mcts_class(self.game, nn, self.args)
+        mcts.get_action_probabilities(self.board)
+        counts = mcts._visit_counts(mcts.root_hash)
+        prior, _ = nn.predict(self.board)
+        prior = prior * self.game.get_valid_moves(self.board, 1)
+        # the root ends with num_mcts_sims - 1 visits
+        width = int(np.ceil(2 * self.args.num_mcts_sims**0.5))
+        top = np.argsort(-prior, kind="stable")[:width]
+        assert set(np.flatnonzero(counts)) <= set(top)
+        assert np.count_nonzero(counts) > 2  # widened past widening_base
+
+    def test_solver_excludes_beyond_the_width(self):
+        game = TicTacToeGame()
+        args = replace(self.args, num_mcts_sims=3000, widening_base=1, solver=True)
+        mcts = MCTS(game, self.nn_class(game), args)
+        board = np.array([[1, -1, 0], [0, -1, 0], [0, 0, 1]])
+        mcts.get_action_probabilities(board)
+        assert mcts.root_hash in mcts.proven
+
+
+class TestTelemetry:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = TicTacToeGame()
+        self.nn_class = hash_prior_nn
+        self.args = MctsArgs(num_mcts_sims=200, c_puct=1, telemetry=True)
+        self.board = self.game.get_init_board()
+
+    @pytest.mark.parametrize("mcts_class", [MCTS, ArrayMCTS, SparseMCTS])
+    def test_counts_the_search(self, mcts_class):
+        nn = self.nn_class(self.game)
+        mcts = mcts_class(self.game, nn, self.args)
+        probs = mcts.get_action_probabilities(self.board)
+        plain = mcts_class(
+            self.game, self.nn_class(self.game), replace(self.args, telemetry=False)
+        )
+        assert np.allclose(probs, plain.get_action_probabilities(self.board))
+
+        stats = mcts.search_stats
+        assert stats.moves == 1 and stats.simulations == stats.descents == 200
+        assert stats.nn_calls == stats.nodes_allocated == nn.predict_calls
+        assert stats.transposition_hits > 0  # tic tac toe moves commute
+        assert 0 < stats.mean_depth <= stats.max_depth
+        assert stats.game_calls > stats.nn_calls
+        assert 0 < stats.nn_seconds + stats.game_seconds < stats.search_seconds
+        assert stats.tree_seconds > 0
+
+    def test_off_by_default(self):
+        mcts = MCTS(
+            self.game, self.nn_class(self.game), replace(self.args, telemetry=False)
+        )
+        mcts.get_action_probabilities(self.board)
+        assert mcts.search_stats is None and mcts.game is self.game
+
+    def test_player_sums_the_moves(self):
+        player = MctsPlayer(MCTS(self.game, self.nn_class(self.game), self.args))
+        board, total = self.board, SearchStats()
+        for _ in range(2):
+            board, _ = self.game.get_next_state(board, 1, player(board))
+            total += player.mcts.search_stats
+            board = self.game.get_canonical_form(board, -1)
+        assert player.search_stats == total
+        assert total.moves == 2 and total.simulations == sum(player.sims_used)
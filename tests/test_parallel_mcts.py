@@ -0,0 +1,45 @@
+from dataclasses import replace
+from functools import partial
+
+import numpy as np
+import pytest
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.mcts import MCTS, MctsPlayer
+from alpha_zero_general.parallel_mcts import RootParallelMCTS
+from alpha_zero_general.tic_tac_toe.tic_tac_toe_game import TicTacToeGame
+
+
+class TestRootParallelMCTS:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.game = TicTacToeGame()
+        self.nn_factory = partial(hash_prior_nn, self.game)
+        self.args = MctsArgs(num_mcts_sims=41, c_puct=1, dirichlet_alpha=0.3, seed=7)
+        self.board = self.game.get_init_board()
+
+    def test_sums_worker_visit_counts(self):
+        with RootParallelMCTS(self.game, self.nn_factory, self.args, 2) as mcts:
+            probs = mcts.get_action_probabilities(self.board)
+            assert mcts.num_sims == [21, 20]
+
+        counts = np.zeros(self.game.get_action_size())
+        seeds = np.random.SeedSequence(self.args.seed).generate_state(2)
+        for seed, num_sims in zip(seeds, [21, 20]):
+            args = replace(self.args, num_mcts_sims=num_sims, seed=int(seed))
+            worker = MCTS(self.game, self.nn_factory(), args)
+            worker.get_action_probabilities(self.board)
+            counts += worker._visit_counts(worker.root_hash)
+        assert np.allclose(probs, counts / counts.sum())
+
+    def test_workers_need_root_noise(self):
+        args = replace(self.args, dirichlet_alpha=0.0)
+        with pytest.raises(ValueError):
+            RootParallelMCTS(self.game, self.nn_factory, args, 2)
+
+    def test_plays_through_mcts_player(self):
+        with RootParallelMCTS(self.game, self.nn_factory, self.args, 2) as mcts:
+            player = MctsPlayer(mcts)
+            action = player(self.board)
+        assert self.game.get_valid_moves(self.board, 1)[action]
+        assert player.sims_used == [41]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from alpha_zero_general import TrainingExample
+from alpha_zero_general.replay_buffer import ReplayBuffer
+
+
+class TestReplayBuffer:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        self.folder = str(tmp_path / "replay")
+
+    def iteration(self, first, count):
+        # example i has board i, a one-hot policy on i % 4 and value i
+        return [
+            TrainingExample(np.full((2, 3), i), np.eye(4)[i % 4], float(i))
+            for i in range(first, first + count)
+        ]
+
+    def test_evicts_whole_iterations(self):
+        buffer = ReplayBuffer.create(self.folder, 10, 3, self.iteration(0, 1)[0])
+        for first in 0, 4, 8:
+            buffer.add_iteration(self.iteration(first, 4))
+        # 12 examples do not fit in 10, the first iteration went
+        assert [e.evaluation for e in buffer] == list(range(4, 12))
+        buffer.add_iteration(self.iteration(12, 2))
+        buffer.add_iteration(self.iteration(14, 2))
+        # at most 3 iterations
+        assert [e.evaluation for e in buffer] == list(range(8, 16))
+        assert buffer.iteration_sizes == [4, 2, 2]
+        assert np.array_equal(buffer[-1].board, np.full((2, 3), 15))
+
+    def test_reopens_where_it_left_off(self):
+        buffer = ReplayBuffer.create(self.folder, 6, 5, self.iteration(0, 1)[0])
+        for first in 0, 4:
+            buffer.add_iteration(self.iteration(first, 4))
+        reopened = ReplayBuffer.open(self.folder)
+        assert len(reopened) == len(buffer) == 4
+        for example, expected in zip(reopened, self.iteration(4, 4)):
+            assert np.array_equal(example.board, expected.board)
+            assert np.array_equal(example.policy, expected.policy)
+            assert example.evaluation == expected.evaluation
+        reopened.add_iteration(self.iteration(8, 3))
+        assert [e.evaluation for e in ReplayBuffer.open(self.folder)] == [8, 9, 10]
+
+    def test_sample_draws_stored_rows(self):
+        buffer = ReplayBuffer.create(self.folder, 8, 2, self.iteration(0, 1)[0])
+        buffer.add_iteration(self.iteration(0, 5))
+        buffer.add_iteration(self.iteration(5, 5))  # wraps around the ring
+        boards, policies, values = buffer.sample(64, np.random.default_rng(0))
+        assert boards.shape == (64, 2, 3) and policies.shape == (64, 4)
+        assert set(values.tolist()) <= set(range(5, 10))
+        for board, policy, value in zip(boards, policies, values):
+            assert (board == value).all() and policy[int(value) % 4] == 1
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.array_mcts import ArrayMCTS
+from alpha_zero_general.gobang.gobang_game import GobangGame
+from alpha_zero_general.sparse_mcts import SparseMCTS
+from alpha_zero_general.tafl.tafl_game import TaflGame
+from alpha_zero_general.tic_tac_toe.tic_tac_toe_game import TicTacToeGame
+
+
+class TestSparseMCTS:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.nn_class = hash_prior_nn
+        self.args = MctsArgs(num_mcts_sims=50, c_puct=1.0)
+
+    @pytest.mark.parametrize("game", [TicTacToeGame(), GobangGame(n=6, nir=4)])
+    @pytest.mark.parametrize("solver", [False, True])
+    def test_same_policy_as_array_store(self, game, solver):
+        args = MctsArgs(num_mcts_sims=50, c_puct=1.0, solver=solver)
+        board = game.get_canonical_form(game.get_init_board(), 1)
+        array_mcts = ArrayMCTS(game, self.nn_class(game), args)
+        sparse_mcts = SparseMCTS(game, self.nn_class(game), args)
+        for _ in range(3):
+            array_probs = array_mcts.get_action_probabilities(board, temperature=1)
+            sparse_probs = sparse_mcts.get_action_probabilities(board, temperature=1)
+            assert np.allclose(array_probs, sparse_probs)
+            action = int(np.argmax(sparse_probs))
+            board, player = game.get_next_state(board, 1, action)
+            board = game.get_canonical_form(board, player)
+
+    def test_nodes_hold_valid_actions_only(self):
+        game = TaflGame("Brandubh")
+        mcts = SparseMCTS(game, self.nn_class(game), self.args)
+        board = game.get_init_board()
+        probs = mcts.get_action_probabilities(board)
+        assert len(probs) == game.get_action_size()
+        node = mcts.nodes[mcts.root_hash]
+        valid_moves = game.get_valid_moves(board, 1)
+        assert len(node.actions) == valid_moves.sum() < game.get_action_size() // 10
+        assert node.n.sum() == node.visits == self.args.num_mcts_sims - 1
+        assert np.all(probs[valid_moves == 0] == 0)
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from alpha_zero_general.tafl.tafl_game import TaflGame
+
+
+class TestTaflGame:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.game = TaflGame("Brandubh")
+
+    def test_get_game_ended_is_for_the_player_to_move(self):
+        rng = np.random.default_rng(0)
+        board, player = self.game.get_init_board(), 1
+        while not board.done:
+            valid_moves = self.game.get_valid_moves(board, player)
+            action = rng.choice(np.flatnonzero(valid_moves))
+            board, player = self.game.get_next_state(board, player, action)
+        # white (player 1) won, with black to move
+        assert board.done == 1 and player == board.get_player_to_move() == -1
+        assert self.game.get_game_ended(board, player) == -1  # as Arena asks
+        # the canonical form keeps the colors, and MCTS always asks for player 1
+        canonical_board = self.game.get_canonical_form(board, player)
+        assert self.game.get_game_ended(canonical_board, 1) == -1
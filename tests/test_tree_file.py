@@ -0,0 +1,66 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.array_mcts import ArrayMCTS
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.dots_and_boxes.dots_and_boxes_game import DotsAndBoxesGame
+from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.sparse_mcts import SparseMCTS
+from alpha_zero_general.tree_file import TreeFile
+
+
+class TestTreeFile:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn, tmp_path):
+        self.game = DotsAndBoxesGame(n=2)
+        self.nn_class = hash_prior_nn
+        self.args = MctsArgs(num_mcts_sims=300, c_puct=1.0, reuse_root_visits=True)
+        self.board = self.game.get_init_board()
+        self.path = str(tmp_path / "tree.bin")
+
+    def searched(self, mcts_class):
+        mcts = mcts_class(self.game, self.nn_class(self.game), self.args)
+        probs = mcts.get_action_probabilities(self.board)
+        mcts.save_tree(self.path)
+        return mcts, probs
+
+    @pytest.mark.parametrize("saved_by", [MCTS, ArrayMCTS, SparseMCTS])
+    @pytest.mark.parametrize("loaded_by", [MCTS, ArrayMCTS, SparseMCTS])
+    def test_warm_start_needs_no_search(self, saved_by, loaded_by):
+        _, probs = self.searched(saved_by)
+        nn = self.nn_class(self.game)
+        # the root kept num_mcts_sims - 1 visits, a budget they cover
+        warm = loaded_by(self.game, nn, replace(self.args, num_mcts_sims=299))
+        warm.load_tree(self.path)
+        assert np.allclose(warm.get_action_probabilities(self.board), probs)
+        assert warm.sims_used == 0 and nn.predict_calls == 0
+
+    def test_search_continues_as_if_never_saved(self):
+        mcts, _ = self.searched(SparseMCTS)
+        warm = SparseMCTS(self.game, self.nn_class(self.game), self.args)
+        warm.load_tree(self.path)
+        for tree in mcts, warm:
+            tree.args = replace(self.args, num_mcts_sims=600)
+        probs = mcts.get_action_probabilities(self.board)
+        assert np.allclose(warm.get_action_probabilities(self.board), probs)
+
+    def test_untouched_nodes_are_saved_again(self):
+        mcts, _ = self.searched(SparseMCTS)
+        warm = SparseMCTS(self.game, self.nn_class(self.game), self.args)
+        warm.load_tree(self.path)
+        board, _ = self.game.get_next_state(self.board, 1, 0)
+        warm.get_action_probabilities(self.game.get_canonical_form(board, -1))
+        warm.save_tree(self.path)
+        tree = TreeFile.open(self.path)
+        assert isinstance(tree.hashes, np.memmap)
+        assert set(mcts.nodes) <= set(tree.hashes.tolist())
+        assert np.all(np.diff(tree.hashes.astype(np.float64)) > 0)
+
+    def test_rejects_the_tree_of_another_game(self):
+        self.searched(MCTS)
+        game = Connect4Game()
+        with pytest.raises(ValueError):
+            MCTS(game, self.nn_class(game), self.args).load_tree(self.path)
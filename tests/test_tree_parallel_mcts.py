@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.othello.othello_game import OthelloGame
+from alpha_zero_general.py313_backport import is_gil_enabled
+from alpha_zero_general.tree_parallel_mcts import TreeParallelMCTS
+
+
+class TestTreeParallelMCTS:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, hash_prior_nn):
+        self.nn_class = hash_prior_nn
+        self.game = OthelloGame(6)
+        self.board = self.game.get_init_board()
+
+    def threaded(self, args):
+        mcts = TreeParallelMCTS(self.game, self.nn_class(self.game), args)
+        mcts.num_threads = 4  # interleave the threads even when the GIL is on
+        return mcts
+
+    @pytest.mark.parametrize("widening_base", [None, 2.0])
+    def test_threads_keep_the_tree_consistent(self, widening_base):
+        args = MctsArgs(num_mcts_sims=400, c_puct=1.0, widening_base=widening_base)
+        with self.threaded(args) as mcts:
+            probs = mcts.get_action_probabilities(self.board)
+        assert mcts.sims_used == 400
+        assert np.isclose(probs.sum(), 1)
+        assert np.all(probs[self.game.get_valid_moves(self.board, 1) == 0] == 0)
+        for node in mcts.nodes.values():  # every virtual loss was backed out
+            assert node.visits == node.n.sum()
+            assert np.all(node.n >= 0) and np.all(np.abs(node.q) <= 1)
+        # a simulation of the round may back up the leaf another one expanded
+        root = mcts.nodes[mcts.root_hash]
+        assert 400 - len(mcts.nodes) <= root.visits <= 399
+
+    def test_threads_rank_every_node_for_widening(self):
+        args = MctsArgs(num_mcts_sims=400, c_puct=1.0, widening_base=2.0)
+        with self.threaded(args) as mcts:
+            mcts.get_action_probabilities(self.board)
+        assert mcts.widening_order.keys() == mcts.nodes.keys()
+        for h, node in mcts.nodes.items():  # valid actions by decreasing prior
+            order = mcts.widening_order[h]
+            assert sorted(order) == list(np.flatnonzero(node.valid))
+            assert np.all(np.diff(node.p[order]) <= 0)
+        for h, edges in mcts.children.items():
+            assert h in mcts.nodes
+            assert set(edges.values()) <= mcts.game_value_cache.keys()
+
+    def test_single_thread_under_the_gil(self):
+        args = MctsArgs(num_mcts_sims=50, c_puct=1.0, num_threads=4)
+        mcts = TreeParallelMCTS(self.game, self.nn_class(self.game), args)
+        assert mcts.num_threads == (1 if is_gil_enabled() else 4)
+
+    @pytest.mark.parametrize(
+        "unsupported",
+        [
+            {"num_threads": 0},
+            {"max_nodes": 100},
+            {"solver": True},
+            {"leaf_batch_size": 8},
+        ],
+    )
+    def test_rejects_unsupported_args(self, unsupported):
+        args = MctsArgs(num_mcts_sims=50, c_puct=1.0, **unsupported)
+        with pytest.raises(ValueError):
+            TreeParallelMCTS(self.game, self.nn_class(self.game), args)
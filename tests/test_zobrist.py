@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from alpha_zero_general import MctsArgs
+from alpha_zero_general.connect4.connect4_game import Connect4Game
+from alpha_zero_general.dots_and_boxes.dots_and_boxes_game import DotsAndBoxesGame
+from alpha_zero_general.gobang.gobang_game import GobangGame
+from alpha_zero_general.mcts import MCTS
+from alpha_zero_general.othello.othello_game import OthelloGame
+from alpha_zero_general.tafl.tafl_game import TaflGame
+from alpha_zero_general.tic_tac_toe.tic_tac_toe_game import TicTacToeGame
+from alpha_zero_general.tic_tac_toe_3d.tic_tac_toe_3d_game import TicTacToe3DGame
+from alpha_zero_general.zobrist import ZobristHash, flip
+
+GAMES = [
+    TicTacToeGame(),
+    TicTacToe3DGame(3),
+    GobangGame(n=6, nir=4),
+    OthelloGame(6),
+    Connect4Game(),
+    DotsAndBoxesGame(3),
+    TaflGame("Brandubh"),
+]
+
+
+class TestZobristHash:
+    def test_negated_board_flips_hash(self):
+        zobrist = ZobristHash(9)
+        board = np.array([1, -1, 0, 0, 1, 0, -1, 0, 0])
+        assert zobrist.board_hash(-board) == flip(zobrist.board_hash(board))
+        assert zobrist.board_hash(np.zeros(9)) == 0
+
+    def test_diff_hash(self):
+        zobrist = ZobristHash(9)
+        board = np.array([1, -1, 0, 0, 1, 0, -1, 0, 0])
+        next_board = np.array([1, 1, 1, 0, 1, 0, -1, 0, -1])
+        h = zobrist.diff_hash(zobrist.board_hash(board), board, next_board)
+        assert h == zobrist.board_hash(next_board)
+
+    def test_hashes_are_64_bit(self):
+        zobrist = ZobristHash(64, num_pieces=2)
+        keys = [zobrist.key(cell, p) for cell in range(64) for p in [-2, -1, 1, 2]]
+        assert all(0 <= k < 1 << 64 for k in keys)
+        assert len(set(keys)) == len(keys)
+        assert max(keys) >= 1 << 63
+
+
+@pytest.mark.parametrize("game", GAMES, ids=lambda g: type(g).__name__)
+def test_incremental_hash_matches_full_hash(game):
+    rng = np.random.default_rng(0)
+    board = game.get_canonical_form(game.get_init_board(), 1)
+    h = game.get_board_hash(board)
+    while game.get_game_ended(board, 1) == 0:
+        valid_moves = np.flatnonzero(game.get_valid_moves(board, 1))
+        board, h = game.get_next_canonical_state(board, h, int(rng.choice(valid_moves)))
+        assert h == game.get_board_hash(board)
+
+
+def test_equal_tafl_positions_share_a_hash():
+    game = TaflGame("Brandubh")
+    board = game.get_init_board()
+    assert game.get_board_hash(board) == game.get_board_hash(board.get_copy())
+    action = int(np.flatnonzero(game.get_valid_moves(board, 1))[0])
+    child, _ = game.get_next_state(board, 1, action)
+    assert game.get_board_hash(child) != game.get_board_hash(board)
+
+
+@pytest.mark.parametrize("symmetry", [False, True])
+def test_mcts_checks_hashes(hash_prior_nn, symmetry):
+    game = OthelloGame(6)
+    args = MctsArgs(num_mcts_sims=200, c_puct=1.0, symmetry=symmetry, check_hashes=True)
+    mcts = MCTS(game, hash_prior_nn(game), args)
+    board = game.get_canonical_form(game.get_init_board(), 1)
+    mcts.get_action_probabilities(board)
+    assert len(mcts.board_cache) > 1
+
+    # a wrong incremental hash is caught
+    game.get_next_canonical_state = lambda board, h, action: (board, h ^ 1)
+    with pytest.raises(RuntimeError):
+        MCTS(game, hash_prior_nn(game), args).get_action_probabilities(board)